@@ -0,0 +1,430 @@
+"""API HTTP/JSON sobre ``LinksService``, con asyncio y sin dependencias externas.
+
+Rutas:
+    GET    /usuarios                 lista de usuarios
+    POST   /usuarios                 crea un usuario {id, nombre, apellido, email}
+    GET    /usuarios/<id>            un usuario
+    PUT    /usuarios/<id>            actualiza {nombre, apellido, email, version}
+    DELETE /usuarios/<id>            elimina el usuario y sus links
+    GET    /multimedia               tipos de multimedia
+    GET    /temas                    temas en uso, con la cantidad de links de cada uno
+    GET    /links                    una página de links (ver abajo)
+    POST   /links                    crea un link {usuario_id, link, multimedia_id, fecha, autor, descripcion, tema}
+    GET    /links/<id>               un link
+    PUT    /links/<id>               actualiza un link (campos de POST y version)
+    DELETE /links/<id>               elimina un link
+
+Los PUT llevan la ``version`` que tenía la fila al leerla. Si otro cliente la
+modificó desde entonces la respuesta es ``409 Conflict`` con los valores
+actuales en ``actual``, y no se guarda nada; sin ``version`` se sobrescribe.
+Un POST o PUT de un link que el usuario ya tiene (la misma URL normalizada,
+ver ``duplicates.py``) también responde ``409``, con ese link en ``existente``.
+
+``GET /links`` admite ``limit`` (hasta 1000), ``after``/``before`` (id del
+último/primer link de la página anterior, ver ``Database.get_links_page``),
+los filtros ``usuario``, ``multimedia``, ``desde``, ``hasta``, ``tema`` y
+``q`` (texto libre), el orden ``orden=<columna>`` con ``desc=1`` y
+``archivo=1`` para incluir los links archivados (ver ``archivo.py``). Un link
+archivado se puede leer, pero un PUT o DELETE responde ``409``.
+
+Todas las respuestas GET llevan ``ETag``; si el cliente manda el mismo valor
+en ``If-None-Match`` recibe ``304 Not Modified`` sin cuerpo, así que consultar
+periódicamente una página que no cambió casi no ocupa la red. La ETag es el
+hash del cuerpo: el 304 ahorra la transferencia, pero la consulta a la base se
+hace igual. No se deriva del registro de cambios porque no lo cubre todo (el
+resultado de verificar cada link, los tipos de multimedia) y porque en MySQL
+un ``seq`` de ``cambios`` puede hacerse visible después de uno mayor: una ETag
+tomada entre ambos commits quedaría vigente con datos viejos.
+
+Las llamadas al servicio son bloqueantes y se ejecutan en un grupo de hilos
+del mismo tamaño que el pool de conexiones (``AsyncLinksService``): el bucle
+de eventos sigue atendiendo conexiones mientras las consultas esperan.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from database import DatabaseError
+from filters import SORT_COLUMNS, LinkFilter, LinkSort
+from service import (ConflictError, DuplicateLinkError, NotFoundError, ValidationError,
+                     VersionConflictError, link_to_dict, parse_date, user_to_dict)
+
+log = logging.getLogger(__name__)
+
+MAX_BODY = 1024 * 1024
+MAX_HEADERS = 100
+MAX_PAGE_SIZE = 1000
+DEFAULT_PAGE_SIZE = 100
+# Segundos que una conexión keep-alive puede quedar sin pedidos
+IDLE_TIMEOUT = 15
+
+REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified",
+    400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class AsyncLinksService:
+    """Expone los métodos de ``LinksService`` como corrutinas
+
+    Cada llamada se ejecuta en un hilo de un grupo con ``workers`` hilos; con
+    tantos hilos como conexiones tiene el pool de la base, ninguna consulta
+    queda esperando una conexión libre mientras ocupa un hilo.
+    """
+
+    def __init__(self, service, workers=5):
+        self.service = service
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="links-api")
+
+    def __getattr__(self, name):
+        method = getattr(self.service, name)
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(method, *args, **kwargs))
+
+        return call
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+class Request:
+    def __init__(self, method, target, version, headers, body):
+        self.method = method
+        self.version = version
+        self.headers = headers
+        self.body = body
+        url = urlsplit(target)
+        self.path = unquote(url.path)
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    def json(self):
+        try:
+            data = json.loads(self.body or b'{}')
+        except ValueError:
+            raise HTTPError(400, "El cuerpo no es JSON válido") from None
+        if not isinstance(data, dict):
+            raise HTTPError(400, "El cuerpo debe ser un objeto JSON")
+        return data
+
+
+async def read_request(reader):
+    """Lee un pedido HTTP/1.x; devuelve None si el cliente cerró la conexión"""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, "Línea de pedido inválida") from None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(400, "Demasiados encabezados")
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(400, "Content-Length inválido") from None
+    if length > MAX_BODY:
+        raise HTTPError(413, "El cuerpo es demasiado grande")
+    body = await reader.readexactly(length) if length else b''
+    return Request(method.upper(), target, version, headers, body)
+
+
+def etag_for(body):
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(header, etag):
+    """Compara con un If-None-Match, que puede traer varias ETags o '*'"""
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(',')]
+    # Las ETags débiles (W/"...") se comparan por su valor
+    return '*' in candidates or etag in (tag[2:] if tag.startswith('W/') else tag for tag in candidates)
+
+
+def _int_param(query, name, default=None):
+    value = query.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPError(400, f"El parámetro '{name}' debe ser un número") from None
+
+
+def _version(data):
+    version = data.get('version')
+    if version is None:
+        return None
+    if isinstance(version, bool) or not isinstance(version, int):
+        raise HTTPError(400, "El campo 'version' debe ser un número entero")
+    return version
+
+
+def _bool_param(query, name):
+    return query.get(name, '').lower() in ('1', 'true', 'si', 'sí')
+
+
+def link_filter_from_query(query):
+    return LinkFilter(
+        usuario_id=query.get('usuario') or None,
+        multimedia_id=_int_param(query, 'multimedia'),
+        fecha_desde=parse_date(query.get('desde')),
+        fecha_hasta=parse_date(query.get('hasta')),
+        tema=query.get('tema') or None,
+        texto=query.get('q') or None,
+        archivo=_bool_param(query, 'archivo'),
+    )
+
+
+def link_sort_from_query(query):
+    column = query.get('orden') or 'id'
+    if column not in SORT_COLUMNS:
+        raise HTTPError(400, f"No se puede ordenar por '{column}'")
+    return LinkSort(column, _bool_param(query, 'desc'))
+
+
+class LinksAPI:
+    """Atiende conexiones HTTP y traduce cada pedido a una llamada al servicio"""
+
+    def __init__(self, service, workers=5):
+        self.service = AsyncLinksService(service, workers)
+        self.routes = [
+            ('GET', r'/usuarios', self.list_users),
+            ('POST', r'/usuarios', self.create_user),
+            ('GET', r'/usuarios/(?P<user_id>[^/]+)', self.get_user),
+            ('PUT', r'/usuarios/(?P<user_id>[^/]+)', self.update_user),
+            ('DELETE', r'/usuarios/(?P<user_id>[^/]+)', self.delete_user),
+            ('GET', r'/multimedia', self.list_multimedia_types),
+            ('GET', r'/temas', self.list_temas),
+            ('GET', r'/links', self.list_links),
+            ('POST', r'/links', self.create_link),
+            ('GET', r'/links/(?P<link_id>\d+)', self.get_link),
+            ('PUT', r'/links/(?P<link_id>\d+)', self.update_link),
+            ('DELETE', r'/links/(?P<link_id>\d+)', self.delete_link),
+        ]
+        self.routes = [(method, re.compile(pattern + '/?'), handler)
+                       for method, pattern, handler in self.routes]
+
+    def close(self):
+        self.service.close()
+
+    # ------------------------------------------------------------------
+    # Conexiones
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), IDLE_TIMEOUT)
+                except HTTPError as e:
+                    await self.send(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    break
+                if request is None:
+                    break
+
+                status, payload, headers = await self.dispatch(request)
+                await self.send(writer, status, payload, headers, request.keep_alive)
+                if not request.keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def send(self, writer, status, payload, headers=None, keep_alive=True):
+        body = b'' if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                 f"Content-Length: {len(body)}",
+                 "Connection: " + ("keep-alive" if keep_alive else "close")]
+        if body:
+            lines.append("Content-Type: application/json; charset=utf-8")
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+    async def dispatch(self, request):
+        """Devuelve (estado, cuerpo JSON, encabezados extra) para un pedido"""
+        allowed = False
+        for method, pattern, handler in self.routes:
+            match = pattern.fullmatch(request.path)
+            if match is None:
+                continue
+            allowed = True
+            if method == request.method:
+                break
+        else:
+            if allowed:
+                return 405, {"error": "Método no permitido"}, None
+            return 404, {"error": "Ruta inexistente"}, None
+
+        try:
+            status, payload = await handler(request, **match.groupdict())
+        except HTTPError as e:
+            return e.status, {"error": str(e)}, None
+        except ValidationError as e:
+            return 400, {"error": str(e)}, None
+        except NotFoundError as e:
+            return 404, {"error": str(e)}, None
+        except ConflictError as e:
+            return 409, {"error": str(e)}, None
+        except DatabaseError as e:
+            log.warning("Error de base de datos en %s %s: %s", request.method, request.path, e)
+            return 503, {"error": "Base de datos no disponible"}, None
+        except Exception:
+            log.exception("Error al atender %s %s", request.method, request.path)
+            return 500, {"error": "Error interno"}, None
+
+        if request.method != 'GET' or status != 200:
+            return status, payload, None
+
+        # GET condicional: la ETag es el hash del cuerpo que se enviaría (ya
+        # consultado; ver el docstring del módulo)
+        etag = etag_for(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return 304, None, headers
+        return 200, payload, headers
+
+    # ------------------------------------------------------------------
+    # Usuarios
+
+    async def list_users(self, request):
+        return 200, [user_to_dict(user) for user in await self.service.list_users()]
+
+    async def get_user(self, request, user_id):
+        return 200, user_to_dict(await self.service.get_user(user_id))
+
+    async def create_user(self, request):
+        data = request.json()
+        user = await self.service.create_user(data.get('id'), data.get('nombre'),
+                                              data.get('apellido'), data.get('email'))
+        return 201, user_to_dict(user)
+
+    async def update_user(self, request, user_id):
+        data = request.json()
+        try:
+            user = await self.service.update_user(user_id, data.get('nombre'), data.get('apellido'),
+                                                  data.get('email'), version=_version(data))
+        except VersionConflictError as e:
+            return 409, {"error": str(e), "actual": user_to_dict(e.current)}
+        return 200, user_to_dict(user)
+
+    async def delete_user(self, request, user_id):
+        await self.service.delete_user(user_id)
+        return 204, None
+
+    # ------------------------------------------------------------------
+    # Links
+
+    async def list_multimedia_types(self, request):
+        types = await self.service.list_multimedia_types()
+        return 200, [{"id": type_id, "tipo": tipo} for type_id, tipo in types]
+
+    async def list_temas(self, request):
+        temas = await self.service.list_temas()
+        return 200, [{"id": tema_id, "nombre": nombre, "cantidad": cantidad}
+                     for tema_id, nombre, cantidad in temas]
+
+    async def list_links(self, request):
+        query = request.query
+        limit = min(max(_int_param(query, 'limit', DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+        records = await self.service.list_links(
+            after_id=_int_param(query, 'after'),
+            before_id=_int_param(query, 'before'),
+            limit=limit,
+            filters=link_filter_from_query(query),
+            sort=link_sort_from_query(query),
+        )
+        links = [link_to_dict(record) for record in records]
+        return 200, {
+            "links": links,
+            # Cursores para pedir la página siguiente (after) o la anterior (before)
+            "after": links[-1]["id"] if len(links) == limit else None,
+            "before": links[0]["id"] if links else None,
+        }
+
+    async def get_link(self, request, link_id):
+        return 200, link_to_dict(await self.service.get_link(int(link_id)))
+
+    def _link_fields(self, data):
+        return (data.get('usuario_id'), data.get('link'), data.get('multimedia_id'),
+                data.get('fecha'), data.get('autor'), data.get('descripcion'), data.get('tema'))
+
+    async def create_link(self, request):
+        try:
+            record = await self.service.create_link(*self._link_fields(request.json()))
+        except DuplicateLinkError as e:
+            return 409, {"error": str(e), "existente": link_to_dict(e.existing)}
+        return 201, link_to_dict(record)
+
+    async def update_link(self, request, link_id):
+        data = request.json()
+        try:
+            record = await self.service.update_link(int(link_id), *self._link_fields(data),
+                                                    version=_version(data))
+        except VersionConflictError as e:
+            return 409, {"error": str(e), "actual": link_to_dict(e.current)}
+        except DuplicateLinkError as e:
+            return 409, {"error": str(e), "existente": link_to_dict(e.existing)}
+        return 200, link_to_dict(record)
+
+    async def delete_link(self, request, link_id):
+        await self.service.delete_link(int(link_id))
+        return 204, None
+
+
+async def start_server(service, host='127.0.0.1', port=8080, workers=5):
+    """Empieza a escuchar y devuelve (asyncio.Server, LinksAPI)"""
+    api = LinksAPI(service, workers)
+    server = await asyncio.start_server(api.handle_connection, host, port)
+    return server, api
+
+
+def serve(service, host='127.0.0.1', port=8080, workers=5):
+    """Atiende pedidos hasta que se interrumpa el proceso"""
+    async def run():
+        server, api = await start_server(service, host, port, workers)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            api.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,127 @@
+"""Archivo de links viejos: los anteriores a una fecha pasan a la tabla links_archivo.
+
+Con los años, la tabla links se llena de links que casi no se consultan, y
+con ella crecen sus índices, la búsqueda de texto completo, los triggers y la
+réplica. ``archive_links`` mueve los links con ``fecha`` anterior a un corte
+a ``links_archivo`` (migración 11), que tiene las mismas columnas más
+``archivado``, el momento en que se movió, y conserva el id.
+
+- Las consultas de links leen sólo la tabla links. Con ``LinkFilter.archivo``
+  suman los archivados, en el mismo orden y con la misma paginación por clave
+  (ver ``Database.get_links_page``). Ese filtro es la casilla "Incluir
+  archivo" de la ventana, ``--archivo`` en ``cli.py export`` y ``archivo=1``
+  en la API.
+- Los archivados son de sólo lectura. Para modificarlos hay que devolverlos a
+  links con ``restore_links``.
+- Las estadísticas cuentan también los archivados, con triggers sobre las dos
+  tablas. La cantidad de links de cada tema (``tema.cantidad``) y la
+  verificación de links cuentan sólo los de la tabla links.
+- Para los demás clientes y para la réplica, archivar un link es borrarlo:
+  queda en el registro de cambios como 'D'. Restaurarlo es un alta ('I').
+
+El trabajo se hace en lotes de ``batch_size`` links, cada uno en su propia
+transacción corta. Sólo se bloquean las filas del lote, y la aplicación
+sigue leyendo y escribiendo mientras tanto. Si se interrumpe, lo ya movido
+queda archivado y basta con volver a ejecutarlo.
+
+No se usan particiones de MySQL por rango de fecha porque InnoDB no admite
+claves foráneas en tablas particionadas. links las tiene (usuario, multimedia)
+y además la refieren link_estado y link_tema.
+"""
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from temas import sync_link_temas
+
+# Columnas que se copian entre links y links_archivo
+COLUMNS = ("id, usuario_id, link, multimedia_id, fecha, autor, descripcion, tema, version, "
+           "url_normalizada, url_hash")
+
+
+def cutoff_date(days):
+    """Fecha de corte (AAAA-MM-DD) para archivar los links de hace más de ``days`` días"""
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+@dataclass
+class ArchiveReport:
+    """Resultado de archivar o restaurar links"""
+    moved: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    restore: bool = False
+
+    def summary(self):
+        moved = "Links restaurados" if self.restore else "Links archivados"
+        return f"{moved}: {self.moved} en {self.batches} lotes\nTiempo: {self.seconds:.1f} s"
+
+
+def archive_links(db, before, batch_size=500, pause=0.0, progress=None):
+    """Mueve a links_archivo los links con fecha anterior a ``before`` (AAAA-MM-DD)
+
+    Devuelve un ArchiveReport. ``pause`` son los segundos de espera entre un
+    lote y el siguiente, para dejar pasar a las demás escrituras.
+    ``progress(movidos)`` se llama después de cada lote.
+    """
+    started = time.perf_counter()
+    report = ArchiveReport()
+    archivado = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    while True:
+        with db.transaction() as cursor:
+            # Sin ORDER BY: el índice idx_links_fecha da el lote sin ordenar
+            # todos los links anteriores al corte
+            cursor.execute("SELECT id FROM links WHERE fecha < %s LIMIT %s", (before, batch_size))
+            ids = [row[0] for row in cursor.fetchall()]
+            if ids:
+                # La fecha se vuelve a comprobar por si otro cliente la cambió
+                # después de la consulta anterior
+                placeholders = ", ".join(["%s"] * len(ids))
+                cursor.execute(f"INSERT INTO links_archivo ({COLUMNS}, archivado) "
+                               f"SELECT {COLUMNS}, %s FROM links WHERE id IN ({placeholders}) AND fecha < %s",
+                               (archivado, *ids, before))
+                # Los triggers de links anotan el borrado en el registro de
+                # cambios y descuentan sus temas; los de las estadísticas
+                # restan en links lo que sumaron en links_archivo
+                cursor.execute(f"DELETE FROM links WHERE id IN ({placeholders}) AND fecha < %s",
+                               (*ids, before))
+                report.moved += cursor.rowcount
+        if not ids:
+            break
+        report.batches += 1
+        if progress is not None:
+            progress(report.moved)
+        if pause:
+            time.sleep(pause)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def restore_links(db, since, batch_size=500, progress=None):
+    """Devuelve a links los archivados con fecha igual o posterior a ``since`` (AAAA-MM-DD)
+
+    Sirve para deshacer un corte demasiado reciente. Los links vuelven con su
+    id, su versión y sus temas. Devuelve un ArchiveReport.
+    """
+    started = time.perf_counter()
+    report = ArchiveReport(restore=True)
+    while True:
+        with db.transaction() as cursor:
+            cursor.execute("SELECT id, tema FROM links_archivo WHERE fecha >= %s LIMIT %s",
+                           (since, batch_size))
+            rows = cursor.fetchall()
+            if rows:
+                ids = [row[0] for row in rows]
+                placeholders = ", ".join(["%s"] * len(ids))
+                cursor.execute(f"INSERT INTO links ({COLUMNS}) "
+                               f"SELECT {COLUMNS} FROM links_archivo WHERE id IN ({placeholders})", ids)
+                sync_link_temas(cursor, db, rows)
+                cursor.execute(f"DELETE FROM links_archivo WHERE id IN ({placeholders})", ids)
+                report.moved += cursor.rowcount
+        if not rows:
+            break
+        report.batches += 1
+        if progress is not None:
+            progress(report.moved)
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,336 @@
+"""Mediciones de rendimiento de la capa de datos y de la tabla de links.
+
+Genera datos sintéticos (usuarios y links con valores repetibles) en una base
+vacía y mide las operaciones que usa la aplicación: cargar la primera página
+de links (con y sin filtros u orden), desplazarse, seleccionar un link,
+guardar/actualizar/eliminar (también desde varios hilos a la vez, donde se
+nota la cola de escrituras de writes.py) y exportar. Para cada una informa
+latencia p50/p95 y filas por segundo.
+
+Si hay un display (en un servidor se puede usar Xvfb: ``xvfb-run python cli.py
+... bench``), también mide cuánto tarda y cuánta memoria ocupa llenar un
+Treeview con ``TreeviewSync`` y cuánto tarda la ventana principal en llegar a
+la primera interacción, comparado con ``main.STARTUP_BUDGET_MS``.
+
+Los resultados se guardan en JSON para comparar entre versiones:
+    python cli.py --sqlite /tmp/bench.db bench --sizes 10000 100000 --output antes.json
+"""
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from filters import LinkFilter, LinkSort
+from service import LinksService
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+TEMAS = ("python", "sql", "redes", "seguridad", "diseño", "datos", "web", "linux", "música", "historia")
+PALABRAS = ("tutorial", "guía", "curso", "charla", "artículo", "referencia", "ejemplo",
+            "introducción", "avanzado", "práctico", "notas", "video", "libro", "podcast")
+NOMBRES = ("Ana", "Luis", "Eva", "Juan", "Sofía", "Pedro", "Lucía", "Marco", "Inés", "Raúl")
+APELLIDOS = ("García", "López", "Pérez", "Gómez", "Díaz", "Ruiz", "Torres", "Vega", "Rojas", "Castro")
+
+# Un usuario cada tantos links
+LINKS_PER_USER = 50
+
+# Los links se reparten al azar entre los usuarios de su bloque: cada
+# USER_BLOCK links hay USER_BLOCK // LINKS_PER_USER usuarios propios
+USER_BLOCK = 1000
+
+# Hilos que guardan links a la vez en "guardar_link_concurrente"
+WRITERS = 8
+
+
+def generate(db, links, start=0, batch_size=5000, seed=0):
+    """Agrega links sintéticos hasta llegar a ``links`` (a partir de ``start`` ya generados)
+
+    Crea los usuarios que hagan falta. Los valores de la fila ``n`` salen de un
+    generador con semilla ``(seed, n)`` y su usuario es uno de los de su bloque
+    de ``USER_BLOCK`` filas, así que no dependen de ``start``: generar 1000
+    links de una vez o en dos tandas de 500 da los mismos datos.
+    """
+    rng = random.Random()
+    multimedia_ids = [t[0] for t in db.get_multimedia_types()]
+
+    block_users = USER_BLOCK // LINKS_PER_USER
+    users_before = -(-start // USER_BLOCK) * block_users
+    users_after = -(-links // USER_BLOCK) * block_users
+    users = [(f"u{n:07d}", NOMBRES[n % len(NOMBRES)], APELLIDOS[n // len(NOMBRES) % len(APELLIDOS)],
+              f"u{n:07d}@ejemplo.com")
+             for n in range(users_before, users_after)]
+    for i in range(0, len(users), batch_size):
+        db.insert_users_many(users[i:i + batch_size])
+
+    first_day = date(2015, 1, 1)
+    batch = []
+    for n in range(start, links):
+        rng.seed((seed << 32) + n)
+        tema = rng.choice(TEMAS)
+        words = rng.sample(PALABRAS, 3)
+        batch.append((
+            f"u{n // USER_BLOCK * block_users + rng.randrange(block_users):07d}",
+            f"https://sitio{n % 997}.example.com/{tema}/{n}",
+            rng.choice(multimedia_ids),
+            (first_day + timedelta(days=rng.randrange(3650))).isoformat(),
+            f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}",
+            f"{' '.join(words)} sobre {tema}",
+            tema,
+        ))
+        if len(batch) >= batch_size:
+            db.insert_links_many(batch)
+            batch.clear()
+    if batch:
+        db.insert_links_many(batch)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(fn, repeat):
+    """Ejecuta ``fn(i)`` ``repeat`` veces; ``fn`` devuelve la cantidad de filas procesadas"""
+    durations = []
+    rows = 0
+    for i in range(repeat):
+        started = time.perf_counter()
+        rows += fn(i) or 0
+        durations.append(time.perf_counter() - started)
+    total = sum(durations)
+    return {
+        "repeticiones": repeat,
+        "p50_ms": round(percentile(durations, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(durations, 0.95) * 1000, 3),
+        "media_ms": round(statistics.fmean(durations) * 1000, 3),
+        "filas": rows,
+        "filas_por_segundo": round(rows / total, 1) if total else None,
+    }
+
+
+def bench_operations(db, links, repeat=50, seed=0):
+    """Mide las operaciones de datos de la aplicación sobre una base con ``links`` links"""
+    service = LinksService(db)
+    rng = random.Random(seed)
+    user_ids = sorted(db.get_user_ids())
+    page = 200
+
+    def first_page(filters=None, sort=None):
+        return lambda i: len(service.list_links(limit=page, filters=filters, sort=sort))
+
+    results = {
+        "primera_pagina": measure(first_page(), repeat),
+        "primera_pagina_usuario": measure(
+            lambda i: len(service.list_links(limit=page, filters=LinkFilter(
+                usuario_id=rng.choice(user_ids)))), repeat),
+        "primera_pagina_tema_fecha": measure(first_page(
+            LinkFilter(tema="python", fecha_desde="2020-01-01")), repeat),
+        "primera_pagina_texto": measure(first_page(LinkFilter(texto="tutorial python")), repeat),
+        "primera_pagina_orden_fecha_desc": measure(first_page(sort=LinkSort('fecha', True)), repeat),
+        "pagina_siguiente": measure(
+            lambda i: len(service.list_links(after_id=rng.randrange(1, links), limit=page)), repeat),
+        "pagina_anterior_orden_autor": measure(
+            lambda i: len(service.list_links(before_id=rng.randrange(1, links), limit=page,
+                                             sort=LinkSort('autor'))), repeat),
+        # Sin pasar por el servicio: un id borrado por una corrida anterior no es un error
+        "seleccionar_link": measure(lambda i: 1 if db.get_link(rng.randrange(1, links + 1)) else 0,
+                                    repeat),
+    }
+
+    created = []
+
+    def save(i):
+        # El tamaño va en la URL: ningún link de un tamaño repite uno de otro
+        created.append(service.create_link(rng.choice(user_ids), f"https://bench.example.com/{links}/{i}",
+                                           1, "2024-01-01", "bench", "bench", "bench"))
+        return 1
+
+    def update(i):
+        record = created[i]
+        created[i] = service.update_link(record[0], record[1], record[4] + "?v=2", 2, "2024-01-02",
+                                         "bench", "bench", "bench", version=record[11])
+        return 1
+
+    def delete(i):
+        service.delete_link(created[i][0])
+        return 1
+
+    results["guardar_link"] = measure(save, repeat)
+    results["actualizar_link"] = measure(update, repeat)
+    results["eliminar_link"] = measure(delete, repeat)
+
+    # WRITERS altas simultáneas, como varios clientes de la API; con la cola de
+    # escrituras activa comparten commits
+    concurrent = []
+    with ThreadPoolExecutor(max_workers=WRITERS) as pool:
+        def save_concurrently(i):
+            users = [rng.choice(user_ids) for _ in range(WRITERS)]
+            records = list(pool.map(lambda j: service.create_link(
+                users[j], f"https://bench.example.com/{links}/concurrente/{i}/{j}", 1,
+                "2024-01-01", "bench", "bench", "bench"), range(WRITERS)))
+            concurrent.extend(records)
+            return len(records)
+
+        results["guardar_link_concurrente"] = measure(save_concurrently, repeat)
+    # Sin medir: el tamaño siguiente parte de los links generados y nada más
+    for record in concurrent:
+        service.delete_link(record[0])
+
+    def export(i):
+        return sum(len(rows) for rows in db.iter_links(chunk_size=1000))
+
+    results["exportar_todo"] = measure(export, 1)
+    return results
+
+
+def bench_treeview(sizes=(200, 1000, 10_000)):
+    """Mide el llenado de un Treeview; sin display devuelve sólo el motivo de la omisión"""
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        root = tk.Tk()
+    except Exception as e:  # Sin display (o sin Tk): se informa y se sigue
+        return {"omitido": str(e)}
+
+    from widgets import TreeviewSync
+
+    results = {}
+    try:
+        root.withdraw()
+        columns = ('id', 'usuario', 'link', 'multimedia', 'fecha', 'autor', 'tema')
+        for size in sizes:
+            tree = ttk.Treeview(root, columns=columns, show='headings')
+            rows = [(n, "Ana García", f"https://sitio.example.com/{n}", "Video", "2024-01-01",
+                     "Luis Pérez", "python") for n in range(size)]
+            view = TreeviewSync(tree)
+
+            started = time.perf_counter()
+            for row in rows:
+                view.insert(row)
+            root.update_idletasks()
+            elapsed = time.perf_counter() - started
+
+            # tracemalloc enlentece las inserciones: la memoria se mide en una
+            # segunda pasada. Sólo cuenta la memoria de Python (no la de Tk).
+            memory_tree = ttk.Treeview(root, columns=columns, show='headings')
+            memory_view = TreeviewSync(memory_tree)
+            tracemalloc.start()
+            for row in rows:
+                memory_view.insert(row)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory_tree.destroy()
+
+            started = time.perf_counter()
+            view.sync(rows[size // 2:])
+            root.update_idletasks()
+            sync_elapsed = time.perf_counter() - started
+
+            results[str(size)] = {
+                "insertar_ms": round(elapsed * 1000, 3),
+                "filas_por_segundo": round(size / elapsed, 1) if elapsed else None,
+                "memoria_pico_kb": round(peak / 1024, 1),
+                "sync_mitad_ms": round(sync_elapsed * 1000, 3),
+            }
+            tree.destroy()
+    finally:
+        root.destroy()
+    return results
+
+
+def bench_startup(db, repeat=5, timeout=60.0):
+    """Mide el arranque de la ventana principal sobre ``db``; sin display, el motivo de la omisión
+
+    ``ventana`` es lo que tarda en construirse la ventana y ``primera
+    interacción``, hasta que la lista de usuarios está en pantalla.
+    """
+    try:
+        import tkinter as tk
+        tk.Tk().destroy()
+    except Exception as e:  # Sin display (o sin Tk): se informa y se sigue
+        return {"omitido": str(e)}
+
+    from main import STARTUP_BUDGET_MS, LinksDeInteresApp
+
+    window = []
+    interactive = []
+    for _ in range(repeat):
+        root = tk.Tk()
+        app = None
+        try:
+            started = time.perf_counter()
+            app = LinksDeInteresApp(root, db=db, started=started)
+            window.append(time.perf_counter() - started)
+            deadline = started + timeout
+            while app.startup_ms is None and time.perf_counter() < deadline:
+                root.update()
+                time.sleep(0.001)
+            if app.startup_ms is None:
+                return {"error": f"La ventana no llegó a la primera interacción en {timeout:g} s"}
+            interactive.append(app.startup_ms / 1000)
+        finally:
+            # Sin on_close: la base es del benchmark y no se cierra
+            if app is not None:
+                app.executor.shutdown()
+            root.destroy()
+
+    p95 = percentile(interactive, 0.95) * 1000
+    return {
+        "repeticiones": repeat,
+        "ventana_p50_ms": round(percentile(window, 0.50) * 1000, 3),
+        "primera_interaccion_p50_ms": round(percentile(interactive, 0.50) * 1000, 3),
+        "primera_interaccion_p95_ms": round(p95, 3),
+        "presupuesto_ms": STARTUP_BUDGET_MS,
+        "dentro_del_presupuesto": p95 <= STARTUP_BUDGET_MS,
+    }
+
+
+def run(db, sizes=SIZES, repeat=50, seed=0, treeview=True, progress=print):
+    """Genera cada tamaño de datos (en orden creciente) y mide; devuelve el resultado para JSON
+
+    La base debe estar vacía: los datos se agregan de un tamaño al siguiente.
+    """
+    if db.fetchone("SELECT COUNT(*) FROM links")[0]:
+        raise ValueError("La base de datos de benchmark debe estar vacía (no tiene que tener links)")
+
+    result = {
+        "fecha": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "motor": db.dialect,
+        "repeticiones": repeat,
+        "semilla": seed,
+        "tamaños": {},
+    }
+    generated = 0
+    for size in sorted(sizes):
+        progress(f"Generando {size} links...")
+        started = time.perf_counter()
+        generate(db, size, start=generated, seed=seed)
+        generation = time.perf_counter() - started
+        progress(f"Midiendo con {size} links...")
+        result["tamaños"][str(size)] = {
+            "generacion_s": round(generation, 2),
+            "generacion_filas_por_segundo": round((size - generated) / generation, 1),
+            "operaciones": bench_operations(db, size, repeat=repeat, seed=seed),
+        }
+        if db.write_queue is not None:
+            queue = db.write_queue
+            result["tamaños"][str(size)]["escrituras_por_commit"] = round(queue.writes / max(1, queue.batches), 2)
+        generated = size
+
+    if treeview:
+        progress("Midiendo el Treeview...")
+        result["treeview"] = bench_treeview()
+        progress("Midiendo el inicio de la ventana...")
+        result["inicio"] = bench_startup(db)
+    return result
+
+
+def save(result, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
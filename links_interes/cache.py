@@ -0,0 +1,88 @@
+"""Caché en memoria de registros leídos de la base de datos."""
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Caché acotada que descarta primero lo usado hace más tiempo.
+
+    Es segura entre hilos: las páginas de links se cargan en hilos de trabajo
+    y la caché se consulta desde el hilo de Tk. Lleva la cuenta de aciertos y
+    fallos para poder medir su efectividad.
+    """
+
+    def __init__(self, maxsize=5000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def put_many(self, items, version=None):
+        """Agrega varios pares (clave, valor) de una sola vez
+
+        Con ``version`` (función del valor), un valor ya guardado sólo se
+        reemplaza por otro de igual o mayor versión: una página leída en otro
+        hilo puede llegar después de que se guardó un registro más nuevo.
+        """
+        with self._lock:
+            for key, value in items:
+                cached = self._data.get(key)
+                if version is not None and cached is not None and version(value) < version(cached):
+                    continue
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """Descarta todas las entradas cuyo valor cumple ``predicate``"""
+        with self._lock:
+            for key in [k for k, v in self._data.items() if predicate(v)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
@@ -0,0 +1,93 @@
+"""Seguimiento del registro de cambios para refrescar las vistas de forma incremental.
+
+Cada escritura en ``links`` o ``usuario`` agrega una entrada con un número de
+secuencia creciente a la tabla ``cambios`` (migración 5, mediante triggers).
+Un cliente recuerda la última secuencia que vio y pide sólo las posteriores,
+en lugar de volver a cargar todo.
+
+Una secuencia que falta puede ser una transacción que todavía no hizo commit
+(en MySQL los números se asignan al insertar, no al confirmar) o una que hizo
+rollback. ``ChangeFeed`` se detiene ante el hueco y lo espera unos segundos
+antes de darlo por perdido, para no saltear cambios que llegan tarde.
+"""
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ChangeSet:
+    """Estado actual de las filas que cambiaron desde la consulta anterior"""
+    seq: int
+    users: list = field(default_factory=list)          # filas (id, nombre, apellido, email)
+    deleted_users: list = field(default_factory=list)
+    links: list = field(default_factory=list)          # registros completos de links
+    deleted_links: list = field(default_factory=list)
+    # Había más entradas que ``limit``: conviene recargar todo en lugar de aplicarlas
+    overflow: bool = False
+
+    def is_empty(self):
+        return not (self.users or self.deleted_users or self.links or self.deleted_links
+                    or self.overflow)
+
+
+class ChangeFeed:
+    """Lee el registro de cambios a partir de la última secuencia vista
+
+    Con ``reload_on_overflow`` (lo que conviene a una vista), si hay más de
+    ``limit`` entradas pendientes sólo se avisa con ``overflow``. Sin él (una
+    réplica que debe aplicar todo), se devuelven las filas de las primeras
+    ``limit`` entradas y ``overflow`` indica que hay que volver a llamar.
+    """
+
+    def __init__(self, db, seq=None, limit=500, gap_timeout=10.0, reload_on_overflow=True):
+        self.db = db
+        self.seq = db.last_change_seq() if seq is None else seq
+        self.limit = limit
+        self.gap_timeout = gap_timeout
+        self.reload_on_overflow = reload_on_overflow
+        self._gaps = {}  # primera secuencia faltante -> cuándo se vio el hueco
+
+    def poll(self):
+        """Devuelve un ChangeSet con lo que cambió desde la última llamada
+
+        Varias entradas de la misma fila se reducen a su estado final, que se
+        lee de la base en una consulta por tabla.
+        """
+        entries = self.db.get_changes(self.seq, self.limit)
+        overflow = len(entries) == self.limit
+        reload = overflow and self.reload_on_overflow
+
+        latest = {}  # (tabla, fila_id) -> última operación
+        expected = self.seq + 1
+        now = time.monotonic()
+        for seq, table, row_id, operation in entries:
+            if seq != expected and not reload:
+                seen = self._gaps.setdefault(expected, now)
+                if now - seen < self.gap_timeout:
+                    break
+            latest[(table, row_id)] = operation
+            expected = seq + 1
+        self.seq = expected - 1
+        self._gaps = {seq: seen for seq, seen in self._gaps.items() if seq > self.seq}
+
+        changes = ChangeSet(self.seq, overflow=overflow)
+        if reload or not latest:
+            return changes
+
+        changed_users = []
+        changed_links = []
+        for (table, row_id), operation in latest.items():
+            deleted = operation == 'D'
+            if table == 'usuario':
+                (changes.deleted_users if deleted else changed_users).append(row_id)
+            elif table == 'links':
+                (changes.deleted_links if deleted else changed_links).append(int(row_id))
+
+        changes.users = self.db.get_users_by_ids(changed_users)
+        changes.links = self.db.get_links_by_ids(changed_links)
+        # Las que ya no existen se borraron después de la última entrada leída
+        found = {user[0] for user in changes.users}
+        changes.deleted_users += [row_id for row_id in changed_users if row_id not in found]
+        found = {record[0] for record in changes.links}
+        changes.deleted_links += [row_id for row_id in changed_links if row_id not in found]
+        return changes
@@ -0,0 +1,298 @@
+"""Comandos de línea para usar la base de links sin interfaz gráfica.
+
+Ejemplos:
+    python cli.py import-users usuarios.csv
+    python cli.py import-links links.jsonl --batch-size 5000 --rejects rechazados.jsonl
+    python cli.py --sqlite links_interes.db import-links links.csv
+    python cli.py --backend auto export links.csv   (MySQL o, si no responde, SQLite)
+    python cli.py --backend replica sync
+    python cli.py export links.jsonl --tema python --desde 2024-01-01
+    python cli.py check-links --tema python --per-host 1 --timeout 5
+    python cli.py dedupe --dry-run
+    python cli.py rebuild-stats
+    python cli.py archive --older-than 730 --batch-size 1000   (ver archivo.py)
+    python cli.py export todo.csv --archivo
+    python cli.py serve --port 8080
+    python cli.py --write-window 0 serve   (agrupa los commits simultáneos, ver writes.py)
+    python cli.py --sqlite /tmp/bench.db bench --sizes 10000 100000 --output bench.json
+"""
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime
+
+import bench
+from api import serve
+from archivo import archive_links, cutoff_date, restore_links
+from database import BACKENDS, MYSQL_CONFIG, DatabaseError, connect
+from duplicates import merge_duplicates
+from estadisticas import load_stats, rebuild_stats
+from exporter import FORMATS, export_links
+from filters import LinkFilter
+from importer import import_links, import_users
+from linkcheck import LinkChecker, check_links
+from migrations import migrate
+from replica import ReplicaDatabase
+from service import LinksService
+
+
+def open_database(args):
+    """Abre la base indicada en los argumentos y aplica las migraciones pendientes"""
+    backend = args.backend
+    if args.sqlite and backend != 'replica':
+        backend = 'sqlite'
+    db = connect(backend, sqlite_path=args.sqlite, write_window_ms=args.write_window,
+                 host=args.host, user=args.user, password=args.password, database=args.database)
+    if backend == 'auto':
+        print(f"Base de datos: {db.describe()}", file=sys.stderr)
+    migrate(db)
+    return db
+
+
+def cmd_import(args, db):
+    rejects = open(args.rejects, 'w', encoding='utf-8') if args.rejects else None
+
+    def on_reject(line, record, reason):
+        if rejects is not None:
+            if not isinstance(record, dict):
+                record = {"fila": record if isinstance(record, (list, tuple)) else str(record)}
+            rejects.write(json.dumps({"linea": line, "motivo": reason, "fila": record},
+                                     ensure_ascii=False, default=str) + "\n")
+
+    importer = import_users if args.command == 'import-users' else import_links
+    try:
+        report = importer(db, args.file, batch_size=args.batch_size, on_reject=on_reject)
+    finally:
+        if rejects is not None:
+            rejects.close()
+
+    print(report.summary())
+    return 0 if report.rejected == 0 else 2
+
+
+def link_filter(args):
+    """LinkFilter a partir de las opciones de add_filter_arguments"""
+    return LinkFilter(usuario_id=args.usuario, multimedia_id=args.multimedia,
+                      fecha_desde=args.desde, fecha_hasta=args.hasta,
+                      tema=args.tema, texto=args.texto, archivo=getattr(args, 'archivo', False))
+
+
+def cmd_export(args, db):
+    try:
+        report = export_links(db, args.file, link_filter(args), fmt=args.format,
+                              chunk_size=args.chunk_size)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(report.summary())
+    return 0
+
+
+def cmd_check_links(args, db):
+    checker = LinkChecker(concurrency=args.concurrency, per_host=args.per_host,
+                          min_interval=args.interval, timeout=args.timeout, ttl=args.ttl)
+    report = check_links(db, link_filter(args), checker, force=args.force,
+                         progress=lambda done, total: print(f"{done}/{total}", file=sys.stderr))
+    print(report.summary())
+    return 0
+
+
+def cmd_dedupe(args, db):
+    print(merge_duplicates(db, dry_run=args.dry_run).summary())
+    return 0
+
+
+def cmd_rebuild_stats(args, db):
+    print(f"Estadísticas recalculadas en {rebuild_stats(db):.1f} s")
+    stats = load_stats(db)
+    print(f"Links: {stats.total}")
+    for _, tipo, cantidad in stats.by_type:
+        print(f"  {tipo:20} {cantidad:10}")
+    return 0
+
+
+def cmd_archive(args, db):
+    if isinstance(db, ReplicaDatabase):
+        # Lo que la réplica borra de links lo borraría también del servidor
+        print("El archivo se mantiene en el servidor: ejecute archive sin --backend replica",
+              file=sys.stderr)
+        return 1
+    cutoff = args.before if args.before else cutoff_date(args.older_than)
+    try:
+        datetime.strptime(cutoff, "%Y-%m-%d")
+    except ValueError:
+        print("La fecha de corte debe tener el formato AAAA-MM-DD", file=sys.stderr)
+        return 1
+
+    def progress(moved):
+        print(f"{moved} links", file=sys.stderr)
+
+    if args.restore:
+        report = restore_links(db, cutoff, batch_size=args.batch_size, progress=progress)
+    else:
+        report = archive_links(db, cutoff, batch_size=args.batch_size, pause=args.pause,
+                               progress=progress)
+    print(report.summary())
+    return 0
+
+
+def cmd_serve(args, db):
+    logging.basicConfig(level=logging.INFO)
+    print(f"Atendiendo en http://{args.bind}:{args.port}/ (Ctrl+C para terminar)")
+    serve(LinksService(db), args.bind, args.port, workers=args.workers)
+    return 0
+
+
+def cmd_sync(args, db):
+    if not isinstance(db, ReplicaDatabase):
+        print("El comando sync necesita --backend replica", file=sys.stderr)
+        return 1
+    report = db.sync()
+    print(report.summary())
+    for table, row_id, reason in report.conflicts:
+        print(f"  {table} {row_id}: {reason}")
+    return 0 if not report.conflicts else 2
+
+
+def cmd_bench(args, db):
+    try:
+        result = bench.run(db, sizes=args.sizes, repeat=args.repeat, seed=args.seed,
+                           treeview=not args.no_treeview,
+                           progress=lambda text: print(text, file=sys.stderr))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    bench.save(result, args.output)
+    for size, data in result["tamaños"].items():
+        print(f"{size} links:")
+        for name, stats in data["operaciones"].items():
+            print(f"  {name:34} p50 {stats['p50_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms"
+                  f"  {stats['filas_por_segundo'] or 0:12.0f} filas/s")
+    print(f"Resultados en {args.output}")
+    return 0
+
+
+def add_filter_arguments(command):
+    command.add_argument("--usuario", help="sólo los links de este usuario")
+    command.add_argument("--multimedia", type=int, help="sólo este id de multimedia")
+    command.add_argument("--desde", help="fecha mínima (YYYY-MM-DD)")
+    command.add_argument("--hasta", help="fecha máxima (YYYY-MM-DD)")
+    command.add_argument("--tema", help="sólo este tema")
+    command.add_argument("--texto", help="búsqueda de texto libre")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Herramientas de la base de Links de Interés")
+    parser.add_argument("--backend", choices=BACKENDS, default='mysql',
+                        help="motor de base de datos ('auto': MySQL si responde y si no SQLite)")
+    parser.add_argument("--sqlite", metavar="ARCHIVO",
+                        help="usar una base SQLite en lugar de MySQL (con --backend replica, "
+                             "el archivo de la réplica)")
+    parser.add_argument("--host", default=MYSQL_CONFIG["host"])
+    parser.add_argument("--user", default=MYSQL_CONFIG["user"])
+    parser.add_argument("--password", default=MYSQL_CONFIG["password"])
+    parser.add_argument("--database", default=MYSQL_CONFIG["database"])
+    parser.add_argument("--write-window", type=float, metavar="MS",
+                        help="agrupar en un solo commit las escrituras simultáneas, esperando "
+                             "hasta MS milisegundos a que lleguen más (0: sin esperar; por "
+                             "omisión LINKS_WRITE_WINDOW_MS y, si no está, no agrupar)")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("import-users", "importar usuarios desde CSV o JSONL"),
+                            ("import-links", "importar links desde CSV o JSONL")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("file", help="archivo .csv o .jsonl")
+        command.add_argument("--batch-size", type=int, default=1000,
+                             help="filas por lote (un commit por lote)")
+        command.add_argument("--rejects", metavar="ARCHIVO",
+                             help="guardar las filas rechazadas en un archivo JSONL")
+        command.set_defaults(handler=cmd_import)
+
+    command = commands.add_parser("export", help="exportar links a CSV, JSONL o Parquet")
+    command.add_argument("file", help="archivo de salida (.csv, .jsonl o .parquet)")
+    command.add_argument("--format", choices=FORMATS,
+                         help="formato de salida (por defecto, según la extensión)")
+    command.add_argument("--chunk-size", type=int, default=1000,
+                         help="filas leídas de la base por bloque")
+    add_filter_arguments(command)
+    command.add_argument("--archivo", action="store_true", help="incluir los links archivados")
+    command.set_defaults(handler=cmd_export)
+
+    command = commands.add_parser("check-links", help="verificar qué links responden y cuáles están rotos")
+    command.add_argument("--concurrency", type=int, default=20, help="pedidos simultáneos en total")
+    command.add_argument("--per-host", type=int, default=2, help="pedidos simultáneos a un mismo host")
+    command.add_argument("--interval", type=float, default=0.2,
+                         help="segundos mínimos entre dos pedidos al mismo host")
+    command.add_argument("--timeout", type=float, default=10.0, help="segundos de espera por pedido")
+    command.add_argument("--ttl", type=float, default=3600.0,
+                         help="no volver a verificar links revisados hace menos de estos segundos")
+    command.add_argument("--force", action="store_true", help="verificar también los revisados hace poco")
+    add_filter_arguments(command)
+    command.set_defaults(handler=cmd_check_links)
+
+    command = commands.add_parser("dedupe", help="unir los links repetidos de cada usuario "
+                                                 "(la misma URL normalizada)")
+    command.add_argument("--dry-run", action="store_true", help="sólo contar, sin borrar nada")
+    command.set_defaults(handler=cmd_dedupe)
+
+    command = commands.add_parser("rebuild-stats", help="recalcular desde cero las tablas de "
+                                                        "estadísticas y las cantidades por tema")
+    command.set_defaults(handler=cmd_rebuild_stats)
+
+    command = commands.add_parser("archive", help="mover a la tabla links_archivo los links con "
+                                                  "fecha anterior a un corte")
+    cutoff = command.add_mutually_exclusive_group(required=True)
+    cutoff.add_argument("--before", metavar="AAAA-MM-DD", help="fecha de corte")
+    cutoff.add_argument("--older-than", type=int, metavar="DÍAS",
+                        help="archivar los links de hace más de DÍAS días")
+    command.add_argument("--batch-size", type=int, default=500,
+                         help="links por lote (una transacción corta por lote)")
+    command.add_argument("--pause", type=float, default=0.0,
+                         help="segundos de espera entre lotes, para dejar pasar otras escrituras")
+    command.add_argument("--restore", action="store_true",
+                         help="devolver a links los archivados con fecha igual o posterior al corte")
+    command.set_defaults(handler=cmd_archive)
+
+    command = commands.add_parser("serve", help="atender la API HTTP")
+    command.add_argument("--bind", default="127.0.0.1", help="dirección en la que escuchar")
+    command.add_argument("--port", type=int, default=8080)
+    command.add_argument("--workers", type=int, default=5,
+                         help="consultas simultáneas (no más que conexiones del pool)")
+    command.set_defaults(handler=cmd_serve)
+
+    command = commands.add_parser("sync", help="sincronizar una vez la réplica local con MySQL")
+    command.set_defaults(handler=cmd_sync)
+
+    command = commands.add_parser("bench", help="generar datos sintéticos y medir rendimiento "
+                                                "(usar una base vacía)")
+    command.add_argument("--sizes", type=int, nargs="+", default=list(bench.SIZES),
+                         help="cantidades de links a generar y medir")
+    command.add_argument("--repeat", type=int, default=50, help="repeticiones de cada operación")
+    command.add_argument("--seed", type=int, default=0)
+    command.add_argument("--no-treeview", action="store_true", help="no medir el Treeview ni el inicio de la ventana")
+    command.add_argument("--output", default="bench_results.json", help="archivo JSON de resultados")
+    command.set_defaults(handler=cmd_bench)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        db = open_database(args)
+    except DatabaseError as e:
+        print(f"No se pudo abrir la base de datos: {e}", file=sys.stderr)
+        return 1
+    try:
+        return args.handler(args, db)
+    except DatabaseError as e:
+        print(f"Error de base de datos: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
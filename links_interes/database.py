@@ -0,0 +1,973 @@
+"""Capa de acceso a datos de la aplicación de Links de Interés.
+
+Cada operación pide una conexión a un pool, la usa dentro de una transacción
+y la devuelve al terminar, en lugar de compartir una única conexión y un único
+cursor durante toda la sesión. Antes de entregar una conexión MySQL se
+comprueba con ``ping`` y se reconecta si el servidor la cerró (``wait_timeout``,
+reinicio del servidor, etc.).
+
+Hay dos motores con la misma interfaz: ``MySQLDatabase``, para una base
+compartida en un servidor, y ``SQLiteDatabase``, un archivo local que no
+necesita servidor (un solo usuario o sin conexión). Las consultas se escriben
+una sola vez con los marcadores ``%s`` y la sintaxis de MySQL; el motor SQLite
+traduce los marcadores a ``?`` y ``Database.ddl`` adapta el DDL
+(``AUTO_INCREMENT``, ``CURDATE()``, ``ENGINE=InnoDB``).
+
+``connect`` elige el motor según la variable de entorno ``LINKS_DB``:
+    LINKS_DB=mysql     sólo MySQL (falla si el servidor no responde)
+    LINKS_DB=sqlite    sólo la base local (LINKS_SQLITE_PATH, links_interes.db)
+    LINKS_DB=auto      MySQL si responde y si no la base local (por defecto)
+    LINKS_DB=replica   réplica local que se sincroniza con MySQL (ver replica.py)
+
+Con ``LINKS_WRITE_WINDOW_MS`` (0 o más) las escrituras de una fila que llegan
+juntas desde varios hilos se agrupan en un solo commit; la ventana es cuánto
+se espera a que lleguen más (ver writes.py).
+"""
+import os
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+from duplicates import url_key
+from filters import LinkSort
+from instrumentation import monitor
+from temas import fill_link_temas, sync_link_temas
+from writes import PreparedStatements, StatementCursor, WriteQueue
+
+try:
+    import mysql.connector
+    from mysql.connector import pooling
+    from mysql.connector.constants import ClientFlag
+except ImportError:  # El motor SQLite no necesita el conector de MySQL
+    mysql = None
+
+
+# Configuración por defecto de la conexión a MySQL
+MYSQL_CONFIG = {
+    "host": os.environ.get("LINKS_MYSQL_HOST", "localhost"),  # <-- Ajusta según tu entorno
+    "user": os.environ.get("LINKS_MYSQL_USER", "root"),  # <-- Cambia por tu usuario de MySQL
+    "password": os.environ.get("LINKS_MYSQL_PASSWORD", ""),  # <-- Cambia por tu contraseña (si tienes)
+    "database": os.environ.get("LINKS_MYSQL_DATABASE", "links_db"),  # <-- Debe existir previamente
+    # Sin servidor, no esperar el timeout del sistema antes de pasar a SQLite
+    "connection_timeout": 5,
+}
+
+DB_BACKEND = os.environ.get("LINKS_DB", "auto")
+SQLITE_PATH = os.environ.get("LINKS_SQLITE_PATH", "links_interes.db")
+# Ventana para agrupar commits de escrituras (sin definir: cada escritura hace el suyo)
+WRITE_WINDOW_MS = os.environ.get("LINKS_WRITE_WINDOW_MS")
+
+# Ajustes de cada conexión SQLite. WAL deja leer mientras otra conexión
+# escribe y con synchronous=NORMAL sólo sincroniza al hacer checkpoint;
+# mmap_size lee la base mapeada en memoria en lugar de con read().
+SQLITE_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -32000",       # 32 MB por conexión
+    "PRAGMA mmap_size = 268435456",     # 256 MB
+)
+# Sentencias preparadas que sqlite3 guarda por conexión (128 por defecto); con
+# los filtros y órdenes combinables la aplicación usa más consultas distintas
+SQLITE_CACHED_STATEMENTS = 512
+
+DEFAULT_MULTIMEDIA_TYPES = ['Audio', 'Video', 'Imagen', 'Documento', 'Otro']
+
+
+# Columnas del registro completo de un link (Database.LINKS_QUERY); archivado
+# es el momento en que pasó a links_archivo o None si está en links (archivo.py)
+LINK_COLUMNS = ("id", "usuario_id", "nombre", "apellido", "link", "multimedia_id",
+                "tipo", "fecha", "autor", "descripcion", "tema", "version",
+                "estado", "codigo_http", "archivado")
+
+# Columnas de una fila de usuario
+USER_COLUMNS = ("id", "nombre", "apellido", "email", "version")
+
+# Valores por sentencia IN (...) en las operaciones sobre varias filas
+IN_CHUNK = 500
+
+
+def _links_query(table, archivado):
+    # Unimos la tabla de links (links o links_archivo), usuario y multimedia
+    # (y el resultado de la última verificación, si la hubo)
+    return f"""
+            SELECT l.id, l.usuario_id, u.nombre, u.apellido, l.link,
+                   l.multimedia_id, m.tipo, l.fecha, l.autor,
+                   l.descripcion, l.tema, l.version, e.estado, e.codigo_http,
+                   {archivado} AS archivado
+            FROM {table} l
+            JOIN usuario u ON l.usuario_id = u.id
+            JOIN multimedia m ON l.multimedia_id = m.id
+            LEFT JOIN link_estado e ON e.link_id = l.id
+        """
+
+
+def _in_chunks(values):
+    """(marcadores, valores) de cada sentencia IN de a lo sumo IN_CHUNK valores"""
+    values = list(values)
+    for i in range(0, len(values), IN_CHUNK):
+        chunk = tuple(values[i:i + IN_CHUNK])
+        yield ", ".join(["%s"] * len(chunk)), chunk
+
+
+class DatabaseError(Exception):
+    """Error de base de datos, independiente del motor utilizado"""
+
+
+class IntegrityError(DatabaseError):
+    """Violación de una clave primaria, única o foránea"""
+
+
+class Database:
+    """Consultas de la aplicación sobre un pool de conexiones.
+
+    Las subclases indican cómo obtener y devolver conexiones del pool y qué
+    excepciones del driver corresponden a ``DatabaseError`` e ``IntegrityError``.
+    """
+
+    # Excepciones del driver que se traducen a las nuestras
+    driver_errors = ()
+    driver_integrity_errors = ()
+
+    # Motor, para las sentencias que difieren entre MySQL y SQLite
+    dialect = None
+
+    # Cola que agrupa los commits de las escrituras de una fila (ver writes.py)
+    write_queue = None
+
+    def _acquire(self):
+        raise NotImplementedError
+
+    def _release(self, conn):
+        raise NotImplementedError
+
+    def ddl(self, sql):
+        """Adapta al motor una sentencia DDL escrita con la sintaxis de MySQL"""
+        return sql
+
+    def upsert_sql(self, table, columns, key):
+        """INSERT que, si ya existe la fila con esa clave, actualiza las demás columnas
+
+        Si no hay otras columnas, la fila existente queda como estaba.
+        """
+        raise NotImplementedError
+
+    def describe(self):
+        """Nombre del motor y de la base, para mostrar al usuario"""
+        raise NotImplementedError
+
+    def _cursor(self, conn, buffered=True):
+        return conn.cursor()
+
+    def close(self):
+        """Termina las escrituras pendientes y cierra las conexiones del pool"""
+        self.stop_write_queue()
+
+    def translate_error(self, e):
+        """Excepción de ``DatabaseError`` que corresponde a un error del driver"""
+        if isinstance(e, self.driver_integrity_errors):
+            return IntegrityError(str(e))
+        if isinstance(e, self.driver_errors):
+            return DatabaseError(str(e))
+        return e
+
+    def start_write_queue(self, window=0.0, max_batch=100):
+        """Agrupa en un solo commit las escrituras que llegan juntas (ver ``writes.WriteQueue``)"""
+        if self.write_queue is None:
+            self.write_queue = WriteQueue(self, window=window, max_batch=max_batch)
+
+    def stop_write_queue(self):
+        if self.write_queue is not None:
+            self.write_queue.close()
+            self.write_queue = None
+
+    def _write(self, fn, *args):
+        """Ejecuta ``fn(cursor, *args)`` en su transacción o en la del próximo grupo de la cola"""
+        if self.write_queue is not None:
+            return self.write_queue.submit(fn, *args).result()
+        with self.transaction() as cursor:
+            return fn(cursor, *args)
+
+    @contextmanager
+    def transaction(self, buffered=True):
+        """Entrega un cursor sobre una conexión del pool dentro de una transacción
+
+        Se hace commit al salir sin errores y rollback si hubo una excepción.
+        Los errores del driver se traducen a ``DatabaseError``/``IntegrityError``.
+        Con ``buffered=False`` el cursor no trae todo el resultado de una vez.
+        """
+        try:
+            conn = self._acquire()
+        except self.driver_errors as e:
+            raise DatabaseError(str(e)) from e
+        try:
+            # Con el registro de tiempos desactivado el cursor no se envuelve
+            cursor = monitor.wrap_cursor(self._cursor(conn, buffered))
+            try:
+                yield cursor
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        except self.driver_integrity_errors as e:
+            raise IntegrityError(str(e)) from e
+        except self.driver_errors as e:
+            raise DatabaseError(str(e)) from e
+        finally:
+            self._release(conn)
+
+    def fetchall(self, sql, params=()):
+        with self.transaction() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def fetchone(self, sql, params=()):
+        with self.transaction() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+
+    def execute(self, sql, params=()):
+        """Ejecuta una sentencia de escritura y devuelve la cantidad de filas afectadas"""
+        with self.transaction() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    # ------------------------------------------------------------------
+    # Usuarios y multimedia
+
+    def get_users(self):
+        return self.fetchall("SELECT id, nombre, apellido, email, version FROM usuario")
+
+    def get_user(self, user_id):
+        return self.fetchone("SELECT id, nombre, apellido, email, version FROM usuario WHERE id = %s",
+                             (user_id,))
+
+    def get_users_by_ids(self, user_ids):
+        if not user_ids:
+            return []
+        placeholders = ", ".join(["%s"] * len(user_ids))
+        return self.fetchall(
+            f"SELECT id, nombre, apellido, email, version FROM usuario WHERE id IN ({placeholders})",
+            tuple(user_ids)
+        )
+
+    def get_multimedia_types(self):
+        return self.fetchall("SELECT id, tipo FROM multimedia")
+
+    # Sentencias fijas de las escrituras de una fila (ver writes.py); la
+    # condición de versión se agrega al final para el control optimista
+    INSERT_USER = "INSERT INTO usuario (id, nombre, apellido, email) VALUES (%s, %s, %s, %s)"
+    UPDATE_USER = ("UPDATE usuario SET nombre = %s, apellido = %s, email = %s, version = version + 1 "
+                   "WHERE id = %s")
+    IF_VERSION = " AND version = %s"
+    # Bloqueo de la fila leída hasta el fin de la transacción; SQLite bloquea
+    # la base entera al escribir y no lo necesita
+    LOCK_ROW = ""
+
+    def insert_user(self, user_id, nombre, apellido, email):
+        self._write(self._execute, self.INSERT_USER, (user_id, nombre, apellido, email))
+
+    @staticmethod
+    def _execute(cursor, sql, params):
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+    def insert_users_many(self, users):
+        """Inserta varios usuarios (id, nombre, apellido, email) en una sola transacción"""
+        with self.transaction() as cursor:
+            cursor.executemany(
+                "INSERT INTO usuario (id, nombre, apellido, email) VALUES (%s, %s, %s, %s)",
+                users
+            )
+
+    def get_user_ids(self):
+        return {row[0] for row in self.fetchall("SELECT id FROM usuario")}
+
+    def get_user_emails(self):
+        return {row[0] for row in self.fetchall("SELECT email FROM usuario WHERE email IS NOT NULL")}
+
+    def update_user(self, user_id, nombre, apellido, email, version=None):
+        """Actualiza un usuario y devuelve la cantidad de filas modificadas
+
+        Con ``version`` sólo se modifica si la fila sigue en esa versión
+        (control de concurrencia optimista); si otro cliente la cambió antes,
+        devuelve 0.
+        """
+        sql = self.UPDATE_USER
+        params = [nombre, apellido, email, user_id]
+        if version is not None:
+            sql += self.IF_VERSION
+            params.append(version)
+        return self._write(self._execute, sql, params)
+
+    def delete_user(self, user_id, version=None):
+        """Elimina un usuario; con ``version``, sólo si sigue en esa versión (ver update_user)"""
+        if version is None:
+            return self.delete_users([user_id])
+        with self.transaction() as cursor:
+            cursor.execute("SELECT 1 FROM usuario WHERE id = %s" + self.IF_VERSION + self.LOCK_ROW,
+                           (user_id, version))
+            if cursor.fetchone() is None:
+                return 0
+            return self._delete_users(cursor, "%s", [user_id])
+
+    def delete_users(self, user_ids):
+        """Elimina varios usuarios en una transacción; devuelve cuántos había"""
+        with self.transaction() as cursor:
+            deleted = 0
+            for placeholders, chunk in _in_chunks(user_ids):
+                deleted += self._delete_users(cursor, placeholders, chunk)
+            return deleted
+
+    def _delete_users(self, cursor, placeholders, user_ids):
+        # links.usuario_id tiene ON DELETE CASCADE (migración 3): sus links
+        # se eliminan junto con el usuario
+        cursor.execute(f"DELETE FROM usuario WHERE id IN ({placeholders})", user_ids)
+        return cursor.rowcount
+
+    # ------------------------------------------------------------------
+    # Links
+
+    # Cada fila es el registro completo del link, con las columnas de LINK_COLUMNS
+    LINKS_QUERY = _links_query("links", "NULL")
+    # Los links archivados (archivo.py), con los mismos alias y columnas
+    ARCHIVE_QUERY = _links_query("links_archivo", "l.archivado")
+
+    # Valor de la columna de orden para el link usado como ancla de la página
+    ANCHOR_QUERY = """
+            SELECT {expression}
+            FROM {table} l
+            JOIN usuario u ON l.usuario_id = u.id
+            JOIN multimedia m ON l.multimedia_id = m.id
+            LEFT JOIN link_estado e ON e.link_id = l.id
+            WHERE l.id = %s
+        """
+
+    def _link_sources(self, filters):
+        """(tabla, consulta) de las tablas de links que se leen con ``filters``"""
+        sources = [("links", self.LINKS_QUERY)]
+        if filters is not None and filters.archivo:
+            sources.append(("links_archivo", self.ARCHIVE_QUERY))
+        return sources
+
+    def get_links_page(self, after_id=None, before_id=None, limit=200, filters=None, sort=None):
+        """Obtiene una página de links usando paginación por clave
+
+        Devuelve los registros completos en el orden de ``sort`` (por defecto,
+        links.id ascendente). Con ``after_id`` se obtienen los links que siguen
+        a ese link en ese orden y con ``before_id`` los que lo preceden. La
+        clave de la página es (columna de orden, id), así que cada página cuesta
+        lo mismo sin importar cuán lejos esté del principio.
+
+        Con ``filters.archivo`` se lee la página de links y la de links_archivo,
+        cada una con sus índices, y se mezclan en una consulta exterior que se
+        queda con las primeras ``limit`` filas.
+        """
+        sort = sort or LinkSort()
+        sources = self._link_sources(filters)
+
+        backwards = before_id is not None
+        # Recorremos la tabla en orden inverso si se pide la página anterior
+        # o si el orden es descendente (y en orden directo si son ambas)
+        reverse = backwards != sort.descending
+        op, direction = ('<', 'DESC') if reverse else ('>', 'ASC')
+
+        anchor = before_id if backwards else after_id
+        if sort.column == 'id':
+            order_by = f"l.id {direction}"
+            union_order_by = f"x.id {direction}"
+        else:
+            expression = sort.expression
+            order_by = f"{expression} {direction}, l.id {direction}"
+            union_order_by = f"{sort.union_expression} {direction}, x.id {direction}"
+            # El ancla puede estar en cualquiera de las tablas leídas
+            anchor_query = " UNION ALL ".join(self.ANCHOR_QUERY.format(expression=expression, table=table)
+                                              for table, _ in sources)
+
+        queries = []
+        params = []
+        for table, query in sources:
+            conditions, source_params = filters.to_sql(self, table) if filters else ([], [])
+            if anchor is not None and sort.column == 'id':
+                conditions.append(f"l.id {op} %s")
+                source_params.append(anchor)
+            elif anchor is not None:
+                conditions.append(f"({expression}, l.id) {op} (({anchor_query}), %s)")
+                source_params.extend([anchor] * (len(sources) + 1))
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += f" ORDER BY {order_by} LIMIT %s"
+            source_params.append(limit)
+            queries.append(query)
+            params.extend(source_params)
+
+        if len(queries) == 1:
+            query = queries[0]
+        else:
+            parts = " UNION ALL ".join(f"SELECT * FROM ({q}) p{n}" for n, q in enumerate(queries))
+            query = f"SELECT * FROM ({parts}) x ORDER BY {union_order_by} LIMIT %s"
+            params.append(limit)
+
+        rows = self.fetchall(query, params)
+        # La página anterior se leyó al revés
+        return rows[::-1] if backwards else rows
+
+    def iter_links(self, filters=None, chunk_size=1000):
+        """Recorre todos los links que cumplen los filtros, en bloques de ``chunk_size``
+
+        Usa un cursor sin buffer: en MySQL las filas se leen del servidor a
+        medida que se piden con ``fetchmany``, así que la memoria no depende
+        del tamaño de la tabla. La conexión queda tomada hasta terminar de
+        recorrer el generador. Con ``filters.archivo``, después de los links
+        (por id) vienen los archivados (también por id).
+        """
+        with self.transaction(buffered=False) as cursor:
+            for table, query in self._link_sources(filters):
+                conditions, params = filters.to_sql(self, table) if filters else ([], [])
+                if conditions:
+                    query += " WHERE " + " AND ".join(conditions)
+                cursor.execute(query + " ORDER BY l.id", params)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    def get_user_links_among(self, user_id, link_ids):
+        """Obtiene, de entre ``link_ids``, los links que pertenecen a un usuario"""
+        if not link_ids:
+            return []
+        placeholders = ", ".join(["%s"] * len(link_ids))
+        return self.fetchall(self.LINKS_QUERY + f" WHERE l.usuario_id = %s AND l.id IN ({placeholders})",
+                             (user_id, *link_ids))
+
+    def get_links_by_ids(self, link_ids):
+        """Registros completos de los links indicados (los que sigan existiendo)"""
+        if not link_ids:
+            return []
+        placeholders = ", ".join(["%s"] * len(link_ids))
+        return self.fetchall(self.LINKS_QUERY + f" WHERE l.id IN ({placeholders})", tuple(link_ids))
+
+    def fulltext_condition(self, words, table='links'):
+        """Condición de búsqueda de texto completo sobre link, descripción, autor y tema de ``table``"""
+        raise NotImplementedError
+
+    def get_link(self, link_id):
+        """Obtiene el registro completo de un link"""
+        return self.fetchone(self.LINKS_QUERY + " WHERE l.id = %s", (link_id,))
+
+    def get_archived_link(self, link_id):
+        """Registro completo de un link archivado (ver archivo.py)"""
+        return self.fetchone(self.ARCHIVE_QUERY + " WHERE l.id = %s", (link_id,))
+
+    # url_normalizada y url_hash se calculan aquí a partir de link (ver
+    # duplicates.py) y link_tema a partir de tema (ver temas.py)
+    INSERT_LINK = """INSERT INTO links
+                     (usuario_id, link, multimedia_id, fecha, autor, descripcion, tema,
+                      url_normalizada, url_hash)
+                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"""
+
+    UPDATE_LINK = """UPDATE links SET
+                     usuario_id = %s, link = %s, multimedia_id = %s,
+                     fecha = %s, autor = %s, descripcion = %s, tema = %s,
+                     url_normalizada = %s, url_hash = %s, version = version + 1
+                     WHERE id = %s"""
+    DELETE_LINK = "DELETE FROM links WHERE id = %s"
+
+    def insert_link(self, user_id, link, multimedia_id, fecha, autor, descripcion, tema):
+        """Inserta un link y devuelve su id"""
+        return self._write(self._insert_link, (user_id, link, multimedia_id, fecha, autor,
+                                               descripcion, tema) + url_key(link))
+
+    def _insert_link(self, cursor, values):
+        cursor.execute(self.INSERT_LINK, values)
+        link_id = cursor.lastrowid
+        sync_link_temas(cursor, self, [(link_id, values[6])])
+        return link_id
+
+    def insert_links_many(self, links):
+        """Inserta varios links en una sola transacción
+
+        Cada link es (usuario_id, link, multimedia_id, fecha, autor, descripcion, tema).
+        """
+        with self.transaction() as cursor:
+            # executemany no informa los ids: los temas se completan para los
+            # links posteriores al último que había
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM links")
+            last_id = cursor.fetchone()[0]
+            cursor.executemany(self.INSERT_LINK, [tuple(row) + url_key(row[1]) for row in links])
+            fill_link_temas(cursor, self, last_id)
+
+    def update_link(self, link_id, user_id, link, multimedia_id, fecha, autor, descripcion, tema,
+                    version=None):
+        """Actualiza un link; con ``version``, sólo si sigue en esa versión (ver update_user)"""
+        sql = self.UPDATE_LINK
+        params = [user_id, link, multimedia_id, fecha, autor, descripcion, tema, *url_key(link), link_id]
+        if version is not None:
+            sql += self.IF_VERSION
+            params.append(version)
+        return self._write(self._update_link, sql, params, link_id, tema)
+
+    def _update_link(self, cursor, sql, params, link_id, tema):
+        cursor.execute(sql, params)
+        updated = cursor.rowcount
+        if updated:
+            sync_link_temas(cursor, self, [(link_id, tema)])
+        return updated
+
+    def delete_link(self, link_id, version=None):
+        """Elimina un link; con ``version``, sólo si sigue en esa versión (ver update_user)"""
+        sql = self.DELETE_LINK
+        params = [link_id]
+        if version is not None:
+            sql += self.IF_VERSION
+            params.append(version)
+        return self._write(self._execute, sql, params)
+
+    # ------------------------------------------------------------------
+    # Operaciones sobre varios links: cada una es una transacción con
+    # sentencias IN (...) o executemany, no una por link
+
+    def delete_links(self, link_ids):
+        """Elimina varios links; devuelve cuántos había"""
+        with self.transaction() as cursor:
+            deleted = 0
+            for placeholders, chunk in _in_chunks(link_ids):
+                cursor.execute(f"DELETE FROM links WHERE id IN ({placeholders})", chunk)
+                deleted += cursor.rowcount
+            return deleted
+
+    def _update_links(self, link_ids, assignment, params):
+        with self.transaction() as cursor:
+            updated = 0
+            for placeholders, chunk in _in_chunks(link_ids):
+                cursor.execute(f"UPDATE links SET {assignment}, version = version + 1 "
+                               f"WHERE id IN ({placeholders})", (*params, *chunk))
+                updated += cursor.rowcount
+            return updated
+
+    def update_links_multimedia(self, link_ids, multimedia_id):
+        """Cambia el tipo de multimedia de varios links; devuelve cuántos se actualizaron"""
+        return self._update_links(link_ids, "multimedia_id = %s", (multimedia_id,))
+
+    def update_links_owner(self, link_ids, user_id):
+        """Pasa varios links a otro usuario; devuelve cuántos se actualizaron"""
+        return self._update_links(link_ids, "usuario_id = %s", (user_id,))
+
+    def update_links_temas(self, link_ids, edit):
+        """Reemplaza el texto de temas de varios links por ``edit(tema)``; devuelve cuántos cambiaron
+
+        ``edit`` se llama dentro de la transacción: si lanza una excepción no
+        se guarda ningún cambio.
+        """
+        with self.transaction() as cursor:
+            rows = []
+            for placeholders, chunk in _in_chunks(link_ids):
+                cursor.execute(f"SELECT id, tema FROM links WHERE id IN ({placeholders})", chunk)
+                rows += cursor.fetchall()
+            changed = []
+            for link_id, tema in rows:
+                new_tema = edit(tema or '')
+                if new_tema != (tema or ''):
+                    changed.append((link_id, new_tema))
+            cursor.executemany("UPDATE links SET tema = %s, version = version + 1 WHERE id = %s",
+                               [(tema, link_id) for link_id, tema in changed])
+            sync_link_temas(cursor, self, changed)
+            return len(changed)
+
+    def get_owner_conflicts(self, link_ids, user_id):
+        """Ids de ``link_ids`` que quedarían repetidos si pasaran al usuario ``user_id``
+
+        Chocan con un link del usuario que no está entre ``link_ids`` y tiene
+        la misma URL normalizada, o con otro de ``link_ids`` de id menor.
+        """
+        selected = []
+        for placeholders, chunk in _in_chunks(link_ids):
+            selected += self.fetchall(f"SELECT id, url_hash FROM links WHERE id IN ({placeholders})", chunk)
+        ids = {link_id for link_id, _ in selected}
+        hashes = {url_hash for _, url_hash in selected if url_hash is not None}
+
+        taken = set()
+        for placeholders, chunk in _in_chunks(hashes):
+            rows = self.fetchall(f"SELECT id, url_hash FROM links "
+                                 f"WHERE usuario_id = %s AND url_hash IN ({placeholders})", (user_id, *chunk))
+            taken.update(url_hash for link_id, url_hash in rows if link_id not in ids)
+        conflicts = []
+        for link_id, url_hash in sorted(selected):
+            if url_hash is None:
+                continue
+            if url_hash in taken:
+                conflicts.append(link_id)
+            taken.add(url_hash)
+        return conflicts
+
+    # ------------------------------------------------------------------
+    # Links repetidos (migración 8, ver duplicates.py)
+
+    def find_duplicate_link(self, user_id, link, exclude_id=None):
+        """Registro completo de un link del usuario con la misma URL normalizada, o None"""
+        sql = self.LINKS_QUERY + " WHERE l.url_hash = %s AND l.usuario_id = %s"
+        params = [url_key(link)[1], user_id]
+        if exclude_id is not None:
+            sql += " AND l.id <> %s"
+            params.append(exclude_id)
+        return self.fetchone(sql + " ORDER BY l.id LIMIT 1", params)
+
+    def get_link_ids_by_hash(self, hashes):
+        """{(url_hash, usuario_id): id} de los links guardados con alguno de ``hashes``"""
+        if not hashes:
+            return {}
+        placeholders = ", ".join(["%s"] * len(hashes))
+        rows = self.fetchall(f"SELECT url_hash, usuario_id, MIN(id) FROM links "
+                             f"WHERE url_hash IN ({placeholders}) GROUP BY url_hash, usuario_id",
+                             tuple(hashes))
+        return {(row[0], row[1]): row[2] for row in rows}
+
+    def get_duplicate_links(self):
+        """(id, url_hash, usuario_id, autor, descripcion, tema) de los links repetidos
+
+        Ordenados por grupo (url_hash, usuario_id) y, dentro de cada uno, por id.
+        """
+        return self.fetchall("""
+            SELECT l.id, l.url_hash, l.usuario_id, l.autor, l.descripcion, l.tema
+            FROM links l
+            JOIN (SELECT url_hash, usuario_id FROM links WHERE url_hash IS NOT NULL
+                  GROUP BY url_hash, usuario_id HAVING COUNT(*) > 1) d
+              ON d.url_hash = l.url_hash AND d.usuario_id = l.usuario_id
+            ORDER BY l.url_hash, l.usuario_id, l.id
+        """)
+
+    def merge_links(self, merges):
+        """Une grupos de links repetidos en una transacción
+
+        Cada grupo es (id que queda, autor, descripcion, tema, cambió, ids a borrar).
+        """
+        with self.transaction() as cursor:
+            cursor.executemany(
+                "UPDATE links SET autor = %s, descripcion = %s, tema = %s, version = version + 1 "
+                "WHERE id = %s",
+                [(autor, descripcion, tema, link_id)
+                 for link_id, autor, descripcion, tema, changed, _ in merges if changed]
+            )
+            sync_link_temas(cursor, self, [(link_id, tema)
+                                           for link_id, _, _, tema, changed, _ in merges if changed])
+            cursor.executemany("DELETE FROM links WHERE id = %s",
+                               [(link_id,) for merge in merges for link_id in merge[5]])
+
+    # ------------------------------------------------------------------
+    # Temas (migración 9, ver temas.py)
+
+    def get_temas(self):
+        """(id, nombre, cantidad de links) de los temas que tienen links, por nombre"""
+        return self.fetchall("SELECT id, nombre, cantidad FROM tema WHERE cantidad > 0 ORDER BY nombre")
+
+    # ------------------------------------------------------------------
+    # Estadísticas (migración 10, ver estadisticas.py)
+
+    def get_stats_by_user(self):
+        """(usuario_id, nombre, apellido, cantidad de links), de mayor a menor cantidad"""
+        return self.fetchall("""
+            SELECT e.usuario_id, u.nombre, u.apellido, e.cantidad
+            FROM estadistica_usuario e JOIN usuario u ON u.id = e.usuario_id
+            WHERE e.cantidad > 0 ORDER BY e.cantidad DESC, e.usuario_id
+        """)
+
+    def get_stats_by_type(self):
+        """(multimedia_id, tipo, cantidad de links) de cada tipo de multimedia"""
+        return self.fetchall("""
+            SELECT m.id, m.tipo, COALESCE(e.cantidad, 0)
+            FROM multimedia m LEFT JOIN estadistica_multimedia e ON e.multimedia_id = m.id
+            ORDER BY m.id
+        """)
+
+    def get_stats_by_month(self):
+        """(mes 'AAAA-MM', cantidad de links), del mes más reciente al más antiguo"""
+        return self.fetchall("SELECT mes, cantidad FROM estadistica_mes WHERE cantidad > 0 ORDER BY mes DESC")
+
+    # ------------------------------------------------------------------
+    # Verificación de links (migración 7, ver linkcheck.py)
+
+    def get_links_to_check(self, filters=None, checked_before=None):
+        """(id, link) de los links que cumplen los filtros y no se verificaron desde ``checked_before``
+
+        Sin ``checked_before`` se devuelven todos.
+        """
+        conditions, params = filters.to_sql(self) if filters else ([], [])
+        if checked_before is not None:
+            conditions.append("(e.revisado IS NULL OR e.revisado < %s)")
+            params.append(checked_before)
+        query = "SELECT l.id, l.link FROM links l LEFT JOIN link_estado e ON e.link_id = l.id"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return self.fetchall(query + " ORDER BY l.id", params)
+
+    def save_link_statuses(self, statuses):
+        """Guarda resultados (link_id, estado, codigo_http, url_final, detalle, revisado)"""
+        with self.transaction() as cursor:
+            cursor.executemany(
+                self.upsert_sql("link_estado", ("link_id", "estado", "codigo_http", "url_final",
+                                                "detalle", "revisado"), "link_id"),
+                statuses
+            )
+
+    def get_link_status(self, link_id):
+        """(estado, codigo_http, url_final, detalle, revisado) de la última verificación"""
+        return self.fetchone(
+            "SELECT estado, codigo_http, url_final, detalle, revisado FROM link_estado WHERE link_id = %s",
+            (link_id,)
+        )
+
+    # ------------------------------------------------------------------
+    # Registro de cambios (migración 5)
+
+    def last_change_seq(self):
+        return self.fetchone("SELECT MAX(seq) FROM cambios")[0] or 0
+
+    def get_changes(self, after_seq, limit=500):
+        """Entradas (seq, tabla, fila_id, operacion) posteriores a ``after_seq``"""
+        return self.fetchall(
+            "SELECT seq, tabla, fila_id, operacion FROM cambios WHERE seq > %s ORDER BY seq LIMIT %s",
+            (after_seq, limit)
+        )
+
+
+class MySQLDatabase(Database):
+    """Acceso a MySQL usando ``mysql.connector.pooling``"""
+
+    dialect = 'mysql'
+
+    # Sentencias que se ejecutan con cursores preparados (ver writes.py)
+    PREPARED = (Database.INSERT_USER, Database.UPDATE_USER, Database.UPDATE_USER + Database.IF_VERSION,
+                Database.INSERT_LINK, Database.UPDATE_LINK, Database.UPDATE_LINK + Database.IF_VERSION,
+                Database.DELETE_LINK, Database.DELETE_LINK + Database.IF_VERSION)
+    LOCK_ROW = " FOR UPDATE"
+
+    def fulltext_condition(self, words, table='links'):
+        # Índices FULLTEXT ft_links (migración 4) y ft_links_archivo (migración
+        # 11), sobre las mismas columnas; "+palabra*" exige cada palabra y
+        # acepta prefijos
+        return ("MATCH(l.link, l.descripcion, l.autor, l.tema) AGAINST (%s IN BOOLEAN MODE)",
+                [" ".join(f"+{word}*" for word in words)])
+
+    def __init__(self, pool_size=5, **config):
+        if mysql is None:
+            raise DatabaseError("No está instalado mysql-connector-python")
+        self.driver_errors = (mysql.connector.Error,)
+        self.driver_integrity_errors = (mysql.connector.IntegrityError,)
+
+        config = {**MYSQL_CONFIG, **config}
+        # FOUND_ROWS: rowcount de un UPDATE cuenta las filas encontradas, no sólo
+        # las modificadas (si no, guardar sin cambios parecería "no encontrado").
+        config.setdefault("client_flags", [ClientFlag.FOUND_ROWS])
+        # Si se deja de leer un cursor sin buffer (una exportación cancelada),
+        # el resto del resultado se descarta al cerrarlo
+        config.setdefault("consume_results", True)
+        # Reiniciar la sesión al devolver la conexión al pool descartaría las
+        # sentencias preparadas (ver writes.py); la aplicación no usa variables
+        # de sesión ni tablas temporales
+        config.setdefault("pool_reset_session", False)
+        try:
+            self.pool = pooling.MySQLConnectionPool(pool_name="links_pool",
+                                                    pool_size=pool_size, **config)
+        except mysql.connector.Error as e:
+            raise DatabaseError(str(e)) from e
+
+        # El pool de mysql.connector falla si está agotado en lugar de esperar
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._label = f"MySQL {config.get('database')}@{config.get('host')}"
+        self._statements = PreparedStatements(self.PREPARED, max_connections=pool_size * 2)
+
+    def describe(self):
+        return self._label
+
+    def upsert_sql(self, table, columns, key):
+        updates = ", ".join(f"{c} = VALUES({c})" for c in columns if c != key) or f"{key} = {key}"
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+                f" ON DUPLICATE KEY UPDATE {updates}")
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            conn = self.pool.get_connection()
+            # Reconecta si el servidor cerró la conexión mientras estaba en el pool
+            conn.ping(reconnect=True, attempts=3, delay=1)
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _cursor(self, conn, buffered=True):
+        if not buffered:
+            return conn.cursor(buffered=False)
+        return StatementCursor(conn.cursor(buffered=True), self._statements, conn)
+
+    def _delete_users(self, cursor, placeholders, user_ids):
+        # InnoDB no dispara triggers en las acciones de claves foráneas: los
+        # links (y los archivados) se borran antes con un DELETE propio, para
+        # que los triggers los anoten en el registro de cambios, descuenten
+        # sus temas y actualicen las estadísticas
+        cursor.execute(f"DELETE FROM links_archivo WHERE usuario_id IN ({placeholders})", user_ids)
+        cursor.execute(f"DELETE FROM links WHERE usuario_id IN ({placeholders})", user_ids)
+        cursor.execute(f"DELETE FROM usuario WHERE id IN ({placeholders})", user_ids)
+        return cursor.rowcount
+
+    def _release(self, conn):
+        try:
+            conn.close()  # Devuelve la conexión al pool
+        finally:
+            self._slots.release()
+
+
+@lru_cache(maxsize=1024)
+def _sqlite_placeholders(sql):
+    # El mismo texto traducido reutiliza la sentencia preparada de la conexión
+    return sql.replace('%s', '?')
+
+
+# (patrón de MySQL, reemplazo en SQLite) para Database.ddl
+_SQLITE_DDL = (
+    (re.compile(r"\b(?:BIG)?INT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", re.I),
+     "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\bDEFAULT\s*\(\s*CURDATE\(\)\s*\)", re.I), "DEFAULT CURRENT_DATE"),
+    (re.compile(r"\bDEFAULT\s+CURDATE\(\)", re.I), "DEFAULT CURRENT_DATE"),
+    (re.compile(r"\)\s*ENGINE\s*=\s*\w+", re.I), ")"),
+)
+
+
+class _SQLiteCursor:
+    """Cursor de sqlite3 que acepta los marcadores ``%s`` de MySQL"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        return self._cursor.execute(_sqlite_placeholders(sql), params)
+
+    def executemany(self, sql, seq_of_params):
+        return self._cursor.executemany(_sqlite_placeholders(sql), seq_of_params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class SQLiteDatabase(Database):
+    """Acceso a SQLite con un pool propio de conexiones"""
+
+    driver_errors = (sqlite3.Error,)
+    driver_integrity_errors = (sqlite3.IntegrityError,)
+
+    dialect = 'sqlite'
+
+    def fulltext_condition(self, words, table='links'):
+        # Tablas virtuales FTS5 links_fts (migración 4) y links_archivo_fts
+        # (migración 11)
+        return (f"l.id IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH %s)",
+                [" ".join(f'"{word}"*' for word in words)])
+
+    def __init__(self, path='links_interes.db', pool_size=5):
+        self.path = path
+        self.pool_size = pool_size
+        self._pool = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def ddl(self, sql):
+        for pattern, replacement in _SQLITE_DDL:
+            sql = pattern.sub(replacement, sql)
+        return sql
+
+    def describe(self):
+        return f"SQLite {self.path}"
+
+    def upsert_sql(self, table, columns, key):
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != key)
+        action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+                f" ON CONFLICT ({key}) {action}")
+
+    def _connect(self):
+        options = dict(check_same_thread=False, timeout=10,
+                       cached_statements=SQLITE_CACHED_STATEMENTS)
+        if self.path == ':memory:':
+            # Una base en memoria compartida entre todas las conexiones del pool
+            conn = sqlite3.connect(f'file:links_{id(self)}?mode=memory&cache=shared',
+                                   uri=True, **options)
+        else:
+            conn = sqlite3.connect(self.path, **options)
+            # El modo WAL queda guardado en el archivo; no aplica a una base en memoria
+            conn.execute("PRAGMA journal_mode = WAL")
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            try:
+                return self._connect()
+            except BaseException:
+                self._slots.release()
+                raise
+
+    def _release(self, conn):
+        self._pool.put(conn)
+        self._slots.release()
+
+    def _cursor(self, conn, buffered=True):
+        # sqlite3 siempre lee las filas a medida que se piden
+        return _SQLiteCursor(conn.cursor())
+
+    def close(self):
+        super().close()
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+BACKENDS = ('auto', 'mysql', 'sqlite', 'replica')
+
+
+def connect(backend=None, sqlite_path=None, write_window_ms=None, **mysql_config):
+    """Abre la base del motor configurado (``LINKS_DB``, ver el docstring del módulo)
+
+    Con ``'auto'`` se intenta MySQL y, si no está el conector o el servidor no
+    responde, se usa la base SQLite local. ``db.describe()`` dice cuál quedó.
+    Con ``write_window_ms`` (por omisión ``LINKS_WRITE_WINDOW_MS``) se activa
+    la cola que agrupa los commits (ver writes.py); sin él, cada escritura hace
+    su commit.
+    """
+    db = _open(backend or DB_BACKEND, sqlite_path, mysql_config)
+    window = WRITE_WINDOW_MS if write_window_ms is None else write_window_ms
+    if window is not None:
+        db.start_write_queue(float(window) / 1000)
+    return db
+
+
+def _open(backend, sqlite_path, mysql_config):
+    if backend not in BACKENDS:
+        raise ValueError(f"Motor de base de datos desconocido: {backend!r}")
+    if backend == 'replica':
+        from replica import REPLICA_PATH, ReplicaDatabase
+        return ReplicaDatabase(sqlite_path or REPLICA_PATH,
+                               remote_factory=lambda: MySQLDatabase(**mysql_config))
+    if backend != 'sqlite':
+        try:
+            return MySQLDatabase(**mysql_config)
+        except DatabaseError:
+            if backend == 'mysql':
+                raise
+    return SQLiteDatabase(sqlite_path or SQLITE_PATH)
@@ -0,0 +1,198 @@
+"""Detección de links repetidos: la misma página guardada con otra forma de escribir la URL.
+
+``normalize_url`` lleva una URL a una forma canónica:
+- esquema y host en minúsculas, host en IDNA y sin el puerto por omisión;
+- http y https se consideran la misma página (se normaliza a https);
+- sin barra final, sin segmentos ``.`` y ``..`` y con los escapes ``%xx``
+  uniformes;
+- sin parámetros de seguimiento (``utm_*``, ``fbclid``, ``gclid``...) y con
+  el resto de los parámetros ordenados;
+- sin fragmento, salvo las rutas de aplicaciones de una página (``#!`` o ``#/``).
+
+De la forma canónica sale ``url_hash`` (SHA-1), que se guarda en la tabla
+links junto a la URL normalizada (migración 8) con un índice
+``(url_hash, usuario_id)``. Así, encontrar si un usuario ya guardó un link es
+una búsqueda en el índice, y ``merge_duplicates`` agrupa los repetidos con un
+GROUP BY en lugar de comparar cada par de links.
+"""
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from itertools import groupby
+from urllib.parse import unquote, urlsplit
+
+from temas import MAX_TEXT, format_temas
+
+# Parámetros que sólo sirven para medir campañas y no cambian la página
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid',
+                   'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'ref_src'}
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Caracteres que no hace falta escapar (RFC 3986, "unreserved")
+_UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+
+
+def _normalize_escapes(text):
+    """Deja sin escapar los caracteres que no lo necesitan y el resto con %XX en mayúsculas"""
+    def replace(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in _UNRESERVED else match.group(0).upper()
+    return _ESCAPE.sub(replace, text)
+
+
+def _normalize_path(path):
+    segments = []
+    for segment in _normalize_escapes(path).split('/'):
+        if segment == '..':
+            if segments:
+                segments.pop()
+        elif segment not in ('', '.'):
+            segments.append(segment)
+    return '/' + '/'.join(segments) if segments else ''
+
+
+def _normalize_query(query):
+    params = []
+    for param in query.split('&'):
+        if not param:
+            continue
+        name = unquote(param.partition('=')[0].replace('+', ' ')).lower()
+        if name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES):
+            continue
+        params.append(_normalize_escapes(param))
+    return '&'.join(sorted(params))
+
+
+def normalize_url(url):
+    """Forma canónica de ``url``; lo que no es una URL http o https sólo se recorta"""
+    url = url.strip()
+    parts = urlsplit(url)
+    if not parts.scheme and not url.startswith('/'):
+        # "www.python.org/doc": sin esquema, urlsplit lo toma como una ruta
+        candidate = urlsplit('http://' + url)
+        if candidate.hostname and '.' in candidate.hostname and ' ' not in url:
+            parts = candidate
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    try:
+        host = parts.hostname.rstrip('.')
+        if ':' in host:
+            # IPv6: sin los corchetes no se distingue la dirección del puerto
+            host = f"[{host}]"
+        else:
+            host = host.encode('idna').decode('ascii')
+        port = parts.port
+    except (UnicodeError, ValueError):
+        return url
+    if port is not None and port not in DEFAULT_PORTS.values():
+        host = f"{host}:{port}"
+    if parts.username is not None:
+        userinfo = parts.username if parts.password is None else f"{parts.username}:{parts.password}"
+        host = f"{userinfo}@{host}"
+
+    normalized = "https://" + host + _normalize_path(parts.path)
+    query = _normalize_query(parts.query)
+    if query:
+        normalized += '?' + query
+    if parts.fragment.startswith(('!', '/')):
+        normalized += '#' + parts.fragment
+    return normalized
+
+
+def url_key(url):
+    """(URL normalizada, url_hash) de ``url``, como se guardan en la tabla links"""
+    normalized = normalize_url(url)
+    return normalized, hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def url_hash(url):
+    return url_key(url)[1]
+
+
+def fill_url_hashes(cursor, batch_size=1000):
+    """Calcula url_normalizada y url_hash de los links que no los tienen; devuelve cuántos
+
+    Los completa la migración 8 y, por si otro programa escribió links sin
+    ellos, también ``merge_duplicates`` antes de buscar repetidos.
+    """
+    filled = 0
+    last_id = 0
+    while True:
+        cursor.execute("SELECT id, link FROM links WHERE url_hash IS NULL AND id > %s "
+                       "ORDER BY id LIMIT %s", (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            return filled
+        cursor.executemany("UPDATE links SET url_normalizada = %s, url_hash = %s WHERE id = %s",
+                           [url_key(link) + (link_id,) for link_id, link in rows])
+        filled += len(rows)
+        last_id = rows[-1][0]
+
+
+@dataclass
+class DedupReport:
+    """Resultado de unir links repetidos"""
+    groups: int = 0
+    removed: int = 0
+    seconds: float = 0.0
+    dry_run: bool = False
+
+    def summary(self):
+        removed = "Se borrarían" if self.dry_run else "Links borrados"
+        return (f"Grupos de links repetidos: {self.groups}\n{removed}: {self.removed}\n"
+                f"Tiempo: {self.seconds:.1f} s")
+
+
+def _merge_group(rows):
+    """(id, autor, descripcion, tema, cambió, ids a borrar) para un grupo de repetidos
+
+    Se conserva el link más antiguo: su autor y descripción, si están vacíos,
+    se completan con los del primer repetido que los tenga, y sus temas son
+    los de todos los del grupo.
+    """
+    kept = list(rows[0])
+    for row in rows[1:]:
+        for i in (3, 4):
+            if not kept[i] and row[i]:
+                kept[i] = row[i]
+    temas = format_temas(', '.join(row[5] or '' for row in rows))
+    if temas != (kept[5] or '') and len(temas) <= MAX_TEXT:
+        kept[5] = temas
+    changed = tuple(kept[3:6]) != tuple(rows[0][3:6])
+    return kept[0], kept[3], kept[4], kept[5], changed, [row[0] for row in rows[1:]]
+
+
+def merge_duplicates(db, dry_run=False, batch_size=500):
+    """Une los links repetidos de cada usuario y devuelve un DedupReport
+
+    Con ``dry_run`` sólo cuenta lo que haría. Los cambios se guardan cada
+    ``batch_size`` grupos; el link que queda incrementa su versión si se le
+    completó algún campo, igual que con cualquier otra edición.
+    """
+    started = time.perf_counter()
+    report = DedupReport(dry_run=dry_run)
+    if not dry_run:
+        with db.transaction() as cursor:
+            fill_url_hashes(cursor)
+
+    merges = []
+    # Filas (id, url_hash, usuario_id, autor, descripcion, tema) ordenadas por grupo
+    for _, rows in groupby(db.get_duplicate_links(), key=lambda row: (row[1], row[2])):
+        merge = _merge_group(list(rows))
+        report.groups += 1
+        report.removed += len(merge[5])
+        merges.append(merge)
+        if len(merges) >= batch_size:
+            if not dry_run:
+                db.merge_links(merges)
+            merges = []
+    if merges and not dry_run:
+        db.merge_links(merges)
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,85 @@
+"""Estadísticas de links por usuario, por tipo de multimedia y por mes.
+
+Contar los links con GROUP BY recorre toda la tabla links en cada consulta.
+En cambio, cada dimensión tiene su tabla de resumen (migración 10) con una
+fila por valor y la cantidad de links, y unos triggers sobre links la
+actualizan en cada alta, baja o modificación. Así se cuentan también las
+importaciones, las escrituras de otros clientes y las de la réplica. La
+pestaña de estadísticas lee sólo esas tablas: el tiempo depende de la
+cantidad de usuarios, tipos y meses, no de la de links.
+
+``rebuild_stats`` recalcula los resúmenes desde cero (y ``tema.cantidad``, ver
+temas.py) por si quedaron desparejos, por ejemplo tras escribir en la base
+sin los triggers.
+
+Los links archivados (tabla links_archivo, ver archivo.py) se siguen
+contando: tienen sus propios triggers de alta y baja, así que archivar o
+restaurar un link no cambia las estadísticas.
+"""
+import time
+from dataclasses import dataclass, field
+
+# (tabla de resumen, columna clave, expresión de la clave sobre una fila de
+# links; {row} es NEW u OLD en los triggers y l en la reconstrucción)
+STAT_TABLES = (
+    ("estadistica_usuario", "usuario_id", "{row}.usuario_id"),
+    ("estadistica_multimedia", "multimedia_id", "{row}.multimedia_id"),
+    # 'AAAA-MM'; SUBSTR sobre un DATE de MySQL usa su texto 'AAAA-MM-DD'
+    ("estadistica_mes", "mes", "COALESCE(SUBSTR({row}.fecha, 1, 7), '')"),
+)
+
+# Tablas cuyos links se cuentan
+LINK_TABLES = ("links", "links_archivo")
+
+
+def increment_sql(db, table, key, expression):
+    """Sentencia que suma un link a la fila ``expression`` del resumen, creándola si hace falta"""
+    if db.dialect == 'mysql':
+        return (f"INSERT INTO {table} ({key}, cantidad) VALUES ({expression}, 1) "
+                f"ON DUPLICATE KEY UPDATE cantidad = cantidad + 1")
+    return (f"INSERT INTO {table} ({key}, cantidad) VALUES ({expression}, 1) "
+            f"ON CONFLICT ({key}) DO UPDATE SET cantidad = cantidad + 1")
+
+
+def decrement_sql(table, key, expression):
+    return f"UPDATE {table} SET cantidad = cantidad - 1 WHERE {key} = {expression}"
+
+
+@dataclass
+class Stats:
+    """Contenido de la pestaña de estadísticas"""
+    total: int = 0
+    by_user: list = field(default_factory=list)  # (usuario_id, nombre, apellido, cantidad)
+    by_type: list = field(default_factory=list)  # (multimedia_id, tipo, cantidad)
+    by_month: list = field(default_factory=list)  # (mes, cantidad), del más reciente al más viejo
+    ms: float = 0.0
+
+
+def load_stats(db):
+    """Lee las tablas de resumen y devuelve un Stats"""
+    started = time.perf_counter()
+    by_type = db.get_stats_by_type()
+    stats = Stats(total=sum(row[2] for row in by_type), by_user=db.get_stats_by_user(),
+                  by_type=by_type, by_month=db.get_stats_by_month())
+    stats.ms = (time.perf_counter() - started) * 1000
+    return stats
+
+
+def fill_stats(cursor, tables=LINK_TABLES):
+    """Vuelve a contar los resúmenes y ``tema.cantidad`` con GROUP BY sobre los links de ``tables``"""
+    links = " UNION ALL ".join(f"SELECT usuario_id, multimedia_id, fecha FROM {table}" for table in tables)
+    for table, key, expression in STAT_TABLES:
+        expression = expression.format(row='l')
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f"INSERT INTO {table} ({key}, cantidad) "
+                       f"SELECT {expression}, COUNT(*) FROM ({links}) l GROUP BY {expression}")
+    cursor.execute("UPDATE tema SET cantidad = "
+                   "(SELECT COUNT(*) FROM link_tema lt WHERE lt.tema_id = tema.id)")
+
+
+def rebuild_stats(db):
+    """Recalcula todas las tablas de resumen a partir de los links y los archivados; devuelve el tiempo en segundos"""
+    started = time.perf_counter()
+    with db.transaction() as cursor:
+        fill_stats(cursor)
+    return time.perf_counter() - started
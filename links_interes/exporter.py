@@ -0,0 +1,122 @@
+"""Exportación de la tabla de links a CSV, JSONL o Parquet.
+
+Las filas se leen en bloques con un cursor sin buffer (``Database.iter_links``)
+y cada bloque se escribe apenas llega, así que exportar no carga la tabla
+entera en memoria. Se exportan los mismos links que muestra la interfaz con
+los filtros activos (``LinkFilter``).
+
+Parquet es opcional: hace falta tener instalado ``pyarrow``.
+"""
+import csv
+import json
+import os
+import time
+from datetime import date
+
+from database import LINK_COLUMNS as COLUMNS
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet sólo está disponible si está instalado pyarrow
+    pyarrow = None
+
+FORMATS = ("csv", "jsonl", "parquet")
+
+
+class ExportReport:
+    """Resultado de una exportación"""
+
+    def __init__(self, path):
+        self.path = path
+        self.written = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.written / self.elapsed if self.elapsed else 0.0
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def summary(self):
+        return (f"Filas exportadas: {self.written}\n"
+                f"Archivo: {self.path}\n"
+                f"Tiempo: {self.elapsed:.1f} s ({self.rows_per_second:.0f} filas/s)")
+
+
+def format_for(path):
+    """Deduce el formato de exportación por la extensión del archivo"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    return 'csv'
+
+
+def _plain(value):
+    # Las fechas se escriben como YYYY-MM-DD, igual que las acepta importer
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def _write_csv(f, chunks, report):
+    writer = csv.writer(f)
+    writer.writerow(COLUMNS)
+    for rows in chunks:
+        writer.writerows([_plain(v) for v in row] for row in rows)
+        report.written += len(rows)
+
+
+def _write_jsonl(f, chunks, report):
+    for rows in chunks:
+        f.writelines(json.dumps(dict(zip(COLUMNS, map(_plain, row))), ensure_ascii=False) + "\n"
+                     for row in rows)
+        report.written += len(rows)
+
+
+def _write_parquet(path, chunks, report):
+    if pyarrow is None:
+        raise ValueError("Para exportar a Parquet hace falta instalar pyarrow")
+    schema = pyarrow.schema([
+        ("id", pyarrow.int64()), ("usuario_id", pyarrow.string()),
+        ("nombre", pyarrow.string()), ("apellido", pyarrow.string()),
+        ("link", pyarrow.string()), ("multimedia_id", pyarrow.int64()),
+        ("tipo", pyarrow.string()), ("fecha", pyarrow.string()),
+        ("autor", pyarrow.string()), ("descripcion", pyarrow.string()),
+        ("tema", pyarrow.string()), ("version", pyarrow.int64()),
+        ("estado", pyarrow.string()), ("codigo_http", pyarrow.int64()),
+        ("archivado", pyarrow.string()),
+    ])
+    # Un row group por bloque leído de la base
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            columns = [list(values) for values in zip(*rows)]
+            for i in (7, 14):
+                columns[i] = [_plain(v) for v in columns[i]]
+            writer.write_table(pyarrow.Table.from_arrays(columns, schema=schema))
+            report.written += len(rows)
+
+
+def export_links(db, path, filters=None, fmt=None, chunk_size=1000):
+    """Exporta los links que cumplen ``filters`` a ``path`` y devuelve un ExportReport
+
+    ``fmt`` es 'csv', 'jsonl' o 'parquet'; si se omite se deduce de la extensión.
+    """
+    fmt = fmt or format_for(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de exportación desconocido: '{fmt}'")
+    report = ExportReport(path)
+    chunks = db.iter_links(filters, chunk_size=chunk_size)
+    try:
+        if fmt == 'parquet':
+            _write_parquet(path, chunks, report)
+        else:
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                (_write_csv if fmt == 'csv' else _write_jsonl)(f, chunks, report)
+    finally:
+        # Libera la conexión aunque la escritura haya fallado a mitad
+        chunks.close()
+    return report.finish()
@@ -0,0 +1,117 @@
+"""Filtros y orden de la consulta de links.
+
+Los filtros de la interfaz se traducen a cláusulas WHERE/ORDER BY con
+parámetros, de modo que sólo las filas que coinciden viajan desde el servidor.
+Con ``archivo`` la consulta suma los links archivados (tabla links_archivo,
+ver archivo.py); por omisión sólo se consultan los de la tabla links.
+"""
+import re
+from dataclasses import dataclass
+
+# Columna de la tabla de links -> expresión SQL por la que se ordena. Las
+# columnas que admiten NULL se normalizan para que la paginación por clave no
+# pierda filas (NULL no es mayor ni menor que nada).
+SORT_COLUMNS = {
+    'id': "l.id",
+    'usuario': "u.nombre",
+    'link': "l.link",
+    'multimedia': "m.tipo",
+    'fecha': "COALESCE(l.fecha, '0001-01-01')",
+    'autor': "COALESCE(l.autor, '')",
+    'tema': "COALESCE(l.tema, '')",
+    'estado': "COALESCE(e.estado, '')",
+}
+
+# Alias de las tablas de la consulta de links (l, u, m, e). Sobre la unión de
+# links y links_archivo, las columnas se leen de la subconsulta x con el mismo
+# nombre que tienen en el registro del link (LINK_COLUMNS)
+_TABLE_ALIAS = re.compile(r"\b[lume]\.")
+
+# Caracteres con significado especial en las búsquedas de texto completo
+_FULLTEXT_SPECIAL = re.compile(r'[+\-<>()~*"@:^{}\[\]]')
+
+
+def search_words(text):
+    """Separa un texto de búsqueda en palabras sin operadores"""
+    return [w for w in _FULLTEXT_SPECIAL.sub(' ', text).split() if w]
+
+
+def _like_escape(text):
+    return text.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+
+
+@dataclass
+class LinkFilter:
+    """Criterios de búsqueda sobre la tabla de links"""
+    usuario_id: str = None
+    multimedia_id: int = None
+    fecha_desde: str = None
+    fecha_hasta: str = None
+    tema: str = None
+    texto: str = None
+    archivo: bool = False  # incluir los links archivados
+
+    def is_empty(self):
+        # archivo no cuenta: sin otros filtros, la unión sigue ordenada por id
+        return not any((self.usuario_id, self.multimedia_id, self.fecha_desde,
+                        self.fecha_hasta, self.tema, self.texto))
+
+    def to_sql(self, db, table='links'):
+        """Devuelve (condiciones, parámetros) para el WHERE de la consulta de links
+
+        La búsqueda de texto libre usa el índice de texto completo del motor
+        (``db.fulltext_condition``) en lugar de ``LIKE``. ``table`` es la tabla
+        con alias ``l``: links o links_archivo.
+        """
+        conditions = []
+        params = []
+        if self.usuario_id:
+            conditions.append("l.usuario_id = %s")
+            params.append(self.usuario_id)
+        if self.multimedia_id:
+            conditions.append("l.multimedia_id = %s")
+            params.append(self.multimedia_id)
+        if self.fecha_desde:
+            conditions.append("l.fecha >= %s")
+            params.append(self.fecha_desde)
+        if self.fecha_hasta:
+            conditions.append("l.fecha <= %s")
+            params.append(self.fecha_hasta)
+        if self.tema and table == 'links':
+            # Uno de los temas del link (tabla link_tema, ver temas.py)
+            conditions.append("l.id IN (SELECT lt.link_id FROM link_tema lt "
+                              "JOIN tema t ON t.id = lt.tema_id WHERE t.nombre = %s)")
+            params.append(self.tema)
+        elif self.tema:
+            # Los archivados no están en link_tema: se busca el tema en el texto
+            # "tema1, tema2" (ver temas.format_temas); LIKE, como los nombres
+            # de tema, no distingue mayúsculas
+            tema = _like_escape(self.tema)
+            conditions.append("(" + " OR ".join(["l.tema LIKE %s ESCAPE '!'"] * 4) + ")")
+            params.extend((tema, f"{tema}, %", f"%, {tema}", f"%, {tema}, %"))
+        if self.texto:
+            words = search_words(self.texto)
+            if words:
+                condition, text_params = db.fulltext_condition(words, table)
+                conditions.append(condition)
+                params.extend(text_params)
+        return conditions, params
+
+
+@dataclass
+class LinkSort:
+    """Orden de la consulta de links: columna de la tabla y sentido"""
+    column: str = 'id'
+    descending: bool = False
+
+    @property
+    def expression(self):
+        return SORT_COLUMNS[self.column]
+
+    @property
+    def union_expression(self):
+        """La expresión de orden sobre la subconsulta x que une links y links_archivo"""
+        return _TABLE_ALIAS.sub("x.", self.expression)
+
+    def is_default(self):
+        return self.column == 'id' and not self.descending
@@ -0,0 +1,234 @@
+"""Importación masiva de usuarios y links desde archivos CSV o JSONL.
+
+El archivo se lee fila por fila (nunca se carga entero en memoria), cada fila
+se valida contra los ids de usuario y multimedia existentes, que se guardan en
+conjuntos en memoria, y las filas válidas se insertan en lotes con
+``executemany`` y un único commit por lote.
+
+Los archivos CSV deben tener encabezados con los nombres de las columnas de la
+tabla (``id, nombre, apellido, email`` para usuarios; ``usuario_id, link,
+multimedia_id, fecha, autor, descripcion, tema`` para links). En lugar de
+``multimedia_id`` se puede indicar el ``tipo`` por nombre; ``tema`` admite
+varios temas separados por comas.
+
+Un link que el usuario ya tiene (la misma URL normalizada, ver
+``duplicates.py``), en la base o antes en el mismo archivo, se rechaza. Los de
+la base se buscan con una consulta al índice de ``url_hash`` por lote.
+"""
+import csv
+import json
+import os
+import time
+from datetime import date, datetime
+
+from database import IntegrityError
+from duplicates import url_hash
+from temas import MAX_TEXT, format_temas
+
+# Cantidad de filas rechazadas que se conservan como ejemplo en el reporte
+REJECTED_SAMPLE = 20
+
+
+class ImportReport:
+    """Resultado de una importación"""
+
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.rejected_sample = []  # (línea, motivo) de las primeras filas rechazadas
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.inserted / self.elapsed if self.elapsed else 0.0
+
+    def reject(self, line, reason):
+        self.rejected += 1
+        if len(self.rejected_sample) < REJECTED_SAMPLE:
+            self.rejected_sample.append((line, reason))
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def summary(self):
+        text = (f"Filas leídas: {self.read}\n"
+                f"Insertadas: {self.inserted}\n"
+                f"Rechazadas: {self.rejected}\n"
+                f"Tiempo: {self.elapsed:.1f} s ({self.rows_per_second:.0f} filas/s)")
+        for line, reason in self.rejected_sample:
+            text += f"\n  línea {line}: {reason}"
+        if self.rejected > len(self.rejected_sample):
+            text += "\n  ..."
+        return text
+
+
+def iter_records(path):
+    """Recorre un archivo CSV o JSONL y devuelve pares (número de línea, dict)"""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if extension in ('.jsonl', '.ndjson', '.json'):
+            for number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield number, e
+                    continue
+                yield number, record if isinstance(record, dict) else ValueError("no es un objeto JSON")
+        else:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+
+
+def _text(record, key):
+    value = record.get(key)
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _run(db, path, parse, insert_many, batch_size, on_reject, report, check_batch=None):
+    """Lee, valida e inserta en lotes; ``parse`` devuelve la fila o lanza ValueError
+
+    ``check_batch``, si se indica, recibe el lote antes de insertarlo y
+    devuelve {posición en el lote: motivo} de las filas que hay que rechazar.
+    """
+    batch = []
+    lines = []
+
+    def flush():
+        if check_batch is not None:
+            rejected = check_batch(batch)
+            for i in sorted(rejected):
+                report.reject(lines[i], rejected[i])
+                if on_reject is not None:
+                    on_reject(lines[i], batch[i], rejected[i])
+            if rejected:
+                batch[:] = [row for i, row in enumerate(batch) if i not in rejected]
+                lines[:] = [line for i, line in enumerate(lines) if i not in rejected]
+        try:
+            insert_many(batch)
+            report.inserted += len(batch)
+        except IntegrityError:
+            # Algún conflicto que no se detectó al validar (por ejemplo, otro
+            # cliente insertó el mismo id): se reintenta fila por fila para
+            # rechazar sólo las que fallan.
+            for line, row in zip(lines, batch):
+                try:
+                    insert_many([row])
+                    report.inserted += 1
+                except IntegrityError as e:
+                    report.reject(line, str(e))
+                    if on_reject is not None:
+                        on_reject(line, row, str(e))
+        batch.clear()
+        lines.clear()
+
+    for line, record in iter_records(path):
+        report.read += 1
+        try:
+            if isinstance(record, Exception):
+                raise ValueError(str(record))
+            row = parse(record)
+        except ValueError as e:
+            report.reject(line, str(e))
+            if on_reject is not None:
+                on_reject(line, record, str(e))
+            continue
+
+        batch.append(row)
+        lines.append(line)
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+    return report.finish()
+
+
+def import_users(db, path, batch_size=1000, on_reject=None):
+    """Importa usuarios desde un archivo CSV o JSONL y devuelve un ImportReport"""
+    report = ImportReport()
+    user_ids = db.get_user_ids()
+    emails = db.get_user_emails()
+
+    def parse(record):
+        user_id = _text(record, 'id')
+        nombre = _text(record, 'nombre')
+        apellido = _text(record, 'apellido')
+        email = _text(record, 'email') or None
+        if not user_id or not nombre or not apellido:
+            raise ValueError("Los campos id, nombre y apellido son obligatorios")
+        if user_id in user_ids:
+            raise ValueError(f"El usuario {user_id} ya existe")
+        if email is not None and email in emails:
+            raise ValueError(f"El email {email} ya existe")
+        user_ids.add(user_id)
+        if email is not None:
+            emails.add(email)
+        return (user_id, nombre, apellido, email)
+
+    return _run(db, path, parse, db.insert_users_many, batch_size, on_reject, report)
+
+
+def import_links(db, path, batch_size=1000, on_reject=None):
+    """Importa links desde un archivo CSV o JSONL y devuelve un ImportReport"""
+    report = ImportReport()
+    user_ids = db.get_user_ids()
+    types = db.get_multimedia_types()
+    multimedia_ids = {t[0] for t in types}
+    multimedia_by_name = {t[1].casefold(): t[0] for t in types}
+    today = date.today().isoformat()
+    seen = set()  # (url_hash, usuario_id) de los links ya leídos del archivo
+
+    def parse(record):
+        user_id = _text(record, 'usuario_id')
+        if user_id not in user_ids:
+            raise ValueError(f"El usuario '{user_id}' no existe")
+
+        link = _text(record, 'link')
+        if not link:
+            raise ValueError("El campo link es obligatorio")
+        key = (url_hash(link), user_id)
+        if key in seen:
+            raise ValueError("Link repetido en el archivo")
+
+        multimedia = _text(record, 'multimedia_id')
+        if multimedia:
+            try:
+                multimedia_id = int(multimedia)
+            except ValueError:
+                raise ValueError(f"multimedia_id inválido: '{multimedia}'") from None
+        else:
+            multimedia_id = multimedia_by_name.get(_text(record, 'tipo').casefold())
+        if multimedia_id not in multimedia_ids:
+            raise ValueError("Tipo de multimedia inexistente")
+
+        fecha = _text(record, 'fecha') or today
+        try:
+            datetime.strptime(fecha, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"Fecha inválida: '{fecha}'") from None
+
+        tema = format_temas(_text(record, 'tema'))
+        if len(tema) > MAX_TEXT:
+            raise ValueError(f"Los temas ocupan más de {MAX_TEXT} caracteres")
+
+        seen.add(key)
+        return (user_id, link, multimedia_id, fecha,
+                _text(record, 'autor'), _text(record, 'descripcion'), tema)
+
+    def check_batch(batch):
+        keys = [(url_hash(row[1]), row[0]) for row in batch]
+        existing = db.get_link_ids_by_hash(sorted({key[0] for key in keys}))
+        return {i: f"El usuario ya tiene guardado ese link (ID {existing[key]})"
+                for i, key in enumerate(keys) if key in existing}
+
+    return _run(db, path, parse, db.insert_links_many, batch_size, on_reject, report,
+                check_batch=check_batch)
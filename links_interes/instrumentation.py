@@ -0,0 +1,223 @@
+"""Registro de tiempos de consultas SQL y de llenado de tablas.
+
+Cuando está activo, cada ``cursor.execute`` de ``Database`` y cada carga de
+filas en un Treeview dejan un ``Event`` en un buffer circular en memoria: la
+forma normalizada de la consulta (fingerprint), cuánto tardó el servidor en
+ejecutarla, cuánto tardó leer las filas y cuántas fueron. Las consultas más
+lentas que ``slow_ms`` se registran además con ``logging`` (logger
+``links_interes.sql``).
+
+Desactivado (lo normal), el costo es comprobar ``monitor.enabled`` una vez por
+transacción y por carga de filas.
+
+Se puede activar desde la pestaña Diagnóstico o con variables de entorno:
+    LINKS_PROFILE=1            registrar desde el inicio
+    LINKS_SLOW_QUERY_MS=200    umbral de consulta lenta, en milisegundos
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from functools import lru_cache
+
+# Inicio del proceso: main.py importa este módulo antes que ningún otro, para
+# medir el tiempo hasta la primera interacción
+PROCESS_STARTED = time.perf_counter()
+
+log = logging.getLogger("links_interes.sql")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_LIST = re.compile(r"\(\s*(?:(?:%s|\?)\s*,\s*)+(?:%s|\?)\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """Forma normalizada de una consulta, para agrupar las que sólo difieren en valores
+
+    Los literales pasan a ``?`` y las listas de parámetros de un ``IN`` a
+    ``(...)``, así que una consulta con 3 o con 300 ids es la misma.
+    """
+    sql = _SPACES.sub(" ", sql).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PARAM_LIST.sub("(...)", sql)
+    return sql.replace("%s", "?")
+
+
+class Event:
+    """Una consulta o una carga de filas en la interfaz"""
+
+    __slots__ = ("kind", "name", "timestamp", "execute_ms", "fetch_ms", "rows")
+
+    def __init__(self, kind, name, execute_ms, rows=0):
+        self.kind = kind          # 'sql' o 'render'
+        self.name = name          # fingerprint de la consulta o nombre de la vista
+        self.timestamp = time.time()
+        self.execute_ms = execute_ms
+        self.fetch_ms = 0.0
+        self.rows = rows
+
+    @property
+    def total_ms(self):
+        return self.execute_ms + self.fetch_ms
+
+    def as_dict(self):
+        return {"tipo": self.kind, "nombre": self.name, "hora": self.timestamp,
+                "ejecucion_ms": round(self.execute_ms, 3), "lectura_ms": round(self.fetch_ms, 3),
+                "filas": self.rows}
+
+
+class Monitor:
+    """Buffer circular de eventos con agregados por consulta"""
+
+    def __init__(self, capacity=5000, slow_ms=200.0, enabled=False):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.events = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def record(self, kind, name, execute_ms, rows=0):
+        event = Event(kind, name, execute_ms, rows)
+        with self._lock:
+            self.events.append(event)
+        return event
+
+    def check_slow(self, event):
+        if event.total_ms >= self.slow_ms:
+            log.warning("Consulta lenta (%.1f ms, %d filas): %s", event.total_ms, event.rows, event.name)
+
+    def wrap_cursor(self, cursor):
+        """Devuelve el cursor tal cual si el registro está desactivado"""
+        return TimedCursor(cursor, self) if self.enabled else cursor
+
+    def timed(self, name, rows=0):
+        """Contexto que mide una carga de filas en la interfaz (``rows`` filas)"""
+        if not self.enabled:
+            return nullcontext()
+        return _RenderTimer(self, name, rows)
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.events)
+
+    def summary(self):
+        """Agregados por (tipo, nombre), de mayor a menor tiempo total"""
+        groups = {}
+        for event in self.snapshot():
+            group = groups.setdefault((event.kind, event.name), {
+                "tipo": event.kind, "nombre": event.name, "veces": 0, "filas": 0,
+                "total_ms": 0.0, "ejecucion_ms": 0.0, "lectura_ms": 0.0, "max_ms": 0.0,
+            })
+            group["veces"] += 1
+            group["filas"] += event.rows
+            group["total_ms"] += event.total_ms
+            group["ejecucion_ms"] += event.execute_ms
+            group["lectura_ms"] += event.fetch_ms
+            group["max_ms"] = max(group["max_ms"], event.total_ms)
+        result = sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)
+        for group in result:
+            group["media_ms"] = group["total_ms"] / group["veces"]
+        return result
+
+    def dump(self, path, extra=None):
+        """Guarda los eventos y los agregados en un archivo JSON"""
+        data = {
+            "generado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "umbral_lento_ms": self.slow_ms,
+            "resumen": self.summary(),
+            "eventos": [event.as_dict() for event in self.snapshot()],
+        }
+        if extra:
+            data.update(extra)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+
+
+class TimedCursor:
+    """Envuelve un cursor y registra cada execute y la lectura de sus filas"""
+
+    def __init__(self, cursor, monitor):
+        self._cursor = cursor
+        self._monitor = monitor
+        self._event = None
+
+    def _run(self, method, sql, params):
+        started = time.perf_counter()
+        try:
+            return method(sql, params)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            # Las filas de un SELECT se cuentan al leerlas; las de una
+            # escritura, con rowcount
+            rows = 0
+            if getattr(self._cursor, 'description', None) is None:
+                rows = max(getattr(self._cursor, 'rowcount', 0) or 0, 0)
+            self._event = self._monitor.record('sql', fingerprint(sql), elapsed, rows)
+            self._monitor.check_slow(self._event)
+
+    def execute(self, sql, params=()):
+        return self._run(self._cursor.execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self._run(self._cursor.executemany, sql, seq_of_params)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        rows = method(*args)
+        event = self._event
+        if event is not None:
+            was_slow = event.total_ms >= self._monitor.slow_ms
+            event.fetch_ms += (time.perf_counter() - started) * 1000
+            if isinstance(rows, list):
+                event.rows += len(rows)
+            elif rows is not None:
+                event.rows += 1
+            if not was_slow:
+                self._monitor.check_slow(event)
+        return rows
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def fetchmany(self, size):
+        return self._fetch(self._cursor.fetchmany, size)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class _RenderTimer:
+    def __init__(self, monitor, name, rows):
+        self.monitor = monitor
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.monitor.record('render', self.name, (time.perf_counter() - self.started) * 1000,
+                            self.rows)
+
+
+monitor = Monitor(
+    enabled=os.environ.get("LINKS_PROFILE", "") not in ("", "0"),
+    slow_ms=float(os.environ.get("LINKS_SLOW_QUERY_MS", 200)),
+)
@@ -0,0 +1,253 @@
+"""Verificación de los links guardados: qué URLs responden y cuáles están rotas.
+
+Las URLs se consultan en paralelo con asyncio: primero con HEAD y, si el
+servidor no lo acepta, con GET (sólo se leen los encabezados). Se siguen hasta
+``MAX_REDIRECTS`` redirecciones; si hay más (un ciclo, por ejemplo) el link
+queda con error. Para no saturar a nadie hay un límite global de conexiones
+simultáneas, otro por host y un intervalo mínimo entre dos pedidos al mismo
+host.
+
+El resultado de cada link (estado, código HTTP, URL final, hora) se guarda en
+la tabla ``link_estado`` (migración 7). Un link verificado hace menos de
+``ttl`` segundos no se vuelve a consultar, y una URL repetida en varios links
+se consulta una sola vez.
+
+Sólo usa la biblioteca estándar, así que se puede probar contra un servidor
+local (``python -m http.server``):
+    python cli.py --sqlite prueba.db check-links --timeout 2
+"""
+import asyncio
+import ssl
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from urllib.parse import quote, urljoin, urlsplit
+
+USER_AGENT = "LinksDeInteres/1.0 (verificador de links)"
+MAX_REDIRECTS = 5
+REDIRECT_CODES = {301, 302, 303, 307, 308}
+# Códigos con los que algunos servidores rechazan HEAD aunque GET funcione
+HEAD_REJECTED = {400, 403, 405, 406, 501}
+# Errores del servidor o de límite de pedidos: el link puede volver a andar
+TEMPORARY_CODES = {408, 429}
+
+# Estados que se guardan en link_estado.estado
+OK = 'ok'
+REDIRECTED = 'redirigido'
+BROKEN = 'roto'
+ERROR = 'error'
+INVALID = 'invalido'
+
+
+@dataclass
+class LinkStatus:
+    """Resultado de verificar una URL"""
+    url: str
+    estado: str
+    codigo_http: int = None
+    url_final: str = None
+    detalle: str = None
+    ms: float = 0.0
+
+
+def classify(url, code, final_url):
+    if code in TEMPORARY_CODES or code >= 500:
+        return ERROR
+    if code >= 400:
+        return BROKEN
+    return OK if final_url == url else REDIRECTED
+
+
+class _HostLimit:
+    def __init__(self, concurrency):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.next_start = 0.0
+
+
+class LinkChecker:
+    """Consulta URLs en paralelo con límites por host y una caché con vencimiento"""
+
+    def __init__(self, concurrency=20, per_host=2, min_interval=0.2, timeout=10.0, ttl=3600.0):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.ttl = ttl
+        self._cache = {}  # url -> (vence, LinkStatus)
+        self._ssl = ssl.create_default_context()
+
+    def cached(self, url):
+        entry = self._cache.get(url)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def check_urls(self, urls):
+        """Verifica ``urls`` y devuelve {url: LinkStatus}; se puede llamar desde cualquier hilo"""
+        return asyncio.run(self.check_many(urls))
+
+    async def check_many(self, urls):
+        results = {}
+        pending = []
+        for url in dict.fromkeys(urls):
+            status = self.cached(url)
+            if status is not None:
+                results[url] = status
+            else:
+                pending.append(url)
+
+        # Los semáforos pertenecen al loop que los usa: se crean en cada corrida
+        self._global = asyncio.Semaphore(self.concurrency)
+        self._hosts = {}
+        for status in await asyncio.gather(*(self.check(url) for url in pending)):
+            self._cache[status.url] = (time.monotonic() + self.ttl, status)
+            results[status.url] = status
+        return results
+
+    async def check(self, url):
+        """Verifica una URL (HEAD y, si hace falta, GET) sin lanzar excepciones"""
+        started = time.perf_counter()
+        target = url.strip()
+        parts = urlsplit(target)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            return LinkStatus(url, INVALID, detalle="Sólo se verifican URLs http y https")
+        try:
+            code, final_url = await self._follow(target, 'HEAD')
+            if code in HEAD_REJECTED:
+                code, final_url = await self._follow(target, 'GET')
+        except asyncio.TimeoutError:
+            return LinkStatus(url, ERROR, detalle="Tiempo de espera agotado",
+                              ms=(time.perf_counter() - started) * 1000)
+        except (OSError, ValueError, UnicodeError) as e:
+            return LinkStatus(url, ERROR, detalle=(str(e) or type(e).__name__)[:255],
+                              ms=(time.perf_counter() - started) * 1000)
+        return LinkStatus(url, classify(target, code, final_url), code, final_url,
+                          ms=(time.perf_counter() - started) * 1000)
+
+    async def _follow(self, url, method):
+        """Devuelve (código, URL final) siguiendo las redirecciones"""
+        for _ in range(MAX_REDIRECTS + 1):
+            code, location = await self._request(method, url)
+            if code not in REDIRECT_CODES or not location:
+                return code, url
+            url = urljoin(url, location)
+        raise ValueError(f"Demasiadas redirecciones (más de {MAX_REDIRECTS})")
+
+    @asynccontextmanager
+    async def _slot(self, host):
+        limit = self._hosts.get(host)
+        if limit is None:
+            limit = self._hosts[host] = _HostLimit(self.per_host)
+        async with self._global, limit.semaphore:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start = max(now, limit.next_start)
+            limit.next_start = start + self.min_interval
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+    async def _request(self, method, url):
+        """Un pedido HTTP/1.1; devuelve (código, encabezado Location)"""
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"Redirección a un esquema no soportado: {parts.scheme}")
+        if not parts.hostname:
+            raise ValueError(f"Redirección a una URL sin host: {url}")
+        https = parts.scheme == 'https'
+        host = parts.hostname.encode('idna').decode('ascii')
+        port = parts.port or (443 if https else 80)
+        target = quote(parts.path or '/', safe="/%:@!$&'()*+,;=~")
+        if parts.query:
+            target += '?' + quote(parts.query, safe="/%:@!$&'()*+,;=~?")
+        host_header = host if parts.port is None else f"{host}:{parts.port}"
+
+        # El tiempo de espera cuenta desde que se obtiene el turno para el host
+        async with self._slot(host):
+            return await asyncio.wait_for(
+                self._exchange(method, host, port, https, target, host_header), self.timeout)
+
+    async def _exchange(self, method, host, port, https, target, host_header):
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=self._ssl if https else None,
+            server_hostname=host if https else None)
+        try:
+            writer.write(
+                f"{method} {target} HTTP/1.1\r\nHost: {host_header}\r\n"
+                f"User-Agent: {USER_AGENT}\r\nAccept: */*\r\nConnection: close\r\n\r\n"
+                .encode('ascii'))
+            await writer.drain()
+            status_line = await reader.readline()
+            fields = status_line.decode('latin-1').split(None, 2)
+            if len(fields) < 2 or not fields[0].startswith('HTTP/') or not fields[1].isdigit():
+                raise ValueError("Respuesta HTTP inválida")
+            location = None
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.strip().lower() == 'location':
+                    location = value.strip()
+            return int(fields[1]), location
+        finally:
+            writer.close()
+
+
+@dataclass
+class CheckReport:
+    """Resumen de una verificación"""
+    checked: int = 0
+    ok: int = 0
+    redirected: int = 0
+    broken: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+
+    def add(self, estado):
+        self.checked += 1
+        if estado == OK:
+            self.ok += 1
+        elif estado == REDIRECTED:
+            self.redirected += 1
+        elif estado == BROKEN:
+            self.broken += 1
+        else:
+            self.errors += 1
+
+    def summary(self):
+        return (f"Links verificados: {self.checked}\nFuncionan: {self.ok}\n"
+                f"Redirigidos: {self.redirected}\nRotos: {self.broken}\n"
+                f"Con error o inválidos: {self.errors}\nTiempo: {self.seconds:.1f} s")
+
+
+def check_links(db, filters=None, checker=None, force=False, batch_size=200, progress=None):
+    """Verifica los links que cumplen ``filters`` y guarda el resultado; devuelve un CheckReport
+
+    Se saltean los verificados hace menos de ``checker.ttl`` segundos, salvo
+    con ``force``. Los resultados se guardan cada ``batch_size`` links.
+    """
+    checker = checker or LinkChecker()
+    started = time.perf_counter()
+    checked_before = None
+    if not force:
+        checked_before = (datetime.now() - timedelta(seconds=checker.ttl)).strftime("%Y-%m-%d %H:%M:%S")
+    links = db.get_links_to_check(filters, checked_before)
+
+    report = CheckReport()
+    for i in range(0, len(links), batch_size):
+        batch = links[i:i + batch_size]
+        results = checker.check_urls(link for _, link in batch)
+        revisado = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = []
+        for link_id, link in batch:
+            status = results[link]
+            rows.append((link_id, status.estado, status.codigo_http, status.url_final,
+                         status.detalle, revisado))
+            report.add(status.estado)
+        db.save_link_statuses(rows)
+        if progress is not None:
+            progress(report.checked, len(links))
+    report.seconds = time.perf_counter() - started
+    return report
@@ -1,116 +1,209 @@
+# Primero: instrumentation toma el momento de inicio del proceso, antes de
+# cargar tkinter y los demás módulos, para medir el tiempo hasta la primera
+# interacción
+from instrumentation import PROCESS_STARTED, monitor
+
+import logging
+import os
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
-# Importamos mysql.connector en lugar de sqlite3
-import mysql.connector
-from mysql.connector import Error, IntegrityError  # <-- Para manejar excepciones específicas
-# import sqlite3
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
 
+from cache import LRUCache
+from changes import ChangeFeed
+from database import connect
+from estadisticas import rebuild_stats
+from exporter import export_links
+from filters import LinkFilter, LinkSort
+from importer import import_links, import_users
+from linkcheck import check_links
+from migrations import migrate
+from replica import ReplicaDatabase
+from service import LinksService, ServiceError, VersionConflictError
+from tasks import TkExecutor
+from widgets import ComboIndex, PagedTreeview, SearchableCombobox, TreeviewSync
+
+log = logging.getLogger("links_interes.inicio")
+
+# Cada cuánto se consulta el registro de cambios de otros clientes
+CHANGE_POLL_MS = 2000
+
+# Tiempo máximo aceptable desde que arranca el proceso hasta que la lista de
+# usuarios está en pantalla; si se supera se avisa en el log
+STARTUP_BUDGET_MS = float(os.environ.get("LINKS_STARTUP_BUDGET_MS", 1500))
+
+
+def link_version(record):
+    """Versión de un registro completo de link, para no pisar en la caché uno más nuevo"""
+    return record[11]
+
+
 class LinksDeInteresApp:
-    def __init__(self, root):
+    """Ventana principal.
+
+    El arranque es escalonado para que la ventana aparezca enseguida: primero
+    se construyen los widgets (la pestaña de links, recién cuando se elige por
+    primera vez), después se abre la base en segundo plano y al final se cargan
+    los datos, también en segundo plano.
+    """
+
+    def __init__(self, root, db=None, started=None):
         self.root = root
         self.root.title("Sistema de Links de Interés")
         self.root.geometry("800x600")
+        self.started = PROCESS_STARTED if started is None else started
+        self.startup_ms = None
 
-        # Inicializar la base de datos
-        self.init_database()
+        # Las consultas se ejecutan en segundo plano para no congelar la ventana
+        self.executor = TkExecutor(self.root, on_busy=self.set_busy)
 
-        # Crear interfaz gráfica
-        self.create_widgets()
+        # Registros completos de links ya leídos, por links.id
+        self.link_cache = LRUCache(maxsize=5000)
 
-        # Cargar datos iniciales
-        self.load_data()
+        # Índices de los selectores; se llenan aunque la pestaña de links no exista todavía
+        self.user_index = ComboIndex(self.user_label,
+                                     terms=lambda user: (user[0], f"{user[1]} {user[2]}", user[2]))
+        self.multimedia_index = ComboIndex(lambda t: f"{t[0]} - {t[1]}")
+        self.links_filter = LinkFilter()
+        self.links_sort = LinkSort()
+        self.links_view = None
 
-    def init_database(self):
-        """        Inicializa la conexión a la base de datos MySQL y crea las tablas si no existen."""
-        # self.conn = sqlite3.connect('links_interes.db')
+        # Versiones de la fila cargada en cada formulario (control de concurrencia optimista)
+        self.user_version = None
+        self.link_version = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
-        try:
-            # 2) Conexión a MySQL
-            self.conn = mysql.connector.connect(
-                host="localhost",  # <-- Ajusta según tu entorno
-                user="root",  # <-- Cambia por tu usuario de MySQL
-                password="",  # <-- Cambia por tu contraseña (si tienes)
-                database="links_db"  # <-- Debe existir previamente
-            )
-            self.cursor = self.conn.cursor()
-
-        except Error as e:
-            messagebox.showerror("Error de conexión", f"No se pudo conectar a MySQL: {e}")
-            return
+        # Base de datos: se abre en segundo plano (ver open_database)
+        self.db = db
+        self.service = None
+        self.changes = None
+
+        # Crear interfaz gráfica
+        self.create_widgets()
+        self.startup_stage("ventana")
+
+        self.start_database()
+
+    def startup_stage(self, name):
+        """Registra cuánto tardó el arranque hasta esta etapa (pestaña Diagnóstico)"""
+        if monitor.enabled:
+            monitor.record('inicio', name, (time.perf_counter() - self.started) * 1000)
+
+    def start_database(self):
+        self.splash_label.configure(text="Abriendo la base de datos...")
+        self.retry_button.pack_forget()
+        self.run_db(self.open_database, on_success=self.database_ready,
+                    on_error=self.database_failed)
+
+    def open_database(self):
+        """Abre la base configurada (MySQL o SQLite) y aplica las migraciones pendientes.
+
+        Se ejecuta en un hilo de trabajo. Con el esquema al día, ``migrate``
+        hace una sola consulta.
+        """
+        db = self.db if self.db is not None else connect()
+        migrate(db)
+        # Se toma la secuencia antes de la carga inicial: lo que cambie
+        # mientras tanto se vuelve a aplicar, sin perder nada
+        return db, LinksService(db), ChangeFeed(db)
+
+    def database_ready(self, result):
+        self.db, self.service, self.changes = result
+        if isinstance(self.db, ReplicaDatabase):
+            self.db.start_sync()
+        self.root.title(f"Sistema de Links de Interés - {self.db.describe()}")
+        self.startup_stage("base de datos")
+
+        self.splash.pack_forget()
+        self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        self.load_data()
 
-        #  Crear tablas en MySQL (adaptadas de SQLite a MySQL)
-        # - Usamos tipos VARCHAR en lugar de TEXT para llaves primarias o foráneas.
-        # - Cambiamos INTEGER PRIMARY KEY AUTOINCREMENT a INT AUTO_INCREMENT.
-        # - Añadimos ENGINE=InnoDB para soportar claves foráneas.
-        # - MySQL no entiende AUTOINCREMENT como en SQLite, se usa AUTO_INCREMENT.
-
-        # Tabla usuario
-        self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS usuario (
-                    id VARCHAR(30) NOT NULL,
-                    nombre VARCHAR(100) NOT NULL,
-                    apellido VARCHAR(100) NOT NULL,
-                    email VARCHAR(100) UNIQUE,
-                    PRIMARY KEY (id)
-                ) ENGINE=InnoDB
-            ''')
-
-        # Tabla multimedia
-        self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS multimedia (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    tipo VARCHAR(50) NOT NULL
-                ) ENGINE=InnoDB
-            ''')
-
-        # Tabla links
-        # Nota: Para la columna fecha, usamos DATE con DEFAULT CURDATE()
-        # (si tu versión de MySQL lo soporta).
-        # Si da error de sintaxis, podrías dejarla como DATE sin default
-        # y asignar la fecha en tu código Python.
-        self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS links (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    usuario_id VARCHAR(30) NOT NULL,
-                    link TEXT NOT NULL,
-                    multimedia_id INT NOT NULL,
-                    fecha DATE DEFAULT (CURDATE()),
-                    autor VARCHAR(100),
-                    descripcion TEXT,
-                    tema VARCHAR(100),
-                    FOREIGN KEY (usuario_id) REFERENCES usuario(id),
-                    FOREIGN KEY (multimedia_id) REFERENCES multimedia(id)
-                ) ENGINE=InnoDB
-            ''')
-
-        # Verificar si existen tipos de multimedia, si no, agregar tipos por defecto
-        self.cursor.execute("SELECT COUNT(*) FROM multimedia")
-        count = self.cursor.fetchone()[0]
-        if count == 0:
-            multimedia_types = ['Audio', 'Video', 'Imagen', 'Documento', 'Otro']
-            for tipo in multimedia_types:
-                self.cursor.execute("INSERT INTO multimedia (tipo) VALUES (%s)", (tipo,))
-
-        self.conn.commit()
+    def database_failed(self, e):
+        self.splash_label.configure(text=f"No se pudo abrir la base de datos:\n{e}")
+        self.retry_button.pack(pady=10)
+        messagebox.showerror("Error de conexión", f"No se pudo abrir la base de datos: {e}")
+
+    def finish_startup(self):
+        """Primera interacción posible: la lista de usuarios ya está en pantalla"""
+        self.startup_ms = (time.perf_counter() - self.started) * 1000
+        self.startup_stage("primera interacción")
+        self.idle_status = f"Listo en {self.startup_ms / 1000:.2f} s"
+        self.status_label.configure(text=self.idle_status)
+        if self.startup_ms > STARTUP_BUDGET_MS:
+            log.warning("El inicio tardó %.0f ms (presupuesto: %.0f ms)",
+                        self.startup_ms, STARTUP_BUDGET_MS)
+
+    def on_close(self):
+        """Detiene los hilos y cierra las conexiones antes de salir"""
+        if getattr(self, 'change_poll', None) is not None:
+            self.root.after_cancel(self.change_poll)
+        self.executor.shutdown()
+        if getattr(self, 'db', None) is not None:
+            self.db.close()
+        self.root.destroy()
 
     def create_widgets(self):
         """Crea todos los widgets de la interfaz gráfica"""
-        notebook = ttk.Notebook(self.root)
-        notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        # Barra de estado con el indicador de carga
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(side=tk.BOTTOM, fill='x', padx=10, pady=(0, 5))
+        self.idle_status = ""
+        self.status_label = ttk.Label(status_frame, text="")
+        self.status_label.pack(side=tk.LEFT)
+        self.progress = ttk.Progressbar(status_frame, mode='indeterminate', length=120)
+        self.progress.pack(side=tk.RIGHT)
+        # Estado de la sincronización con el servidor (sólo con una réplica local)
+        self.sync_label = ttk.Label(status_frame, text="")
+        self.sync_label.pack(side=tk.RIGHT, padx=10)
+
+        # Mientras se abre la base se muestra sólo este aviso
+        self.splash = ttk.Frame(self.root)
+        self.splash.pack(fill='both', expand=True)
+        self.splash_label = ttk.Label(self.splash, text="", anchor='center', justify='center')
+        self.splash_label.pack(expand=True)
+        self.retry_button = ttk.Button(self.splash, text="Reintentar", command=self.start_database)
+
+        # Se muestra cuando la base está abierta (database_ready)
+        self.notebook = ttk.Notebook(self.root)
 
         # Crear pestañas
-        self.tab_usuarios = ttk.Frame(notebook)
-        self.tab_links = ttk.Frame(notebook)
+        self.tab_usuarios = ttk.Frame(self.notebook)
+        self.tab_links = ttk.Frame(self.notebook)
+        self.tab_estadisticas = ttk.Frame(self.notebook)
+        self.tab_diagnostico = ttk.Frame(self.notebook)
 
-        notebook.add(self.tab_usuarios, text="Gestión de Usuarios")
-        notebook.add(self.tab_links, text="Gestión de Links")
+        self.notebook.add(self.tab_usuarios, text="Gestión de Usuarios")
+        self.notebook.add(self.tab_links, text="Gestión de Links")
+        self.notebook.add(self.tab_estadisticas, text="Estadísticas")
+        self.notebook.add(self.tab_diagnostico, text="Diagnóstico")
 
         # Configurar pestaña de Usuarios
         self.setup_usuarios_tab()
 
-        # Configurar pestaña de Links
-        self.setup_links_tab()
+        # La pestaña de Links se construye la primera vez que se elige
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+
+        # Configurar pestaña de Estadísticas (se carga al elegirla)
+        self.setup_estadisticas_tab()
+
+        # Configurar pestaña de Diagnóstico
+        self.setup_diagnostico_tab()
+
+    def on_tab_changed(self, event):
+        tab = self.notebook.nametowidget(self.notebook.select())
+        if self.links_view is None and tab is self.tab_links:
+            self.build_links_tab()
+        elif tab is self.tab_estadisticas:
+            self.load_stats()
+
+    def build_links_tab(self):
+        """Construye la pestaña de links y carga su primera página"""
+        with monitor.timed("inicio: pestaña de links"):
+            self.setup_links_tab()
+        self.refresh_user_combos()
+        self.show_multimedia_combos()
+        self.load_links()
 
     def setup_usuarios_tab(self):
         """Configura la pestaña de gestión de usuarios"""
@@ -141,14 +234,18 @@ class LinksDeInteresApp:
         ttk.Button(buttons_frame, text="Guardar", command=self.save_user).pack(side=tk.LEFT, padx=5)
         ttk.Button(buttons_frame, text="Actualizar", command=self.update_user).pack(side=tk.LEFT, padx=5)
         ttk.Button(buttons_frame, text="Eliminar", command=self.delete_user).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Eliminar selección",
+                   command=self.delete_selected_users).pack(side=tk.LEFT, padx=5)
         ttk.Button(buttons_frame, text="Limpiar", command=self.clear_user_form).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Importar...", command=self.import_users).pack(side=tk.LEFT, padx=5)
 
         # Tabla de usuarios
         table_frame = ttk.LabelFrame(self.tab_usuarios, text="Lista de Usuarios")
         table_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
         columns = ('id', 'nombre', 'apellido', 'email')
-        self.users_table = ttk.Treeview(table_frame, columns=columns, show='headings')
+        # Con Ctrl o Mayúsculas se eligen varias filas para eliminarlas juntas
+        self.users_table = ttk.Treeview(table_frame, columns=columns, show='headings', selectmode='extended')
 
         # Definir encabezados
         self.users_table.heading('id', text='Cédula/ID')
@@ -163,6 +260,7 @@ class LinksDeInteresApp:
         self.users_table.column('email', width=200)
 
         self.users_table.pack(fill="both", expand=True)
+        self.users_rows = TreeviewSync(self.users_table)
 
         # Vincular evento de selección
         self.users_table.bind('<<TreeviewSelect>>', self.on_user_select)
@@ -172,6 +270,102 @@ class LinksDeInteresApp:
         self.users_table.configure(yscroll=scrollbar.set)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
+    def setup_estadisticas_tab(self):
+        """Configura la pestaña con las cantidades de links por usuario, tipo y mes"""
+        options_frame = ttk.Frame(self.tab_estadisticas)
+        options_frame.pack(fill="x", padx=10, pady=10)
+        self.stats_label = ttk.Label(options_frame, text="")
+        self.stats_label.pack(side=tk.LEFT)
+        ttk.Button(options_frame, text="Recalcular", command=self.rebuild_stats).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(options_frame, text="Actualizar", command=self.load_stats).pack(side=tk.RIGHT, padx=5)
+
+        tables_frame = ttk.Frame(self.tab_estadisticas)
+        tables_frame.pack(fill="both", expand=True, padx=5, pady=(0, 10))
+        self.stats_rows = {}
+        for name, title, columns in (
+            ('usuario', "Por usuario", (('id', 'ID', 80), ('nombre', 'Nombre', 150), ('links', 'Links', 60))),
+            ('tipo', "Por tipo de multimedia", (('id', 'ID', 40), ('tipo', 'Tipo', 100), ('links', 'Links', 60))),
+            ('mes', "Por mes", (('mes', 'Mes', 80), ('links', 'Links', 60))),
+        ):
+            frame = ttk.LabelFrame(tables_frame, text=title)
+            frame.pack(side=tk.LEFT, fill="both", expand=True, padx=5)
+            table = ttk.Treeview(frame, columns=[c[0] for c in columns], show='headings')
+            for column, text, width in columns:
+                table.heading(column, text=text)
+                table.column(column, width=width)
+            table.pack(side=tk.LEFT, fill="both", expand=True)
+            scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=table.yview)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            table.configure(yscrollcommand=scrollbar.set)
+            self.stats_rows[name] = TreeviewSync(table)
+
+    def load_stats(self):
+        """Lee las tablas de resumen (no cuenta sobre links, ver estadisticas.py)"""
+        if self.service is None:
+            return
+        self.run_db(self.service.statistics, key='stats', on_success=self.show_stats,
+                    error_message="Error al cargar estadísticas")
+
+    def show_stats(self, stats):
+        self.stats_label.configure(text=f"Total de links: {stats.total} "
+                                        f"(leído en {stats.ms:.1f} ms)")
+        self.stats_rows['usuario'].sync([(user_id, f"{nombre} {apellido}", cantidad)
+                                         for user_id, nombre, apellido, cantidad in stats.by_user])
+        self.stats_rows['tipo'].sync(stats.by_type)
+        self.stats_rows['mes'].sync([(mes or "(sin fecha)", cantidad) for mes, cantidad in stats.by_month])
+
+    def rebuild_stats(self):
+        """Vuelve a contar los resúmenes desde la tabla links, por si quedaron desparejos"""
+        if self.db is None:
+            return
+
+        def done(seconds):
+            messagebox.showinfo("Estadísticas", f"Estadísticas recalculadas en {seconds:.1f} s")
+            self.load_stats()
+            self.load_temas()
+
+        self.run_db(rebuild_stats, self.db, on_success=done, error_message="Error al recalcular")
+
+    def setup_diagnostico_tab(self):
+        """Configura la pestaña con los tiempos de consultas y de carga de tablas"""
+        options_frame = ttk.LabelFrame(self.tab_diagnostico, text="Registro de tiempos")
+        options_frame.pack(fill="x", padx=10, pady=10)
+
+        self.profile_var = tk.BooleanVar(value=monitor.enabled)
+        ttk.Checkbutton(options_frame, text="Registrar consultas y cargas de tablas",
+                        variable=self.profile_var, command=self.toggle_profiling).grid(
+            row=0, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+
+        ttk.Label(options_frame, text="Consulta lenta desde (ms):").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        self.slow_ms_entry = ttk.Entry(options_frame, width=10)
+        self.slow_ms_entry.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+        self.slow_ms_entry.insert(0, f"{monitor.slow_ms:g}")
+
+        buttons_frame = ttk.Frame(options_frame)
+        buttons_frame.grid(row=2, column=0, columnspan=2, pady=5, sticky="w")
+        ttk.Button(buttons_frame, text="Actualizar", command=self.show_diagnostics).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Limpiar", command=self.clear_diagnostics).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Guardar...", command=self.dump_diagnostics).pack(side=tk.LEFT, padx=5)
+
+        self.cache_stats_label = ttk.Label(self.tab_diagnostico, text="")
+        self.cache_stats_label.pack(fill="x", padx=10)
+
+        table_frame = ttk.LabelFrame(self.tab_diagnostico, text="Tiempo total por consulta o tabla")
+        table_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # La primera columna (oculta) es la clave de la fila: tipo y nombre
+        columns = ('clave', 'tipo', 'veces', 'total_ms', 'media_ms', 'max_ms', 'lectura_ms', 'filas', 'nombre')
+        self.diagnostics_table = ttk.Treeview(table_frame, columns=columns, displaycolumns=columns[1:],
+                                              show='headings')
+        for column, text, width in (('tipo', 'Tipo', 50), ('veces', 'Veces', 50),
+                                    ('total_ms', 'Total ms', 70), ('media_ms', 'Media ms', 70),
+                                    ('max_ms', 'Máx ms', 70), ('lectura_ms', 'Lectura ms', 70),
+                                    ('filas', 'Filas', 60), ('nombre', 'Consulta / tabla', 400)):
+            self.diagnostics_table.heading(column, text=text)
+            self.diagnostics_table.column(column, width=width)
+        self.diagnostics_table.pack(fill="both", expand=True)
+        self.diagnostics_rows = TreeviewSync(self.diagnostics_table)
+
     def setup_links_tab(self):
         """Configura la pestaña de gestión de links"""
         # Formulario de link
@@ -180,7 +374,8 @@ class LinksDeInteresApp:
 
         # Selección de usuario
         ttk.Label(form_frame, text="Usuario:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
-        self.user_combo = ttk.Combobox(form_frame, width=30, state="readonly")
+        # Se escribe parte del ID, nombre o apellido y se filtran las opciones
+        self.user_combo = SearchableCombobox(form_frame, self.user_index, width=30)
         self.user_combo.grid(row=0, column=1, padx=5, pady=5)
 
         # Link
@@ -209,10 +404,11 @@ class LinksDeInteresApp:
         self.descripcion_text = tk.Text(form_frame, width=50, height=3)
         self.descripcion_text.grid(row=4, column=1, columnspan=3, padx=5, pady=5, sticky="ew")
 
-        # Tema
-        ttk.Label(form_frame, text="Tema:").grid(row=5, column=0, padx=5, pady=5, sticky="w")
+        # Temas, separados por comas
+        ttk.Label(form_frame, text="Temas:").grid(row=5, column=0, padx=5, pady=5, sticky="w")
         self.tema_entry = ttk.Entry(form_frame, width=30)
         self.tema_entry.grid(row=5, column=1, padx=5, pady=5)
+        ttk.Label(form_frame, text="(separados por comas)").grid(row=5, column=2, padx=5, pady=5, sticky="w")
 
         # Campo oculto para ID en actualizaciones
         self.link_id_var = tk.StringVar()
@@ -225,22 +421,115 @@ class LinksDeInteresApp:
         ttk.Button(buttons_frame, text="Actualizar", command=self.update_link).pack(side=tk.LEFT, padx=5)
         ttk.Button(buttons_frame, text="Eliminar", command=self.delete_link).pack(side=tk.LEFT, padx=5)
         ttk.Button(buttons_frame, text="Limpiar", command=self.clear_link_form).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Importar...", command=self.import_links).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Exportar...", command=self.export_links).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Verificar links", command=self.check_links).pack(side=tk.LEFT, padx=5)
+
+        # Barra de filtros: se traducen a un WHERE en la consulta de links
+        filter_frame = ttk.LabelFrame(self.tab_links, text="Filtros")
+        filter_frame.pack(fill="x", padx=10, pady=(0, 5))
+
+        ttk.Label(filter_frame, text="Usuario:").grid(row=0, column=0, padx=5, pady=2, sticky="w")
+        self.filter_user_combo = SearchableCombobox(filter_frame, self.user_index, width=25)
+        self.filter_user_combo.grid(row=0, column=1, padx=5, pady=2)
+
+        ttk.Label(filter_frame, text="Tipo:").grid(row=0, column=2, padx=5, pady=2, sticky="w")
+        self.filter_multimedia_combo = ttk.Combobox(filter_frame, width=15, state="readonly")
+        self.filter_multimedia_combo.grid(row=0, column=3, padx=5, pady=2)
+
+        ttk.Label(filter_frame, text="Tema:").grid(row=0, column=4, padx=5, pady=2, sticky="w")
+        self.filter_tema_entry = ttk.Entry(filter_frame, width=15)
+        self.filter_tema_entry.grid(row=0, column=5, padx=5, pady=2)
+
+        ttk.Label(filter_frame, text="Desde:").grid(row=1, column=0, padx=5, pady=2, sticky="w")
+        self.filter_desde_entry = ttk.Entry(filter_frame, width=12)
+        self.filter_desde_entry.grid(row=1, column=1, padx=5, pady=2, sticky="w")
+
+        ttk.Label(filter_frame, text="Hasta:").grid(row=1, column=2, padx=5, pady=2, sticky="w")
+        self.filter_hasta_entry = ttk.Entry(filter_frame, width=12)
+        self.filter_hasta_entry.grid(row=1, column=3, padx=5, pady=2, sticky="w")
+
+        ttk.Label(filter_frame, text="Buscar:").grid(row=1, column=4, padx=5, pady=2, sticky="w")
+        self.filter_text_entry = ttk.Entry(filter_frame, width=25)
+        self.filter_text_entry.grid(row=1, column=5, padx=5, pady=2)
+
+        filter_buttons = ttk.Frame(filter_frame)
+        filter_buttons.grid(row=0, column=6, rowspan=2, padx=5)
+        ttk.Button(filter_buttons, text="Filtrar", command=self.apply_link_filters).pack(fill="x", pady=1)
+        ttk.Button(filter_buttons, text="Quitar filtros", command=self.clear_link_filters).pack(fill="x", pady=1)
+
+        # Los links archivados (archivo.py) sólo se consultan si se pide
+        self.include_archive_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(filter_frame, text="Incluir archivo", variable=self.include_archive_var,
+                        command=self.apply_link_filters).grid(row=0, column=7, rowspan=2, padx=5)
+
+        for entry in (self.filter_tema_entry, self.filter_desde_entry,
+                      self.filter_hasta_entry, self.filter_text_entry):
+            entry.bind('<Return>', lambda event: self.apply_link_filters())
+
+        # Acciones sobre las filas elegidas en la tabla (Ctrl o Mayúsculas
+        # para elegir varias): cada una es una sola transacción
+        bulk_frame = ttk.LabelFrame(self.tab_links, text="Links seleccionados")
+        bulk_frame.pack(fill="x", padx=10, pady=(0, 5))
+
+        self.selection_label = ttk.Label(bulk_frame, text="Ninguno", width=16)
+        self.selection_label.grid(row=0, column=0, rowspan=2, padx=5, pady=2, sticky="w")
+
+        ttk.Label(bulk_frame, text="Tipo:").grid(row=0, column=1, padx=5, pady=2, sticky="w")
+        self.bulk_multimedia_combo = ttk.Combobox(bulk_frame, width=15, state="readonly")
+        self.bulk_multimedia_combo.grid(row=0, column=2, padx=5, pady=2)
+        ttk.Button(bulk_frame, text="Cambiar tipo",
+                   command=self.change_selected_multimedia).grid(row=0, column=3, padx=5, pady=2, sticky="ew")
+
+        ttk.Label(bulk_frame, text="Usuario:").grid(row=0, column=4, padx=5, pady=2, sticky="w")
+        self.bulk_user_combo = SearchableCombobox(bulk_frame, self.user_index, width=25)
+        self.bulk_user_combo.grid(row=0, column=5, padx=5, pady=2)
+        ttk.Button(bulk_frame, text="Cambiar usuario",
+                   command=self.change_selected_owner).grid(row=0, column=6, padx=5, pady=2, sticky="ew")
+
+        ttk.Label(bulk_frame, text="Temas:").grid(row=1, column=1, padx=5, pady=2, sticky="w")
+        self.bulk_tema_entry = ttk.Entry(bulk_frame, width=18)
+        self.bulk_tema_entry.grid(row=1, column=2, padx=5, pady=2)
+        tema_buttons = ttk.Frame(bulk_frame)
+        tema_buttons.grid(row=1, column=3, columnspan=3, padx=5, pady=2, sticky="w")
+        ttk.Button(tema_buttons, text="Agregar temas",
+                   command=lambda: self.edit_selected_temas(add=True)).pack(side=tk.LEFT)
+        ttk.Button(tema_buttons, text="Quitar temas",
+                   command=lambda: self.edit_selected_temas(add=False)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(bulk_frame, text="Eliminar selección",
+                   command=self.delete_selected_links).grid(row=1, column=6, padx=5, pady=2, sticky="ew")
+
+        # Lista de temas con la cantidad de links de cada uno: un clic filtra
+        temas_frame = ttk.LabelFrame(self.tab_links, text="Temas")
+        temas_frame.pack(side=tk.LEFT, fill="y", padx=(10, 0), pady=10)
+        self.temas_list = tk.Listbox(temas_frame, width=24, exportselection=False)
+        self.temas_list.pack(side=tk.LEFT, fill="y")
+        temas_scrollbar = ttk.Scrollbar(temas_frame, orient=tk.VERTICAL, command=self.temas_list.yview)
+        temas_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.temas_list.configure(yscrollcommand=temas_scrollbar.set)
+        self.temas_list.bind('<<ListboxSelect>>', self.on_tema_select)
+        self.temas = []  # (id, nombre, cantidad) de cada fila de la lista, después de "(Todos)"
 
         # Tabla de links
         table_frame = ttk.LabelFrame(self.tab_links, text="Lista de Links")
         table_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-        columns = ('id', 'usuario', 'link', 'multimedia', 'fecha', 'autor', 'tema')
-        self.links_table = ttk.Treeview(table_frame, columns=columns, show='headings')
-
-        # Definir encabezados
-        self.links_table.heading('id', text='ID')
-        self.links_table.heading('usuario', text='Usuario')
-        self.links_table.heading('link', text='Link')
-        self.links_table.heading('multimedia', text='Tipo')
-        self.links_table.heading('fecha', text='Fecha')
-        self.links_table.heading('autor', text='Autor')
-        self.links_table.heading('tema', text='Tema')
+        columns = ('id', 'usuario', 'link', 'multimedia', 'fecha', 'autor', 'tema', 'estado')
+        self.links_table = ttk.Treeview(table_frame, columns=columns, show='headings', selectmode='extended')
+
+        # Definir encabezados (un clic ordena por esa columna)
+        self.link_headings = {
+            'id': 'ID',
+            'usuario': 'Usuario',
+            'link': 'Link',
+            'multimedia': 'Tipo',
+            'fecha': 'Fecha',
+            'autor': 'Autor',
+            'tema': 'Tema',
+            'estado': 'Estado',
+        }
+        for column, text in self.link_headings.items():
+            self.links_table.heading(column, text=text, command=lambda c=column: self.sort_links(c))
 
         # Definir columnas
         self.links_table.column('id', width=50)
@@ -250,127 +539,356 @@ class LinksDeInteresApp:
         self.links_table.column('fecha', width=80)
         self.links_table.column('autor', width=100)
         self.links_table.column('tema', width=100)
+        self.links_table.column('estado', width=90)
 
         self.links_table.pack(fill="both", expand=True)
 
         # Vincular evento de selección
         self.links_table.bind('<<TreeviewSelect>>', self.on_link_select)
 
+        # La tabla de links puede ser muy grande: sólo mantenemos en el
+        # Treeview una ventana de páginas que se va pidiendo al desplazarse.
+        self.links_view = PagedTreeview(self.links_table, self.fetch_links_page, page_size=200,
+                                        executor=self.executor, on_error=self.show_load_error,
+                                        name="links")
+
         # Añadir barra de desplazamiento
-        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.links_table.yview)
-        self.links_table.configure(yscroll=scrollbar.set)
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL)
+        self.links_view.attach_scrollbar(scrollbar)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
     def load_data(self):
-        """Carga todos los datos de la base de datos"""
+        """Carga los datos de las pestañas construidas y empieza a seguir los cambios"""
         self.load_users()
         self.load_multimedia_types()
         self.load_links()
+        self.schedule_change_poll()
+
+    def run_db(self, fn, *args, on_success=None, on_error=None, error_message="Error", key=None,
+               quiet=False, **kwargs):
+        """Ejecuta una operación de base de datos sin bloquear la ventana
+
+        ``on_success`` recibe el resultado en el hilo de Tk. Si no se indica
+        ``on_error``, los errores se muestran con ``error_message``.
+        """
+        if on_error is None:
+            def on_error(e):
+                self.report_error(e, error_message)
+
+        return self.executor.submit(fn, *args, on_success=on_success, on_error=on_error, key=key,
+                                    quiet=quiet, **kwargs)
+
+    @staticmethod
+    def report_error(e, error_message="Error"):
+        if isinstance(e, ServiceError):
+            # Errores de validación o de datos: el mensaje ya es para el usuario
+            messagebox.showerror("Error", str(e))
+        else:
+            messagebox.showerror("Error", f"{error_message}: {str(e)}")
+
+    def set_busy(self, busy):
+        """Muestra u oculta el indicador de carga"""
+        if busy:
+            self.status_label.configure(text="Cargando...")
+            self.progress.start(10)
+        else:
+            self.status_label.configure(text=self.idle_status)
+            self.progress.stop()
 
     def load_users(self):
         """Carga usuarios desde la base de datos a la tabla y combo"""
-        # Limpiar la tabla
-        for item in self.users_table.get_children():
-            self.users_table.delete(item)
-
-        # Obtener usuarios de la BD
-        self.cursor.execute("SELECT id, nombre, apellido, email FROM usuario")
-        users = self.cursor.fetchall()
-
-        # Insertar en tabla
-        for user in users:
-            self.users_table.insert('', 'end', values=user)
+        self.run_db(self.service.list_users, key='users', on_success=self.show_users,
+                    error_message="Error al cargar usuarios")
+
+    def show_users(self, users):
+        # Sincronizar la tabla (sólo se tocan las filas que cambiaron)
+        with monitor.timed("usuarios: sincronizar tabla", len(users)):
+            self.users_rows.sync(users)
+
+        # Reconstruir el índice del selector de usuarios
+        self.user_index.rebuild(users)
+        if self.links_view is not None:
+            self.refresh_user_combos()
+
+        if self.startup_ms is None:
+            self.finish_startup()
+
+    def refresh_user_combos(self):
+        """Vuelve a leer del índice las opciones de los selectores de usuario"""
+        self.user_combo.refresh()
+        self.filter_user_combo.refresh()
+        self.bulk_user_combo.refresh()
+
+    @staticmethod
+    def user_label(user):
+        """Texto con el que se muestra un usuario en el combobox"""
+        return f"{user[0]} - {user[1]} {user[2]}"
+
+    def refresh_user(self, user):
+        """Refleja en la tabla y el combo un usuario recién guardado, sin recargar"""
+        self.users_rows.upsert(user)
+        self.user_index.upsert(user)
+        if self.links_view is not None:
+            self.refresh_user_combos()
+
+    def forget_user(self, user_id):
+        """Quita de la tabla y el combo un usuario recién eliminado"""
+        self.users_rows.remove(user_id)
+        self.user_index.remove(user_id)
+        if self.links_view is not None:
+            self.refresh_user_combos()
+
+    def poll_changes(self):
+        """Trae los cambios hechos desde otros clientes y los aplica sin recargar"""
+        loaded_ids = self.loaded_link_ids()
+
+        def work():
+            changes = self.changes.poll()
+            # Los links visibles de un usuario que cambió de nombre también cambian
+            renamed = {user[0] for user in changes.users}
+            if renamed and loaded_ids:
+                changes.links += [record for record in self.service.links_among(loaded_ids)
+                                  if record[1] in renamed]
+            self.link_cache.put_many(((record[0], record) for record in changes.links), version=link_version)
+            return changes
+
+        def done(changes):
+            self.apply_changes(changes)
+            self.schedule_change_poll()
+
+        def failed(e):
+            # Sin conexión: se reintenta en la próxima vuelta sin molestar
+            self.schedule_change_poll()
+
+        self.change_poll = None
+        self.run_db(work, key='changes', quiet=True, on_success=done, on_error=failed)
+
+    def schedule_change_poll(self):
+        if isinstance(getattr(self, 'db', None), ReplicaDatabase):
+            self.sync_label.configure(text=self.db.status.summary())
+        self.change_poll = self.root.after(CHANGE_POLL_MS, self.poll_changes)
+
+    def apply_changes(self, changes):
+        if changes.overflow:
+            # Muchos cambios juntos (por ejemplo, una importación): es más
+            # barato recargar lo visible
+            self.load_users()
+            self.load_links()
+            return
 
-        # Actualizar el combobox
-        self.user_combo['values'] = [f"{user[0]} - {user[1]} {user[2]}" for user in users]
+        for user in changes.users:
+            self.refresh_user(user)
+        for user_id in changes.deleted_users:
+            self.link_cache.invalidate_where(lambda record: record[1] == user_id)
+            self.forget_user(user_id)
+        if self.links_view is None:
+            for link_id in changes.deleted_links:
+                self.link_cache.invalidate(link_id)
+            return
+        for record in changes.links:
+            self.links_view.upsert(self.link_row(record))
+        for link_id in changes.deleted_links:
+            self.link_cache.invalidate(link_id)
+            self.links_view.remove(link_id)
+        if changes.links or changes.deleted_links or changes.deleted_users:
+            self.load_temas()
+        if changes.users or changes.deleted_users:
+            self.filter_user_combo.refresh()
 
     def load_multimedia_types(self):
         """Carga tipos de multimedia desde la base de datos al combo"""
-        # Obtener tipos de multimedia de la BD
-        self.cursor.execute("SELECT id, tipo FROM multimedia")
-        types = self.cursor.fetchall()
+        self.run_db(self.service.list_multimedia_types, key='multimedia', on_success=self.show_multimedia_types,
+                    error_message="Error al cargar tipos de multimedia")
+
+    def show_multimedia_types(self, types):
+        self.multimedia_index.rebuild(types)
+        if self.links_view is not None:
+            self.show_multimedia_combos()
 
-        # Actualizar el combobox
-        self.multimedia_combo['values'] = [f"{t[0]} - {t[1]}" for t in types]
+    def show_multimedia_combos(self):
+        self.multimedia_combo['values'] = self.multimedia_index.labels()
+        self.filter_multimedia_combo['values'] = [''] + self.multimedia_index.labels()
+        self.bulk_multimedia_combo['values'] = self.multimedia_index.labels()
 
     def load_links(self):
-        """Carga links desde la base de datos a la tabla de links"""
-        # Limpiar la tabla
-        for item in self.links_table.get_children():
-            self.links_table.delete(item)
-
-        # Unimos las tablas links, usuario y multimedia
-        self.cursor.execute("""
-                SELECT l.id,
-                       CONCAT(u.nombre, ' ', u.apellido) AS usuario,
-                       l.link,
-                       m.tipo,
-                       l.fecha,
-                       l.autor,
-                       l.tema
-                FROM links l
-                JOIN usuario u ON l.usuario_id = u.id
-                JOIN multimedia m ON l.multimedia_id = m.id
-            """)
-        links = self.cursor.fetchall()
-
-        # Insertar en tabla
-        for link in links:
-            self.links_table.insert('', 'end', values=link)
+        """Carga la primera página de links (con los filtros y el orden actuales)"""
+        if self.links_view is None:
+            return  # Se carga al construir la pestaña
+        self.links_view.id_ordered = self.links_filter.is_empty() and self.links_sort.is_default()
+        self.links_view.reload()
+        self.load_temas()
+
+    def load_temas(self):
+        """Carga la lista de temas con sus cantidades (una lectura de la tabla tema)"""
+        if self.links_view is None:
+            return
+        self.run_db(self.service.list_temas, key='temas', quiet=True, on_success=self.show_temas,
+                    error_message="Error al cargar temas")
+
+    def show_temas(self, temas):
+        self.temas = temas
+        self.temas_list.delete(0, tk.END)
+        self.temas_list.insert(tk.END, "(Todos)")
+        for _, nombre, cantidad in temas:
+            self.temas_list.insert(tk.END, f"{nombre} ({cantidad})")
+        # Marcar el tema del filtro activo
+        selected = 0
+        for i, tema in enumerate(temas, start=1):
+            if self.links_filter.tema is not None and tema[1].casefold() == self.links_filter.tema.casefold():
+                selected = i
+        self.temas_list.selection_set(selected)
+
+    def on_tema_select(self, event):
+        """Filtra los links por el tema elegido en la lista"""
+        selection = self.temas_list.curselection()
+        if not selection:
+            return
+        index = selection[0]
+        self.filter_tema_entry.delete(0, tk.END)
+        if index > 0:
+            self.filter_tema_entry.insert(0, self.temas[index - 1][1])
+        self.apply_link_filters()
+
+    def apply_link_filters(self):
+        """Lee la barra de filtros y recarga los links que coinciden"""
+        user_text = self.filter_user_combo.get().strip()
+        usuario_id = self.filter_user_combo.selected_id()
+        if user_text and usuario_id is None:
+            messagebox.showerror("Error", "Seleccione un usuario de la lista")
+            return
 
-    def save_user(self):
-        """Guarda un nuevo usuario en la base de datos"""
-        user_id = self.user_id_entry.get().strip()
-        nombre = self.nombre_entry.get().strip()
-        apellido = self.apellido_entry.get().strip()
-        email = self.email_entry.get().strip()
+        fechas = []
+        for entry in (self.filter_desde_entry, self.filter_hasta_entry):
+            fecha = entry.get().strip()
+            if fecha:
+                try:
+                    datetime.strptime(fecha, "%Y-%m-%d")
+                except ValueError:
+                    messagebox.showerror("Error", "Las fechas deben tener el formato AAAA-MM-DD")
+                    return
+            fechas.append(fecha or None)
+
+        self.links_filter = LinkFilter(
+            usuario_id=usuario_id,
+            multimedia_id=self.multimedia_index.id_for(self.filter_multimedia_combo.get()),
+            fecha_desde=fechas[0],
+            fecha_hasta=fechas[1],
+            tema=self.filter_tema_entry.get().strip() or None,
+            texto=self.filter_text_entry.get().strip() or None,
+            archivo=self.include_archive_var.get(),
+        )
+        self.load_links()
 
-        if not user_id or not nombre or not apellido:
-            messagebox.showerror("Error", "Los campos ID, Nombre y Apellido son obligatorios")
-            return
+    def clear_link_filters(self):
+        """Vacía la barra de filtros y vuelve a mostrar todos los links"""
+        self.filter_user_combo.set('')
+        self.filter_user_combo.refresh()
+        self.filter_multimedia_combo.set('')
+        for entry in (self.filter_tema_entry, self.filter_desde_entry,
+                      self.filter_hasta_entry, self.filter_text_entry):
+            entry.delete(0, tk.END)
+        self.include_archive_var.set(False)
+        self.links_filter = LinkFilter()
+        self.load_links()
 
-        try:
-            self.cursor.execute(
-                "INSERT INTO usuario (id, nombre, apellido, email) VALUES (%s, %s, %s, %s)",
-                (user_id, nombre, apellido, email)
-            )
-            self.conn.commit()
-            messagebox.showinfo("Éxito", "Usuario guardado correctamente")
-            self.clear_user_form()
-            self.load_users()
-        except IntegrityError:
-            # Manejo de error por violación de PK o UNIQUE
-            messagebox.showerror("Error", "El ID o Email ya existe en la base de datos")
-        except Error as e:
-            messagebox.showerror("Error", f"Error al guardar: {str(e)}")
-
-    def update_user(self):
-        """Actualiza un usuario existente"""
-        user_id = self.user_id_entry.get().strip()
-        nombre = self.nombre_entry.get().strip()
-        apellido = self.apellido_entry.get().strip()
-        email = self.email_entry.get().strip()
+    def sort_links(self, column):
+        """Ordena por la columna elegida; un segundo clic invierte el orden"""
+        descending = self.links_sort.column == column and not self.links_sort.descending
+        self.links_sort = LinkSort(column, descending)
 
-        if not user_id or not nombre or not apellido:
-            messagebox.showerror("Error", "Los campos ID, Nombre y Apellido son obligatorios")
-            return
+        for name, text in self.link_headings.items():
+            if name == column:
+                text += " ▼" if descending else " ▲"
+            self.links_table.heading(name, text=text)
+        self.load_links()
 
-        try:
-            self.cursor.execute(
-                "UPDATE usuario SET nombre = %s, apellido = %s, email = %s WHERE id = %s",
-                (nombre, apellido, email, user_id)
-            )
-            if self.cursor.rowcount == 0:
-                messagebox.showerror("Error", "Usuario no encontrado")
-                return
+    def show_load_error(self, e):
+        messagebox.showerror("Error", f"Error al cargar links: {str(e)}")
+
+    def fetch_links_page(self, after_id=None, before_id=None, limit=200):
+        """Obtiene una página de links para la vista paginada
+
+        Se ejecuta en un hilo de trabajo. Los registros completos quedan en la
+        caché para que seleccionar una fila no necesite otra consulta.
+        """
+        records = self.service.list_links(after_id=after_id, before_id=before_id, limit=limit,
+                                          filters=self.links_filter, sort=self.links_sort)
+        # La página pudo leerse antes de que se guardara una versión más nueva
+        self.link_cache.put_many(((record[0], record) for record in records), version=link_version)
+        return [self.link_row(record) for record in records]
+
+    def loaded_link_ids(self):
+        """Ids de los links cargados en la tabla (ninguno si la pestaña no se construyó)"""
+        return self.links_view.loaded_ids() if self.links_view is not None else []
+
+    @staticmethod
+    def link_row(record):
+        """Fila de la tabla de links a partir del registro completo de un link"""
+        estado, codigo_http = record[12], record[13]
+        if record[14] is not None:
+            estado = "archivado"
+        elif estado is None:
+            estado = ''
+        elif codigo_http is not None:
+            estado = f"{estado} ({codigo_http})"
+        return (record[0], f"{record[2]} {record[3]}", record[4], record[6],
+                record[7], record[8], record[10], estado)
 
-            self.conn.commit()
+    def save_user(self):
+        """Guarda un nuevo usuario en la base de datos"""
+        def done(user):
+            messagebox.showinfo("Éxito", "Usuario guardado correctamente")
+            self.clear_user_form()
+            self.refresh_user(user)
+
+        self.run_db(self.service.create_user, *self.user_form_values(),
+                    on_success=done, error_message="Error al guardar")
+
+    def update_user(self, version=None):
+        """Actualiza un usuario existente
+
+        Se envía la versión que tenía el usuario al seleccionarlo; si otro
+        cliente lo modificó mientras tanto, se ofrece elegir entre guardar
+        igual o cargar los valores actuales.
+        """
+        values = self.user_form_values()
+        version = self.user_version if version is None else version
+        loaded_ids = self.loaded_link_ids()
+
+        def work():
+            user = self.service.update_user(*values, version=version)
+            # Los links muestran el nombre de usuario: releer sólo los visibles
+            records = self.service.user_links_among(user[0], loaded_ids)
+            self.link_cache.put_many(((record[0], record) for record in records), version=link_version)
+            return user, [self.link_row(record) for record in records]
+
+        def done(result):
+            user, loaded_links = result
+            # Los registros en caché tienen el nombre anterior
+            self.link_cache.invalidate_where(lambda record: record[1] == user[0])
             messagebox.showinfo("Éxito", "Usuario actualizado correctamente")
             self.clear_user_form()
-            self.load_users()
-            self.load_links()  # Recargar links ya que muestran el nombre de usuario
-        except Error as e:
-            messagebox.showerror("Error", f"Error al actualizar: {str(e)}")
+            self.refresh_user(user)
+            if self.links_view is not None:
+                for row in loaded_links:
+                    self.links_view.upsert(row)
+
+        def failed(e):
+            if not isinstance(e, VersionConflictError):
+                self.report_error(e, "Error al actualizar")
+                return
+            current = e.current
+            self.refresh_user(current)
+            if messagebox.askyesno(
+                    "Conflicto",
+                    f"{e}. Valores actuales:\n\n"
+                    f"Nombre: {current[1]}\nApellido: {current[2]}\nEmail: {current[3] or ''}\n\n"
+                    "¿Guardar sus cambios de todos modos? (No: cargar los valores actuales)"):
+                self.update_user(version=current[4])
+            else:
+                self.show_user(current)
+
+        self.run_db(work, on_success=done, on_error=failed)
 
     def delete_user(self):
         """Elimina un usuario"""
@@ -385,146 +903,324 @@ class LinksDeInteresApp:
                                    "¿Está seguro de eliminar este usuario? Se eliminarán también todos sus links."):
             return
 
-        try:
-            # Eliminar manualmente sus links si no tuvieras ON DELETE CASCADE:
-            # self.cursor.execute("DELETE FROM links WHERE usuario_id = %s", (user_id,))
+        loaded_ids = self.loaded_link_ids()
 
-            self.cursor.execute("DELETE FROM usuario WHERE id = %s", (user_id,))
-            self.conn.commit()
-
-            if self.cursor.rowcount == 0:
-                messagebox.showerror("Error", "Usuario no encontrado")
-                return
+        def work():
+            # Links visibles del usuario, para quitarlos de la tabla después
+            loaded_links = [row[0] for row in self.service.user_links_among(user_id, loaded_ids)]
+            self.service.delete_user(user_id)
+            return loaded_links
 
+        def done(loaded_links):
+            self.link_cache.invalidate_where(lambda record: record[1] == user_id)
             messagebox.showinfo("Éxito", "Usuario eliminado correctamente")
             self.clear_user_form()
-            self.load_users()
-            self.load_links()
-        except Error as e:
-            messagebox.showerror("Error", f"Error al eliminar: {str(e)}")
+            self.forget_user(user_id)
+            if self.links_view is not None:
+                for link_id in loaded_links:
+                    self.links_view.remove(link_id)
+
+        self.run_db(work, on_success=done, error_message="Error al eliminar")
+
+    def delete_selected_users(self):
+        """Elimina los usuarios elegidos en la tabla, con todos sus links"""
+        # Tk devuelve como números los valores que lo parecen
+        user_ids = [str(self.users_rows.row_id(item)) for item in self.users_table.selection()]
+        if not user_ids:
+            messagebox.showerror("Error", "Seleccione uno o más usuarios en la tabla")
+            return
+        if not messagebox.askyesno("Confirmar",
+                                   f"¿Está seguro de eliminar {len(user_ids)} usuarios? "
+                                   "Se eliminarán también todos sus links."):
+            return
+
+        loaded_ids = self.loaded_link_ids()
+        deleted_users = set(user_ids)
+
+        def work():
+            # Links visibles de esos usuarios, para quitarlos de la tabla después
+            loaded_links = [record[0] for record in self.service.links_among(loaded_ids)
+                            if record[1] in deleted_users]
+            return self.service.delete_users(user_ids), loaded_links
+
+        def done(result):
+            deleted, loaded_links = result
+            self.link_cache.invalidate_where(lambda record: record[1] in deleted_users)
+            items = [self.users_rows.item_id(user_id) for user_id in user_ids]
+            self.users_rows.remove_items([item for item in items if item is not None])
+            for user_id in user_ids:
+                self.user_index.remove(user_id)
+            self.clear_user_form()
+            if self.links_view is not None:
+                self.refresh_user_combos()
+                self.links_view.remove_many(loaded_links)
+                self.load_temas()
+            messagebox.showinfo("Éxito", f"{deleted} usuarios eliminados")
+
+        self.run_db(work, on_success=done, error_message="Error al eliminar")
+
+    def user_form_values(self):
+        """(id, nombre, apellido, email) tal como están en el formulario de usuarios"""
+        return (self.user_id_entry.get(), self.nombre_entry.get(),
+                self.apellido_entry.get(), self.email_entry.get())
+
+    def link_form_values(self):
+        """Campos del formulario de links, en el orden de ``LinksService.create_link``"""
+        return (self.user_combo.selected_id(),
+                self.link_entry.get(),
+                self.multimedia_index.id_for(self.multimedia_combo.get()),
+                self.fecha_entry.get(),
+                self.autor_entry.get(),
+                self.descripcion_text.get("1.0", "end-1c"),
+                self.tema_entry.get())
+
+    def show_saved_link(self, record):
+        """Refleja en la tabla y la caché un link recién guardado"""
+        self.link_cache.put(record[0], record)
+        self.clear_link_form()
+        self.links_view.upsert(self.link_row(record))
+        self.load_temas()
 
     def save_link(self):
         """Guarda un nuevo link en la base de datos"""
-        # Obtener datos del formulario
-        if not self.user_combo.get():
-            messagebox.showerror("Error", "Debe seleccionar un usuario")
-            return
+        def done(record):
+            messagebox.showinfo("Éxito", "Link guardado correctamente")
+            self.show_saved_link(record)
 
-        if not self.multimedia_combo.get():
-            messagebox.showerror("Error", "Debe seleccionar un tipo de multimedia")
-            return
+        self.run_db(self.service.create_link, *self.link_form_values(),
+                    on_success=done, error_message="Error al guardar")
 
-        link = self.link_entry.get().strip()
-        if not link:
-            messagebox.showerror("Error", "El campo link es obligatorio")
-            return
+    def update_link(self, version=None):
+        """Actualiza un link existente (con la misma verificación de versión que update_user)"""
+        link_id = self.link_id_var.get()
 
-        # Extraer IDs de las selecciones de combo
-        user_id = self.user_combo.get().split(' - ')[0]
-        multimedia_id = self.multimedia_combo.get().split(' - ')[0]
+        if not link_id:
+            messagebox.showerror("Error", "Seleccione un link para actualizar")
+            return
 
-        fecha = self.fecha_entry.get().strip()
-        autor = self.autor_entry.get().strip()
-        descripcion = self.descripcion_text.get("1.0", "end-1c").strip()
-        tema = self.tema_entry.get().strip()
+        def done(record):
+            messagebox.showinfo("Éxito", "Link actualizado correctamente")
+            self.show_saved_link(record)
 
-        try:
-            self.cursor.execute(
-                """INSERT INTO links
-                   (usuario_id, link, multimedia_id, fecha, autor, descripcion, tema)
-                   VALUES (%s, %s, %s, %s, %s, %s, %s)""",
-                (user_id, link, multimedia_id, fecha, autor, descripcion, tema)
-            )
-            self.conn.commit()
-            messagebox.showinfo("Éxito", "Link guardado correctamente")
-            self.clear_link_form()
-            self.load_links()
-        except Error as e:
-            messagebox.showerror("Error", f"Error al guardar: {str(e)}")
+        def failed(e):
+            if not isinstance(e, VersionConflictError):
+                self.report_error(e, "Error al actualizar")
+                return
+            current = e.current
+            self.link_cache.put(current[0], current)
+            self.links_view.upsert(self.link_row(current))
+            if messagebox.askyesno(
+                    "Conflicto",
+                    f"{e}. Valores actuales:\n\n"
+                    f"Usuario: {current[2]} {current[3]}\nLink: {current[4]}\nTipo: {current[6]}\n"
+                    f"Fecha: {current[7]}\nAutor: {current[8] or ''}\nTema: {current[10] or ''}\n"
+                    f"Descripción: {current[9] or ''}\n\n"
+                    "¿Guardar sus cambios de todos modos? (No: cargar los valores actuales)"):
+                self.update_link(version=current[11])
+            else:
+                self.show_link(current)
+
+        version = self.link_version if version is None else version
+        self.run_db(self.service.update_link, int(link_id), *self.link_form_values(), version=version,
+                    on_success=done, on_error=failed)
 
-    def update_link(self):
-        """Actualiza un link existente"""
+    def delete_link(self):
+        """Elimina un link"""
         link_id = self.link_id_var.get()
 
         if not link_id:
-            messagebox.showerror("Error", "Seleccione un link para actualizar")
+            messagebox.showerror("Error", "Seleccione un link para eliminar")
             return
 
-        # Obtener datos del formulario
-        if not self.user_combo.get():
-            messagebox.showerror("Error", "Debe seleccionar un usuario")
+        # Confirmar eliminación
+        if not messagebox.askyesno("Confirmar", "¿Está seguro de eliminar este link?"):
             return
 
-        if not self.multimedia_combo.get():
-            messagebox.showerror("Error", "Debe seleccionar un tipo de multimedia")
+        def done(_):
+            self.link_cache.invalidate(int(link_id))
+            messagebox.showinfo("Éxito", "Link eliminado correctamente")
+            self.clear_link_form()
+            self.links_view.remove(link_id)
+            self.load_temas()
+
+        self.run_db(self.service.delete_link, int(link_id), on_success=done,
+                    error_message="Error al eliminar")
+
+    def selected_link_ids(self):
+        """Ids de las filas elegidas en la tabla de links"""
+        return [int(self.links_table.item(item, 'values')[0]) for item in self.links_table.selection()]
+
+    def run_on_selected_links(self, action, *args, message, error_message):
+        """Ejecuta una operación del servicio sobre los links elegidos y refleja el resultado
+
+        ``action`` devuelve los registros completos de los links modificados,
+        que se aplican a la tabla de una sola vez en lugar de recargarla.
+        """
+        link_ids = self.selected_link_ids()
+        if not link_ids:
+            messagebox.showerror("Error", "Seleccione uno o más links en la tabla")
             return
 
-        link = self.link_entry.get().strip()
-        if not link:
-            messagebox.showerror("Error", "El campo link es obligatorio")
+        def done(records):
+            self.link_cache.put_many((record[0], record) for record in records)
+            self.links_view.upsert_many([self.link_row(record) for record in records])
+            self.load_temas()
+            # El formulario puede mostrar uno de los links con su versión
+            # anterior: se vuelve a llenar desde la caché ya actualizada
+            self.on_link_select(None)
+            messagebox.showinfo("Éxito", message.format(len(records)))
+
+        self.run_db(action, link_ids, *args, on_success=done, error_message=error_message)
+
+    def change_selected_multimedia(self):
+        """Cambia el tipo de multimedia de los links elegidos"""
+        multimedia_id = self.multimedia_index.id_for(self.bulk_multimedia_combo.get())
+        self.run_on_selected_links(self.service.change_links_multimedia, multimedia_id,
+                                   message="Tipo cambiado en {} links", error_message="Error al cambiar el tipo")
+
+    def change_selected_owner(self):
+        """Pasa los links elegidos al usuario indicado"""
+        user_text = self.bulk_user_combo.get().strip()
+        user_id = self.bulk_user_combo.selected_id()
+        if user_text and user_id is None:
+            messagebox.showerror("Error", "Seleccione un usuario de la lista")
+            return
+        self.run_on_selected_links(self.service.change_links_owner, user_id,
+                                   message="{} links pasados al usuario", error_message="Error al cambiar el usuario")
+
+    def edit_selected_temas(self, add):
+        """Agrega (o quita) a los links elegidos los temas escritos, separados por comas"""
+        temas = self.bulk_tema_entry.get()
+        self.run_on_selected_links(self.service.edit_links_temas, *((temas, '') if add else ('', temas)),
+                                   message="Temas modificados en {} links", error_message="Error al editar temas")
+
+    def delete_selected_links(self):
+        """Elimina los links elegidos en la tabla"""
+        link_ids = self.selected_link_ids()
+        if not link_ids:
+            messagebox.showerror("Error", "Seleccione uno o más links en la tabla")
+            return
+        if not messagebox.askyesno("Confirmar", f"¿Está seguro de eliminar {len(link_ids)} links?"):
             return
 
-        # Extraer IDs de las selecciones de combo
-        user_id = self.user_combo.get().split(' - ')[0]
-        multimedia_id = self.multimedia_combo.get().split(' - ')[0]
+        def done(deleted):
+            for link_id in link_ids:
+                self.link_cache.invalidate(link_id)
+            self.links_view.remove_many(link_ids)
+            self.clear_link_form()
+            self.load_temas()
+            messagebox.showinfo("Éxito", f"{deleted} links eliminados")
+
+        self.run_db(self.service.delete_links, link_ids, on_success=done,
+                    error_message="Error al eliminar")
 
-        fecha = self.fecha_entry.get().strip()
-        autor = self.autor_entry.get().strip()
-        descripcion = self.descripcion_text.get("1.0", "end-1c").strip()
-        tema = self.tema_entry.get().strip()
+    def toggle_profiling(self):
+        monitor.enabled = self.profile_var.get()
+        self.show_diagnostics()
 
+    def show_diagnostics(self):
+        """Muestra los agregados del registro de tiempos y el estado de la caché"""
         try:
-            self.cursor.execute(
-                """UPDATE links SET
-                   usuario_id = %s, link = %s, multimedia_id = %s,
-                   fecha = %s, autor = %s, descripcion = %s, tema = %s
-                   WHERE id = %s""",
-                (user_id, link, multimedia_id, fecha, autor, descripcion, tema, link_id)
-            )
-            self.conn.commit()
-
-            if self.cursor.rowcount == 0:
-                messagebox.showerror("Error", "Link no encontrado")
-                return
+            monitor.slow_ms = float(self.slow_ms_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "El umbral de consulta lenta debe ser un número")
+            return
 
-            messagebox.showinfo("Éxito", "Link actualizado correctamente")
-            self.clear_link_form()
+        stats = self.link_cache.stats()
+        startup = (f"{self.startup_ms:.0f} ms" if self.startup_ms is not None else "en curso")
+        self.cache_stats_label.configure(
+            text=f"Caché de links: {stats['size']}/{stats['maxsize']} registros, "
+                 f"{stats['hits']} aciertos, {stats['misses']} fallos "
+                 f"({stats['hit_rate']:.0%} de aciertos)\n"
+                 f"Inicio hasta la primera interacción: {startup} "
+                 f"(presupuesto {STARTUP_BUDGET_MS:.0f} ms)")
+
+        self.diagnostics_rows.sync([
+            (f"{group['tipo']}:{group['nombre']}", group['tipo'], group['veces'],
+             f"{group['total_ms']:.1f}", f"{group['media_ms']:.2f}", f"{group['max_ms']:.1f}",
+             f"{group['lectura_ms']:.1f}", group['filas'], group['nombre'])
+            for group in monitor.summary()
+        ])
+
+    def clear_diagnostics(self):
+        monitor.clear()
+        self.show_diagnostics()
+
+    def dump_diagnostics(self):
+        path = filedialog.asksaveasfilename(title="Guardar diagnóstico", defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            monitor.dump(path, extra={"cache_links": self.link_cache.stats(),
+                                      "inicio_ms": self.startup_ms})
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudo guardar el diagnóstico: {e}")
+            return
+        messagebox.showinfo("Diagnóstico", f"Diagnóstico guardado en {path}")
+
+    def import_users(self):
+        """Importa usuarios desde un archivo CSV o JSONL"""
+        self.run_import(import_users, "Importar usuarios")
+
+    def import_links(self):
+        """Importa links desde un archivo CSV o JSONL"""
+        self.run_import(import_links, "Importar links")
+
+    def run_import(self, importer, title):
+        path = filedialog.askopenfilename(
+            title=title,
+            filetypes=[("CSV o JSONL", "*.csv *.jsonl *.ndjson"), ("Todos los archivos", "*.*")]
+        )
+        if not path:
+            return
+
+        def done(report):
+            messagebox.showinfo(title, report.summary())
+            # Una importación puede traer miles de filas: aquí sí conviene recargar
+            self.load_users()
             self.load_links()
-        except Error as e:
-            messagebox.showerror("Error", f"Error al actualizar: {str(e)}")
 
-    def delete_link(self):
-        """Elimina un link"""
-        link_id = self.link_id_var.get()
+        self.run_db(importer, self.db, path, on_success=done, error_message="Error al importar")
 
-        if not link_id:
-            messagebox.showerror("Error", "Seleccione un link para eliminar")
+    def export_links(self):
+        """Exporta a un archivo los links que cumplen los filtros activos"""
+        path = filedialog.asksaveasfilename(
+            title="Exportar links",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSONL", "*.jsonl"), ("Parquet", "*.parquet")]
+        )
+        if not path:
             return
 
-        # Confirmar eliminación
-        if not messagebox.askyesno("Confirmar", "¿Está seguro de eliminar este link?"):
-            return
+        def done(report):
+            messagebox.showinfo("Exportar links", report.summary())
 
-        try:
-            self.cursor.execute("DELETE FROM links WHERE id = %s", (link_id,))
-            self.conn.commit()
+        self.run_db(export_links, self.db, path, self.links_filter, on_success=done,
+                    error_message="Error al exportar")
 
-            if self.cursor.rowcount == 0:
-                messagebox.showerror("Error", "Link no encontrado")
-                return
-
-            messagebox.showinfo("Éxito", "Link eliminado correctamente")
-            self.clear_link_form()
+    def check_links(self):
+        """Verifica si responden las URLs de los links que cumplen los filtros activos"""
+        def done(report):
+            messagebox.showinfo("Verificar links", report.summary())
             self.load_links()
-        except Error as e:
-            messagebox.showerror("Error", f"Error al eliminar: {str(e)}")
+
+        self.run_db(check_links, self.db, self.links_filter, on_success=done,
+                    error_message="Error al verificar links")
 
     def on_user_select(self, event):
         """Maneja la selección de usuario desde la tabla"""
-        selected_item = self.users_table.selection()[0]
-        user = self.users_table.item(selected_item, 'values')
+        selected_items = self.users_table.selection()
+        if len(selected_items) == 1:
+            # La fila guardada, no los valores del Treeview, que son texto
+            user_id = self.users_rows.row_id(selected_items[0])
+            self.show_user(self.users_rows.row(user_id))
+
+    def show_user(self, user):
+        """Llena el formulario de usuarios con una fila (id, nombre, apellido, email, version)"""
+        # Versión leída, para detectar cambios de otros clientes al actualizar
+        self.user_version = int(user[4])
 
-        # Llenar el formulario
         self.user_id_entry.delete(0, tk.END)
         self.user_id_entry.insert(0, user[0])
 
@@ -535,57 +1231,62 @@ class LinksDeInteresApp:
         self.apellido_entry.insert(0, user[2])
 
         self.email_entry.delete(0, tk.END)
-        self.email_entry.insert(0, user[3] if user[3] else "")
+        self.email_entry.insert(0, user[3] or "")
 
     def on_link_select(self, event):
         """Maneja la selección de link desde la tabla"""
         selected_item = self.links_table.selection()
-        if not selected_item:
+        count = len(selected_item)
+        self.selection_label.configure(text=f"{count} seleccionados" if count else "Ninguno")
+        if count != 1:
+            # Con varias filas elegidas el formulario queda vacío: las
+            # acciones son las de "Links seleccionados"
+            self.executor.cancel('link-select')
+            self.clear_link_fields()
             return
 
         link_data = self.links_table.item(selected_item[0], 'values')
-        link_id = link_data[0]
-
-        # Obtener el registro completo del link desde la base de datos
-        self.cursor.execute("""
-            SELECT l.id, l.usuario_id, u.nombre, u.apellido, l.link,
-                   l.multimedia_id, m.tipo, l.fecha, l.autor,
-                   l.descripcion, l.tema
-            FROM links l
-            JOIN usuario u ON l.usuario_id = u.id
-            JOIN multimedia m ON l.multimedia_id = m.id
-            WHERE l.id = %s
-        """, (link_id,))
-        link = self.cursor.fetchone()
+        link_id = int(link_data[0])
+
+        # Normalmente el registro completo ya está en caché desde que se cargó
+        # la página; si no, se pide a la base de datos. Una selección nueva
+        # reemplaza a la que todavía esté en curso.
+        link = self.link_cache.get(link_id)
+        if link is not None:
+            self.executor.cancel('link-select')
+            self.show_link(link)
+            return
+
+        self.run_db(self.service.get_link, link_id, key='link-select',
+                    on_success=self.cache_and_show_link, error_message="Error al cargar el link")
+
+    def cache_and_show_link(self, link):
+        self.link_cache.put(link[0], link)
+        self.show_link(link)
+
+    def show_link(self, link):
+        """Llena el formulario de links con un registro completo"""
         if not link:
             return
 
-        # Establecer el ID de link oculto
-        self.link_id_var.set(link[0])
+        # Limpiar formulario (también borra el ID oculto), sin quitar la
+        # selección de la tabla
+        self.clear_link_fields()
 
-        # Limpiar formulario
-        self.clear_link_form()
+        # Establecer el ID de link oculto y la versión leída
+        self.link_id_var.set(link[0])
+        self.link_version = link[11]
 
-        # Llenar combos
-        user_idx = -1
-        for i, user_item in enumerate(self.user_combo['values']):
-            if user_item.startswith(link[1]):
-                user_idx = i
-                break
-        if user_idx >= 0:
-            self.user_combo.current(user_idx)
-
-        multimedia_idx = -1
-        for i, media_item in enumerate(self.multimedia_combo['values']):
-            if media_item.startswith(str(link[5])):
-                multimedia_idx = i
-                break
-        if multimedia_idx >= 0:
+        # Llenar combos (búsqueda directa por id en los índices)
+        self.user_combo.select(link[1])
+        multimedia_idx = self.multimedia_index.position(link[5])
+        if multimedia_idx is not None:
             self.multimedia_combo.current(multimedia_idx)
 
         # Llenar el resto del formulario
         self.link_entry.insert(0, link[4])
-        self.fecha_entry.insert(0, link[7])
+        self.fecha_entry.delete(0, tk.END)
+        self.fecha_entry.insert(0, link[7] or "")
         self.autor_entry.insert(0, link[8] if link[8] else "")
         self.descripcion_text.insert("1.0", link[9] if link[9] else "")
         self.tema_entry.insert(0, link[10] if link[10] else "")
@@ -596,14 +1297,24 @@ class LinksDeInteresApp:
         self.nombre_entry.delete(0, tk.END)
         self.apellido_entry.delete(0, tk.END)
         self.email_entry.delete(0, tk.END)
+        self.user_version = None
 
         # Limpiar selección de tabla
         for item in self.users_table.selection():
             self.users_table.selection_remove(item)
 
     def clear_link_form(self):
-        """Limpia todos los campos en el formulario de link"""
+        """Limpia todos los campos en el formulario de link y la selección de la tabla"""
+        self.clear_link_fields()
+
+        # Limpiar selección de tabla
+        for item in self.links_table.selection():
+            self.links_table.selection_remove(item)
+
+    def clear_link_fields(self):
+        """Limpia los campos del formulario de link"""
         self.user_combo.set('')
+        self.user_combo.refresh()
         self.multimedia_combo.set('')
         self.link_entry.delete(0, tk.END)
         self.fecha_entry.delete(0, tk.END)
@@ -612,10 +1323,7 @@ class LinksDeInteresApp:
         self.descripcion_text.delete("1.0", tk.END)
         self.tema_entry.delete(0, tk.END)
         self.link_id_var.set('')
-
-        # Limpiar selección de tabla
-        for item in self.links_table.selection():
-            self.links_table.selection_remove(item)
+        self.link_version = None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,504 @@
+"""Migraciones versionadas del esquema de la base de datos.
+
+``CREATE TABLE IF NOT EXISTS`` sólo sirve para crear tablas nuevas: nunca
+modifica una tabla que ya existe. En su lugar, el esquema evoluciona con una
+lista ordenada de migraciones y la versión aplicada se guarda en la tabla
+``schema_version``. Al iniciar, ``migrate`` aplica sólo las que falten; si el
+esquema ya está al día basta una consulta, sin DDL ni bloqueos.
+
+Cada migración es una función ``(cursor, db)``. El DDL se escribe con la
+sintaxis de MySQL y pasa por ``db.ddl``, que lo adapta al motor; lo que no se
+traduce (triggers, índices de texto, claves foráneas) consulta ``db.dialect``
+('mysql' o 'sqlite').
+
+Todas las pendientes se aplican en una sola transacción. En SQLite se abre
+con un ``BEGIN`` explícito y, como el DDL es transaccional, una falla no deja
+nada a medias. En MySQL cada sentencia DDL hace commit implícito, así que
+cada migración registra su versión apenas termina y una que falle a medias
+puede requerir intervención manual.
+"""
+from collections import namedtuple
+
+from database import DEFAULT_MULTIMEDIA_TYPES, DatabaseError
+from duplicates import fill_url_hashes
+from estadisticas import STAT_TABLES, decrement_sql, fill_stats, increment_sql
+from temas import fill_link_temas
+
+Migration = namedtuple("Migration", "version description apply")
+
+
+def _index_exists(cursor, db, table, name):
+    if db.dialect == 'mysql':
+        cursor.execute(
+            """SELECT COUNT(*) FROM information_schema.statistics
+               WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s""",
+            (table, name)
+        )
+    else:
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name = %s",
+                       (name,))
+    return cursor.fetchone()[0] > 0
+
+
+def _create_index(cursor, db, name, table, columns):
+    # MySQL no admite CREATE INDEX IF NOT EXISTS
+    if not _index_exists(cursor, db, table, name):
+        cursor.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+
+# ----------------------------------------------------------------------
+# 1. Tablas iniciales
+
+def _create_tables(cursor, db):
+    # - Tipos VARCHAR en lugar de TEXT para llaves primarias o foráneas.
+    # - ENGINE=InnoDB para soportar claves foráneas en MySQL.
+    # - fecha DATE con DEFAULT CURDATE() (MySQL 8.0.13 o posterior).
+    # db.ddl adapta AUTO_INCREMENT, CURDATE() y ENGINE para SQLite.
+    cursor.execute(db.ddl('''
+        CREATE TABLE IF NOT EXISTS usuario (
+            id VARCHAR(30) NOT NULL,
+            nombre VARCHAR(100) NOT NULL,
+            apellido VARCHAR(100) NOT NULL,
+            email VARCHAR(100) UNIQUE,
+            PRIMARY KEY (id)
+        ) ENGINE=InnoDB
+    '''))
+    cursor.execute(db.ddl('''
+        CREATE TABLE IF NOT EXISTS multimedia (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            tipo VARCHAR(50) NOT NULL
+        ) ENGINE=InnoDB
+    '''))
+    cursor.execute(db.ddl('''
+        CREATE TABLE IF NOT EXISTS links (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            usuario_id VARCHAR(30) NOT NULL,
+            link TEXT NOT NULL,
+            multimedia_id INT NOT NULL,
+            fecha DATE DEFAULT (CURDATE()),
+            autor VARCHAR(100),
+            descripcion TEXT,
+            tema VARCHAR(100),
+            FOREIGN KEY (usuario_id) REFERENCES usuario(id),
+            FOREIGN KEY (multimedia_id) REFERENCES multimedia(id)
+        ) ENGINE=InnoDB
+    '''))
+
+    # Verificar si existen tipos de multimedia, si no, agregar tipos por defecto
+    cursor.execute("SELECT COUNT(*) FROM multimedia")
+    if cursor.fetchone()[0] == 0:
+        for tipo in DEFAULT_MULTIMEDIA_TYPES:
+            cursor.execute("INSERT INTO multimedia (tipo) VALUES (%s)", (tipo,))
+
+
+# ----------------------------------------------------------------------
+# 2. Índices para filtrar y ordenar links
+
+LINK_INDEXES = (
+    ("idx_links_usuario_fecha", "usuario_id, fecha"),
+    ("idx_links_tema_fecha", "tema, fecha"),
+    ("idx_links_multimedia", "multimedia_id"),
+    ("idx_links_fecha", "fecha"),
+    ("idx_links_autor", "autor"),
+)
+
+
+def _add_link_indexes(cursor, db):
+    # En MySQL, el índice implícito que InnoDB crea para cada clave foránea se
+    # descarta solo cuando aparece otro índice que pueda reemplazarlo.
+    for name, columns in LINK_INDEXES:
+        _create_index(cursor, db, name, "links", columns)
+
+
+# ----------------------------------------------------------------------
+# 3. Borrar los links de un usuario junto con el usuario
+
+def _cascade_links_usuario(cursor, db):
+    if db.dialect == 'mysql':
+        cursor.execute(
+            """SELECT constraint_name FROM information_schema.key_column_usage
+               WHERE table_schema = DATABASE() AND table_name = 'links'
+                 AND column_name = 'usuario_id' AND referenced_table_name = 'usuario'"""
+        )
+        for (name,) in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE links DROP FOREIGN KEY {name}")
+        cursor.execute('''
+            ALTER TABLE links ADD CONSTRAINT fk_links_usuario
+            FOREIGN KEY (usuario_id) REFERENCES usuario(id) ON DELETE CASCADE
+        ''')
+        return
+
+    # SQLite no permite cambiar una clave foránea: hay que reconstruir la tabla
+    cursor.execute('''
+        CREATE TABLE links_nueva (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id VARCHAR(30) NOT NULL,
+            link TEXT NOT NULL,
+            multimedia_id INTEGER NOT NULL,
+            fecha DATE DEFAULT CURRENT_DATE,
+            autor VARCHAR(100),
+            descripcion TEXT,
+            tema VARCHAR(100),
+            FOREIGN KEY (usuario_id) REFERENCES usuario(id) ON DELETE CASCADE,
+            FOREIGN KEY (multimedia_id) REFERENCES multimedia(id)
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO links_nueva (id, usuario_id, link, multimedia_id, fecha, autor, descripcion, tema)
+        SELECT id, usuario_id, link, multimedia_id, fecha, autor, descripcion, tema FROM links
+    ''')
+    cursor.execute("DROP TABLE links")
+    cursor.execute("ALTER TABLE links_nueva RENAME TO links")
+    _add_link_indexes(cursor, db)
+
+
+# ----------------------------------------------------------------------
+# 4. Búsqueda de texto completo
+
+def _add_fulltext_index(cursor, db):
+    if db.dialect == 'mysql':
+        if not _index_exists(cursor, db, "links", "ft_links"):
+            cursor.execute("ALTER TABLE links ADD FULLTEXT INDEX ft_links (link, descripcion, autor, tema)")
+        return
+
+    # En SQLite, una tabla FTS5 que indexa el contenido de links y se mantiene
+    # al día con triggers
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS links_fts USING fts5(
+            link, descripcion, autor, tema, content='links', content_rowid='id'
+        )
+    ''')
+    _create_fulltext_triggers(cursor)
+    cursor.execute("INSERT INTO links_fts(links_fts) VALUES ('rebuild')")
+
+
+def _create_fulltext_triggers(cursor):
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS links_fts_ai AFTER INSERT ON links BEGIN
+            INSERT INTO links_fts (rowid, link, descripcion, autor, tema)
+            VALUES (new.id, new.link, new.descripcion, new.autor, new.tema);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS links_fts_ad AFTER DELETE ON links BEGIN
+            INSERT INTO links_fts (links_fts, rowid, link, descripcion, autor, tema)
+            VALUES ('delete', old.id, old.link, old.descripcion, old.autor, old.tema);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS links_fts_au AFTER UPDATE ON links BEGIN
+            INSERT INTO links_fts (links_fts, rowid, link, descripcion, autor, tema)
+            VALUES ('delete', old.id, old.link, old.descripcion, old.autor, old.tema);
+            INSERT INTO links_fts (rowid, link, descripcion, autor, tema)
+            VALUES (new.id, new.link, new.descripcion, new.autor, new.tema);
+        END
+    ''')
+
+
+# ----------------------------------------------------------------------
+# 5. Registro de cambios para refrescar otros clientes
+
+# (trigger, tabla, evento, operación, valor de fila_id)
+CHANGE_TRIGGERS = (
+    ("cambios_links_ai", "links", "INSERT", "'I'", "NEW.id"),
+    ("cambios_links_au", "links", "UPDATE", "'U'", "NEW.id"),
+    ("cambios_links_ad", "links", "DELETE", "'D'", "OLD.id"),
+    ("cambios_usuario_ai", "usuario", "INSERT", "'I'", "NEW.id"),
+    ("cambios_usuario_au", "usuario", "UPDATE", "'U'", "NEW.id"),
+    ("cambios_usuario_ad", "usuario", "DELETE", "'D'", "OLD.id"),
+)
+
+
+def _create_change_log(cursor, db):
+    cursor.execute(db.ddl('''
+        CREATE TABLE IF NOT EXISTS cambios (
+            seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+            tabla VARCHAR(20) NOT NULL,
+            fila_id VARCHAR(30) NOT NULL,
+            operacion CHAR(1) NOT NULL,
+            creado TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+    '''))
+    _create_change_triggers(cursor, db)
+
+
+def _create_change_triggers(cursor, db):
+    # Los triggers registran también las escrituras masivas (importación) y
+    # las de cualquier otro cliente, sin tocar cada sentencia de la aplicación
+    for name, table, event, operation, row_id in CHANGE_TRIGGERS:
+        insert = (f"INSERT INTO cambios (tabla, fila_id, operacion) "
+                  f"VALUES ('{table}', {row_id}, {operation})")
+        if db.dialect == 'mysql':
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"CREATE TRIGGER {name} AFTER {event} ON {table} FOR EACH ROW {insert}")
+        else:
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} "
+                           f"BEGIN {insert}; END")
+
+
+# ----------------------------------------------------------------------
+# 6. Versión de fila para el control de concurrencia optimista
+
+def _add_row_versions(cursor, db):
+    # Cada UPDATE incrementa la versión; quien actualiza con una versión vieja
+    # no pisa los cambios de otro cliente
+    for table in ("usuario", "links"):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN version INT NOT NULL DEFAULT 1")
+
+
+# ----------------------------------------------------------------------
+# 7. Resultado de la verificación de cada link (linkcheck.py)
+
+def _create_link_status(cursor, db):
+    # ON UPDATE CASCADE: la réplica local cambia el id de los links que crea
+    # al enviarlos al servidor
+    cursor.execute(db.ddl('''
+        CREATE TABLE IF NOT EXISTS link_estado (
+            link_id INT NOT NULL PRIMARY KEY,
+            estado VARCHAR(20) NOT NULL,
+            codigo_http INT,
+            url_final TEXT,
+            detalle VARCHAR(255),
+            revisado DATETIME NOT NULL,
+            FOREIGN KEY (link_id) REFERENCES links(id) ON DELETE CASCADE ON UPDATE CASCADE
+        ) ENGINE=InnoDB
+    '''))
+    _create_index(cursor, db, "idx_link_estado_revisado", "link_estado", "revisado")
+
+
+# ----------------------------------------------------------------------
+# 8. URL normalizada de cada link, para detectar repetidos (duplicates.py)
+
+def _add_url_hash(cursor, db):
+    cursor.execute("ALTER TABLE links ADD COLUMN url_normalizada TEXT")
+    cursor.execute("ALTER TABLE links ADD COLUMN url_hash CHAR(40)")
+    # Se completan los links existentes antes de crear el índice, que así se
+    # construye una sola vez. Cada UPDATE queda en el registro de cambios:
+    # los demás clientes recargan la lista una vez.
+    fill_url_hashes(cursor)
+    _create_index(cursor, db, "idx_links_url_hash", "links", "url_hash, usuario_id")
+
+
+# ----------------------------------------------------------------------
+# 9. Temas: varios por link, con la cantidad de links de cada uno (temas.py)
+
+# (trigger, tabla, momento y evento, sentencia)
+TEMA_TRIGGERS = (
+    ("tema_cantidad_ai", "link_tema", "AFTER INSERT",
+     "UPDATE tema SET cantidad = cantidad + 1 WHERE id = NEW.tema_id"),
+    ("tema_cantidad_ad", "link_tema", "AFTER DELETE",
+     "UPDATE tema SET cantidad = cantidad - 1 WHERE id = OLD.tema_id"),
+    # En MySQL el ON DELETE CASCADE de link_tema no dispara el trigger anterior
+    ("link_tema_links_bd", "links", "BEFORE DELETE",
+     "DELETE FROM link_tema WHERE link_id = OLD.id"),
+)
+
+
+def _create_temas(cursor, db):
+    # SQLite compara con mayúsculas; la intercalación por omisión de MySQL no
+    collate = " COLLATE NOCASE" if db.dialect == 'sqlite' else ""
+    cursor.execute(db.ddl(f'''
+        CREATE TABLE IF NOT EXISTS tema (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            nombre VARCHAR(100){collate} NOT NULL UNIQUE,
+            cantidad INT NOT NULL DEFAULT 0
+        ) ENGINE=InnoDB
+    '''))
+    # ON UPDATE CASCADE por la réplica, igual que link_estado
+    cursor.execute(db.ddl('''
+        CREATE TABLE IF NOT EXISTS link_tema (
+            link_id INT NOT NULL,
+            tema_id INT NOT NULL,
+            PRIMARY KEY (link_id, tema_id),
+            FOREIGN KEY (link_id) REFERENCES links(id) ON DELETE CASCADE ON UPDATE CASCADE,
+            FOREIGN KEY (tema_id) REFERENCES tema(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB
+    '''))
+    _create_index(cursor, db, "idx_link_tema_tema", "link_tema", "tema_id, link_id")
+    for name, table, event, statement in TEMA_TRIGGERS:
+        if db.dialect == 'mysql':
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"CREATE TRIGGER {name} {event} ON {table} FOR EACH ROW {statement}")
+        else:
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} ON {table} "
+                           f"BEGIN {statement}; END")
+    if db.dialect == 'mysql':
+        # Lugar para varios temas separados por comas
+        cursor.execute("ALTER TABLE links MODIFY tema VARCHAR(255)")
+    # Los temas de los links existentes; los triggers cuentan cada uno
+    fill_link_temas(cursor, db)
+
+
+# ----------------------------------------------------------------------
+# 10. Resúmenes de links por usuario, tipo y mes (estadisticas.py)
+
+def _create_stats(cursor, db):
+    for sql in (
+        "CREATE TABLE IF NOT EXISTS estadistica_usuario (usuario_id VARCHAR(30) NOT NULL PRIMARY KEY, "
+        "cantidad INT NOT NULL DEFAULT 0) ENGINE=InnoDB",
+        "CREATE TABLE IF NOT EXISTS estadistica_multimedia (multimedia_id INT NOT NULL PRIMARY KEY, "
+        "cantidad INT NOT NULL DEFAULT 0) ENGINE=InnoDB",
+        "CREATE TABLE IF NOT EXISTS estadistica_mes (mes CHAR(7) NOT NULL PRIMARY KEY, "
+        "cantidad INT NOT NULL DEFAULT 0) ENGINE=InnoDB",
+    ):
+        cursor.execute(db.ddl(sql))
+    _create_stats_triggers(cursor, db)
+    # links_archivo todavía no existe (migración 11)
+    fill_stats(cursor, ("links",))
+
+
+def _create_stats_triggers(cursor, db, table="links"):
+    def increments(row):
+        return [increment_sql(db, table, key, expression.format(row=row))
+                for table, key, expression in STAT_TABLES]
+
+    def decrements(row):
+        return [decrement_sql(table, key, expression.format(row=row))
+                for table, key, expression in STAT_TABLES]
+
+    triggers = [(f"estadistica_{table}_ai", "INSERT", None, increments('NEW')),
+                (f"estadistica_{table}_ad", "DELETE", None, decrements('OLD'))]
+    # Una modificación mueve el link de fila sólo en las dimensiones que
+    # cambiaron; los archivados no se modifican
+    if table == "links":
+        for n, (stat_table, key, expression) in enumerate(STAT_TABLES, start=1):
+            old, new = expression.format(row='OLD'), expression.format(row='NEW')
+            triggers.append((f"estadistica_links_au{n}", "UPDATE", (old, new),
+                             [decrement_sql(stat_table, key, old), increment_sql(db, stat_table, key, new)]))
+
+    for name, event, changed, statements in triggers:
+        body = "; ".join(statements)
+        if db.dialect == 'mysql':
+            if changed is not None:
+                body = f"IF NOT ({changed[0]} <=> {changed[1]}) THEN {body}; END IF"
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"CREATE TRIGGER {name} AFTER {event} ON {table} FOR EACH ROW "
+                           f"BEGIN {body}; END")
+        else:
+            when = f" WHEN {changed[0]} IS NOT {changed[1]}" if changed is not None else ""
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table}{when} "
+                           f"BEGIN {body}; END")
+
+
+# ----------------------------------------------------------------------
+# 11. Archivo de links viejos (archivo.py)
+
+def _create_archive(cursor, db):
+    # Las columnas de links más el momento en que se archivó. El id es el que
+    # tenía en links; en SQLite, INTEGER PRIMARY KEY es el rowid que usa FTS5
+    fulltext = ",\n            FULLTEXT INDEX ft_links_archivo (link, descripcion, autor, tema)" \
+        if db.dialect == 'mysql' else ""
+    cursor.execute(db.ddl(f'''
+        CREATE TABLE IF NOT EXISTS links_archivo (
+            id INTEGER NOT NULL PRIMARY KEY,
+            usuario_id VARCHAR(30) NOT NULL,
+            link TEXT NOT NULL,
+            multimedia_id INT NOT NULL,
+            fecha DATE,
+            autor VARCHAR(100),
+            descripcion TEXT,
+            tema VARCHAR(255),
+            version INT NOT NULL DEFAULT 1,
+            url_normalizada TEXT,
+            url_hash CHAR(40),
+            archivado DATETIME NOT NULL,
+            FOREIGN KEY (usuario_id) REFERENCES usuario(id) ON DELETE CASCADE,
+            FOREIGN KEY (multimedia_id) REFERENCES multimedia(id){fulltext}
+        ) ENGINE=InnoDB
+    '''))
+    _create_index(cursor, db, "idx_links_archivo_fecha", "links_archivo", "fecha")
+    _create_index(cursor, db, "idx_links_archivo_usuario_fecha", "links_archivo", "usuario_id, fecha")
+    if db.dialect == 'sqlite':
+        # Como links_fts (migración 4); los archivados sólo se agregan y se quitan
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS links_archivo_fts USING fts5(
+                link, descripcion, autor, tema, content='links_archivo', content_rowid='id'
+            )
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS links_archivo_fts_ai AFTER INSERT ON links_archivo BEGIN
+                INSERT INTO links_archivo_fts (rowid, link, descripcion, autor, tema)
+                VALUES (new.id, new.link, new.descripcion, new.autor, new.tema);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS links_archivo_fts_ad AFTER DELETE ON links_archivo BEGIN
+                INSERT INTO links_archivo_fts (links_archivo_fts, rowid, link, descripcion, autor, tema)
+                VALUES ('delete', old.id, old.link, old.descripcion, old.autor, old.tema);
+            END
+        ''')
+    # Los archivados se siguen contando en las estadísticas
+    _create_stats_triggers(cursor, db, "links_archivo")
+
+
+MIGRATIONS = (
+    Migration(1, "Tablas usuario, multimedia y links", _create_tables),
+    Migration(2, "Índices de links por usuario, tema, fecha, multimedia y autor", _add_link_indexes),
+    Migration(3, "ON DELETE CASCADE en links.usuario_id", _cascade_links_usuario),
+    Migration(4, "Índice de texto completo sobre link, descripción, autor y tema", _add_fulltext_index),
+    Migration(5, "Registro de cambios (tabla cambios y triggers)", _create_change_log),
+    Migration(6, "Columna version en usuario y links", _add_row_versions),
+    Migration(7, "Tabla link_estado con el resultado de verificar cada link", _create_link_status),
+    Migration(8, "Columnas url_normalizada y url_hash en links, con índice", _add_url_hash),
+    Migration(9, "Tablas tema y link_tema, con la cantidad de links por tema", _create_temas),
+    Migration(10, "Resúmenes de links por usuario, tipo de multimedia y mes", _create_stats),
+    Migration(11, "Tabla links_archivo para los links viejos", _create_archive),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(cursor, db):
+    """Devuelve la versión del esquema, creando la tabla de versiones si hace falta"""
+    cursor.execute(db.ddl('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT NOT NULL PRIMARY KEY,
+            descripcion VARCHAR(200) NOT NULL,
+            aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+    '''))
+    cursor.execute("SELECT MAX(version) FROM schema_version")
+    return cursor.fetchone()[0] or 0
+
+
+def is_current(db, target=LATEST_VERSION):
+    """Indica si el esquema ya tiene aplicada la versión ``target``"""
+    try:
+        version = db.fetchone("SELECT MAX(version) FROM schema_version")[0] or 0
+    except DatabaseError:
+        return False  # Base nueva: todavía no existe schema_version
+    return version >= target
+
+
+def migrate(db, target=LATEST_VERSION):
+    """Aplica en orden las migraciones pendientes y devuelve las versiones aplicadas"""
+    # Lo normal al iniciar: nada que hacer. No hace falta CREATE TABLE ni
+    # (en MySQL) esperar el bloqueo de migración.
+    if is_current(db, target):
+        return []
+
+    applied = []
+    with db.transaction() as cursor:
+        if db.dialect == 'mysql':
+            # Evita que dos clientes que arrancan a la vez migren en paralelo
+            cursor.execute("SELECT GET_LOCK('links_schema_migration', 30)")
+            cursor.fetchone()
+        else:
+            # sqlite3 abre la transacción sólo antes de INSERT, UPDATE o
+            # DELETE: sin este BEGIN cada CREATE o ALTER haría commit por su
+            # cuenta. IMMEDIATE toma el bloqueo de escritura desde el principio,
+            # así que dos procesos que arrancan a la vez no migran en paralelo
+            cursor.execute("BEGIN IMMEDIATE")
+        try:
+            version = current_version(cursor, db)
+            for migration in MIGRATIONS:
+                if version < migration.version <= target:
+                    migration.apply(cursor, db)
+                    cursor.execute("INSERT INTO schema_version (version, descripcion) VALUES (%s, %s)",
+                                   (migration.version, migration.description))
+                    applied.append(migration.version)
+        finally:
+            if db.dialect == 'mysql':
+                cursor.execute("SELECT RELEASE_LOCK('links_schema_migration')")
+                cursor.fetchone()
+    return applied
@@ -0,0 +1,553 @@
+"""Réplica local en SQLite de la base MySQL, para trabajar con una conexión lenta o sin ella.
+
+Todas las lecturas de la aplicación se resuelven en un archivo SQLite local.
+Las escrituras también se hacen en la réplica y unos triggers las anotan en la
+tabla ``outbox``. Un hilo de sincronización, cada ``interval`` segundos:
+
+1. envía al servidor las filas anotadas en el outbox (el estado actual de cada
+   fila, no cada sentencia), en lotes de ``batch_size`` entradas;
+2. trae los cambios del servidor leyendo su registro ``cambios`` con un
+   ``ChangeFeed``, igual que las otras ventanas abiertas.
+
+Conflictos: una fila modificada en la réplica se envía con la versión que
+tenía en el servidor (control de concurrencia optimista, migración 6). Si el
+servidor ya tiene otra versión, gana el servidor: la fila local se reemplaza
+por la del servidor y los valores locales se guardan en ``sync_conflictos``
+para poder recuperarlos.
+
+Los links creados en la réplica reciben ids a partir de ``LOCAL_ID_BASE``,
+fuera del rango de ``links.id`` en MySQL (INT); al enviarlos, la fila local
+pasa a tener el id que le asignó el servidor.
+
+Se usa con ``LINKS_DB=replica`` (archivo ``LINKS_REPLICA_PATH``, por defecto
+links_replica.db) o ``python cli.py --backend replica sync``.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+
+from changes import ChangeFeed
+from database import DatabaseError, IntegrityError, SQLiteDatabase
+from duplicates import url_key
+from migrations import is_current, migrate
+from temas import sync_link_temas
+
+log = logging.getLogger("links_interes.replica")
+
+REPLICA_PATH = os.environ.get("LINKS_REPLICA_PATH", "links_replica.db")
+
+# Primer id de un link creado en la réplica (mayor que cualquier INT de MySQL)
+LOCAL_ID_BASE = 2 ** 31
+
+# Tablas e índices propios de la réplica (no existen en el servidor)
+REPLICA_TABLES = (
+    '''CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tabla VARCHAR(20) NOT NULL,
+        fila_id VARCHAR(30) NOT NULL,
+        operacion CHAR(1) NOT NULL,
+        version_base INTEGER
+    )''',
+    "CREATE INDEX IF NOT EXISTS idx_outbox_fila ON outbox (tabla, fila_id)",
+    '''CREATE TABLE IF NOT EXISTS replica_estado (
+        clave VARCHAR(30) NOT NULL PRIMARY KEY,
+        valor TEXT
+    )''',
+    '''CREATE TABLE IF NOT EXISTS sync_conflictos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tabla VARCHAR(20) NOT NULL,
+        fila_id VARCHAR(30) NOT NULL,
+        datos_locales TEXT,
+        motivo TEXT NOT NULL,
+        creado TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''',
+)
+
+# (trigger, tabla, evento, operación, fila_id, versión base), como CHANGE_TRIGGERS
+OUTBOX_TRIGGERS = (
+    ("outbox_links_ai", "links", "INSERT", "'I'", "NEW.id", "NULL"),
+    ("outbox_links_au", "links", "UPDATE", "'U'", "NEW.id", "OLD.version"),
+    ("outbox_links_ad", "links", "DELETE", "'D'", "OLD.id", "OLD.version"),
+    ("outbox_usuario_ai", "usuario", "INSERT", "'I'", "NEW.id", "NULL"),
+    ("outbox_usuario_au", "usuario", "UPDATE", "'U'", "NEW.id", "OLD.version"),
+    ("outbox_usuario_ad", "usuario", "DELETE", "'D'", "OLD.id", "OLD.version"),
+)
+
+# Versión de las tablas y triggers propios de la réplica (clave 'esquema' de
+# replica_estado); si ya está, al abrir la réplica no se ejecuta DDL
+REPLICA_SCHEMA = 1
+
+# Mientras existe esta clave en replica_estado, lo que se escribe viene del
+# servidor y no se anota en el outbox
+APPLYING = 'sincronizando'
+
+UPSERT_USER = """
+    INSERT INTO usuario (id, nombre, apellido, email, version) VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (id) DO UPDATE SET
+        nombre = excluded.nombre, apellido = excluded.apellido,
+        email = excluded.email, version = excluded.version
+"""
+UPSERT_LINK = """
+    INSERT INTO links (id, usuario_id, link, multimedia_id, fecha, autor, descripcion, tema, version,
+                       url_normalizada, url_hash)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (id) DO UPDATE SET
+        usuario_id = excluded.usuario_id, link = excluded.link,
+        multimedia_id = excluded.multimedia_id, fecha = excluded.fecha, autor = excluded.autor,
+        descripcion = excluded.descripcion, tema = excluded.tema, version = excluded.version,
+        url_normalizada = excluded.url_normalizada, url_hash = excluded.url_hash
+"""
+UPSERT_MULTIMEDIA = """
+    INSERT INTO multimedia (id, tipo) VALUES (%s, %s)
+    ON CONFLICT (id) DO UPDATE SET tipo = excluded.tipo
+"""
+
+
+def _link_values(record):
+    """Valores de UPSERT_LINK a partir de un registro completo (LINK_COLUMNS)"""
+    fecha = record[7]
+    return (record[0], record[1], record[4], record[5],
+            fecha.isoformat() if hasattr(fecha, 'isoformat') else fecha,
+            record[8], record[9], record[10], record[11]) + url_key(record[4])
+
+
+def _link_fields(record):
+    """(usuario_id, link, multimedia_id, fecha, autor, descripcion, tema) de un registro"""
+    return (record[1], record[4], record[5], record[7], record[8], record[9], record[10])
+
+
+def _sent_key(row_id):
+    """Clave de replica_estado con el id remoto de un link local ya enviado"""
+    return f"alta:{row_id}"
+
+
+@dataclass
+class SyncStatus:
+    """Estado de la sincronización, para mostrarlo en la interfaz"""
+    online: bool = False
+    pending: int = 0
+    conflicts: int = 0
+    last_sync: float = None
+    error: str = None
+
+    def summary(self):
+        if self.online:
+            text = f"Sincronizado {time.strftime('%H:%M:%S', time.localtime(self.last_sync))}"
+        elif self.error:
+            text = "Sin conexión con el servidor"
+        else:
+            text = "Sincronizando..."
+        if self.pending:
+            text += f" · {self.pending} cambios por enviar"
+        if self.conflicts:
+            text += f" · {self.conflicts} conflictos"
+        return text
+
+
+@dataclass
+class SyncReport:
+    """Resultado de un ciclo de sincronización"""
+    pushed: int = 0
+    pulled: int = 0
+    conflicts: list = field(default_factory=list)  # (tabla, fila_id, motivo)
+
+    def summary(self):
+        return (f"Enviados: {self.pushed}\nRecibidos: {self.pulled}\n"
+                f"Conflictos: {len(self.conflicts)}")
+
+
+class ReplicaDatabase(SQLiteDatabase):
+    """Base SQLite local que se sincroniza con una base remota en segundo plano
+
+    ``remote_factory`` abre la base del servidor (normalmente ``MySQLDatabase``);
+    se vuelve a intentar en cada ciclo mientras el servidor no responda.
+    """
+
+    def __init__(self, path=REPLICA_PATH, remote_factory=None, interval=10.0, batch_size=500,
+                 pool_size=5):
+        super().__init__(path, pool_size)
+        self.remote_factory = remote_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.remote = None
+        self.status = SyncStatus()
+        self._feed = None
+        self._sync_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._migrate()
+        if self._schema_version() < REPLICA_SCHEMA:
+            self._create_replica_schema()
+        self.status = replace(self.status, pending=self.pending(), conflicts=self.conflict_count())
+
+    def _schema_version(self):
+        try:
+            return int(self._state('esquema') or 0)
+        except DatabaseError:
+            return 0  # Réplica nueva: todavía no existe replica_estado
+
+    def _create_replica_schema(self):
+        with self.transaction() as cursor:
+            for sql in REPLICA_TABLES:
+                cursor.execute(sql)
+            self._create_outbox_triggers(cursor)
+            # Los links nuevos de la réplica no chocan con los ids del servidor
+            cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = 'links'",
+                           (LOCAL_ID_BASE,))
+            cursor.execute("""INSERT INTO sqlite_sequence (name, seq) SELECT 'links', %s
+                              WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'links')""",
+                           (LOCAL_ID_BASE,))
+            self._set_state(cursor, 'esquema', REPLICA_SCHEMA)
+
+    @staticmethod
+    def _create_outbox_triggers(cursor):
+        for name, table, event, operation, row_id, version in OUTBOX_TRIGGERS:
+            cursor.execute(
+                f"""CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table}
+                    WHEN NOT EXISTS (SELECT 1 FROM replica_estado WHERE clave = '{APPLYING}')
+                    BEGIN
+                        INSERT INTO outbox (tabla, fila_id, operacion, version_base)
+                        VALUES ('{table}', {row_id}, {operation}, {version});
+                    END"""
+            )
+
+    def _migrate(self):
+        if self._schema_version() == 0:
+            migrate(self)  # Réplica nueva: todavía no hay triggers del outbox
+            return
+        if self._state(APPLYING) is not None:
+            # Quedó de un cierre inesperado: los cambios locales no se anotarían
+            self.execute("DELETE FROM replica_estado WHERE clave = %s", (APPLYING,))
+        if is_current(self):
+            return
+        # Lo que escriben las migraciones (por ejemplo, completar una columna
+        # nueva) también se hace en el servidor: no se anota en el outbox
+        with self.transaction() as cursor:
+            self._set_state(cursor, APPLYING, 1)
+        try:
+            migrate(self)
+        finally:
+            self.execute("DELETE FROM replica_estado WHERE clave = %s", (APPLYING,))
+
+    def describe(self):
+        return f"Réplica SQLite {self.path}"
+
+    def pending(self):
+        """Cantidad de entradas del outbox que faltan enviar"""
+        return self.fetchone("SELECT COUNT(*) FROM outbox")[0]
+
+    def conflict_count(self):
+        return self.fetchone("SELECT COUNT(*) FROM sync_conflictos")[0]
+
+    def _state(self, key):
+        row = self.fetchone("SELECT valor FROM replica_estado WHERE clave = %s", (key,))
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_state(cursor, key, value):
+        cursor.execute("""INSERT INTO replica_estado (clave, valor) VALUES (%s, %s)
+                          ON CONFLICT (clave) DO UPDATE SET valor = excluded.valor""",
+                       (key, str(value)))
+
+    @contextmanager
+    def _applying(self):
+        """Transacción local cuyas escrituras no se anotan en el outbox"""
+        with self.transaction() as cursor:
+            cursor.execute("INSERT INTO replica_estado (clave, valor) VALUES (%s, '1')", (APPLYING,))
+            yield cursor
+            cursor.execute("DELETE FROM replica_estado WHERE clave = %s", (APPLYING,))
+
+    @staticmethod
+    def _pending_keys(cursor):
+        cursor.execute("SELECT DISTINCT tabla, fila_id FROM outbox")
+        return set(cursor.fetchall())
+
+    # ------------------------------------------------------------------
+    # Hilo de sincronización
+
+    def start_sync(self):
+        """Inicia el hilo que sincroniza cada ``interval`` segundos"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="replica-sync", daemon=True)
+            self._thread.start()
+
+    def sync_soon(self):
+        """Adelanta el próximo ciclo (por ejemplo, después de guardar)"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except DatabaseError:
+                pass  # Ya quedó en self.status; se reintenta en el próximo ciclo
+            except Exception:
+                log.exception("Error inesperado al sincronizar la réplica")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+        if self.remote is not None:
+            self.remote.close()
+            self.remote = None
+        super().close()
+
+    # ------------------------------------------------------------------
+    # Un ciclo de sincronización
+
+    def _connect_remote(self):
+        if self.remote is None:
+            if self.remote_factory is None:
+                raise DatabaseError("La réplica no tiene configurado un servidor")
+            remote = self.remote_factory()
+            try:
+                migrate(remote)
+            except BaseException:
+                remote.close()
+                raise
+            self.remote = remote
+            self._feed = None
+        return self.remote
+
+    def sync(self):
+        """Envía el outbox, trae los cambios del servidor y devuelve un SyncReport
+
+        Si el servidor no responde se lanza ``DatabaseError`` y el outbox queda
+        como estaba, para el próximo intento.
+        """
+        with self._sync_lock:
+            report = SyncReport()
+            try:
+                remote = self._connect_remote()
+                if self._state('seq') is None:
+                    report.pulled += self._copy_all(remote)
+                self._push(remote, report)
+                report.pulled += self._pull(remote)
+            except DatabaseError as e:
+                self.status = replace(self.status, online=False, error=str(e),
+                                      pending=self.pending())
+                raise
+            self.status = SyncStatus(online=True, pending=self.pending(),
+                                     conflicts=self.conflict_count(), last_sync=time.time())
+            return report
+
+    def _copy_all(self, remote):
+        """Primera sincronización: copia todo el servidor a la réplica"""
+        # Lo que cambie durante la copia se vuelve a aplicar desde esta secuencia
+        seq = remote.last_change_seq()
+        copied = 0
+        with self._applying() as cursor:
+            pending = self._pending_keys(cursor)
+            cursor.executemany(UPSERT_MULTIMEDIA, remote.get_multimedia_types())
+            users = [user for user in remote.get_users() if ('usuario', user[0]) not in pending]
+            cursor.executemany(UPSERT_USER, users)
+            copied += len(users)
+            for records in remote.iter_links(chunk_size=self.batch_size):
+                links = [_link_values(r) for r in records if ('links', str(r[0])) not in pending]
+                cursor.executemany(UPSERT_LINK, links)
+                sync_link_temas(cursor, self, [(values[0], values[7]) for values in links])
+                copied += len(links)
+            self._set_state(cursor, 'seq', seq)
+        return copied
+
+    def _pull(self, remote):
+        """Aplica en la réplica los cambios del servidor; devuelve cuántas filas cambiaron"""
+        if self._feed is None:
+            self._feed = ChangeFeed(remote, seq=int(self._state('seq')), limit=self.batch_size,
+                                    reload_on_overflow=False)
+        pulled = 0
+        while True:
+            before = self._feed.seq
+            changes = self._feed.poll()
+            if changes.seq != before:
+                with self._applying() as cursor:
+                    pulled += self._apply_remote(cursor, changes.users, changes.links,
+                                                 changes.deleted_users, changes.deleted_links)
+                    self._set_state(cursor, 'seq', changes.seq)
+            if not changes.overflow or changes.seq == before:
+                return pulled
+
+    def _apply_remote(self, cursor, users, links, deleted_users=(), deleted_links=()):
+        # Las filas con cambios locales sin enviar se resuelven al enviarlas
+        pending = self._pending_keys(cursor)
+        applied = 0
+        for user in users:
+            if ('usuario', user[0]) not in pending:
+                applied += self._upsert(cursor, UPSERT_USER, user[:5])
+        temas = []
+        for record in links:
+            if ('links', str(record[0])) not in pending:
+                if self._upsert(cursor, UPSERT_LINK, _link_values(record)):
+                    applied += 1
+                    temas.append((record[0], record[10]))
+        sync_link_temas(cursor, self, temas)
+        for user_id in deleted_users:
+            if ('usuario', user_id) not in pending:
+                cursor.execute("DELETE FROM usuario WHERE id = %s", (user_id,))
+                applied += 1
+        for link_id in deleted_links:
+            if ('links', str(link_id)) not in pending:
+                cursor.execute("DELETE FROM links WHERE id = %s", (link_id,))
+                applied += 1
+        return applied
+
+    def _upsert(self, cursor, sql, values):
+        try:
+            cursor.execute(sql, values)
+            return 1
+        except self.driver_integrity_errors as e:
+            # Por ejemplo, un email que en la réplica todavía tiene otro usuario:
+            # se corrige cuando llegue el cambio de ese otro usuario
+            log.warning("No se pudo aplicar la fila %s del servidor: %s", values[0], e)
+            return 0
+
+    def _push(self, remote, report):
+        while True:
+            entries = self.fetchall(
+                "SELECT id, tabla, fila_id, operacion, version_base FROM outbox ORDER BY id LIMIT %s",
+                (self.batch_size,)
+            )
+            if not entries:
+                return
+            # Varias entradas de la misma fila se envían juntas: primera y
+            # última operación, versión base de la primera y última entrada
+            groups = {}
+            for entry_id, table, row_id, operation, version in entries:
+                group = groups.get((table, row_id))
+                if group is None:
+                    groups[(table, row_id)] = [operation, operation, version, entry_id]
+                else:
+                    group[1], group[3] = operation, entry_id
+            # En el orden de la última entrada: un link se envía después del
+            # usuario nuevo al que pertenece
+            for (table, row_id), (first, last, version, last_id) in sorted(
+                    groups.items(), key=lambda item: item[1][3]):
+                self._push_row(remote, report, table, row_id, first, last, version, last_id)
+            if len(entries) < self.batch_size:
+                return
+
+    def _push_row(self, remote, report, table, row_id, first, last, version, last_id):
+        users = table == 'usuario'
+        row = self.get_user(row_id) if users else self.get_link(int(row_id))
+        new_id = None
+        remote_version = None
+        conflict = None
+        try:
+            if first == 'I' and (last == 'D' or row is None):
+                # Creada y borrada: sólo hay que borrarla si el alta llegó al servidor
+                sent = None if users else self._state(_sent_key(row_id))
+                if sent is not None:
+                    remote.delete_link(int(sent), version=1)
+            elif last == 'D' or row is None:
+                # Como las modificaciones: si otro cliente la cambió en el
+                # servidor, gana el servidor y la fila vuelve a la réplica
+                if users:
+                    deleted = remote.delete_user(row_id, version=version)
+                else:
+                    deleted = remote.delete_link(int(row_id), version=version)
+                if not deleted and self._remote_exists(remote, users, row_id):
+                    conflict = "El servidor tiene otra versión de la fila borrada"
+            elif first == 'I':
+                if users:
+                    remote.insert_user(*row[:4])
+                    remote_version = 1
+                else:
+                    new_id, remote_version = self._push_new_link(remote, row_id, row, last)
+                    if remote_version is None:
+                        conflict = "El servidor tiene otra versión de la fila"
+            else:
+                if users:
+                    updated = remote.update_user(*row[:4], version=version)
+                else:
+                    updated = remote.update_link(int(row_id), *_link_fields(row), version=version)
+                if updated:
+                    remote_version = version + 1
+                else:
+                    conflict = "El servidor tiene otra versión de la fila"
+        except IntegrityError as e:
+            conflict = str(e)
+
+        with self._applying() as cursor:
+            cursor.execute("DELETE FROM outbox WHERE tabla = %s AND fila_id = %s AND id <= %s",
+                           (table, row_id, last_id))
+            if first == 'I' and not users:
+                cursor.execute("DELETE FROM replica_estado WHERE clave = %s", (_sent_key(row_id),))
+            if new_id is not None:
+                self._renumber_link(cursor, int(row_id), new_id)
+                row_id = str(new_id)
+            if conflict is not None:
+                self._record_conflict(cursor, remote, report, table, row_id, row, conflict)
+                return
+            report.pushed += 1
+            if remote_version is not None:
+                # Si la fila volvió a cambiar mientras se enviaba, la próxima
+                # vez se envía contra la versión que quedó en el servidor
+                cursor.execute("UPDATE outbox SET version_base = %s WHERE tabla = %s AND fila_id = %s",
+                               (remote_version, table, row_id))
+                if cursor.rowcount == 0:
+                    cursor.execute(f"UPDATE {table} SET version = %s WHERE id = %s",
+                                   (remote_version, row_id))
+
+    @staticmethod
+    def _remote_exists(remote, users, row_id):
+        if users:
+            return bool(remote.get_users_by_ids([row_id]))
+        return bool(remote.get_links_by_ids([int(row_id)]))
+
+    def _push_new_link(self, remote, row_id, row, last):
+        """Da de alta en el servidor un link creado en la réplica: (id remoto, versión)
+
+        El alta se confirma en el servidor antes de la transacción local que
+        renumera el link y vacía el outbox. Si esa transacción falla, el id
+        remoto queda anotado en replica_estado y el próximo envío lo reutiliza
+        en vez de repetir el alta. Si el link cambió después de aquel envío,
+        se manda como modificación de la versión 1; la versión es None si el
+        servidor ya tiene otra.
+        """
+        sent = self._state(_sent_key(row_id))
+        if sent is None:
+            new_id = remote.insert_link(*_link_fields(row))
+            with self.transaction() as cursor:
+                self._set_state(cursor, _sent_key(row_id), new_id)
+            return new_id, 1
+        new_id = int(sent)
+        if last == 'I':
+            return new_id, 1
+        if not remote.update_link(new_id, *_link_fields(row), version=1):
+            return new_id, None
+        return new_id, 2
+
+    @staticmethod
+    def _renumber_link(cursor, local_id, remote_id):
+        cursor.execute("UPDATE links SET id = %s WHERE id = %s", (remote_id, local_id))
+        cursor.execute("UPDATE outbox SET fila_id = %s WHERE tabla = 'links' AND fila_id = %s",
+                       (str(remote_id), str(local_id)))
+        # El trigger del registro de cambios anota sólo el id nuevo: las
+        # vistas abiertas tienen que quitar el id local
+        cursor.execute("INSERT INTO cambios (tabla, fila_id, operacion) VALUES ('links', %s, 'D')",
+                       (local_id,))
+
+    def _record_conflict(self, cursor, remote, report, table, row_id, row, reason):
+        """Gana el servidor: se guardan los valores locales y se trae su fila"""
+        log.warning("Conflicto al sincronizar %s %s: %s", table, row_id, reason)
+        cursor.execute("INSERT INTO sync_conflictos (tabla, fila_id, datos_locales, motivo) "
+                       "VALUES (%s, %s, %s, %s)",
+                       (table, row_id, json.dumps(row, ensure_ascii=False, default=str), reason))
+        report.conflicts.append((table, row_id, reason))
+        if table == 'usuario':
+            users = remote.get_users_by_ids([row_id])
+            self._apply_remote(cursor, users, [], deleted_users=[] if users else [row_id])
+        else:
+            links = remote.get_links_by_ids([int(row_id)])
+            self._apply_remote(cursor, [], links, deleted_links=[] if links else [int(row_id)])
@@ -0,0 +1,333 @@
+"""Operaciones sobre usuarios y links, independientes de la interfaz.
+
+``LinksService`` reúne la validación y el CRUD que usan la ventana de Tk
+(``main.py``) y la API HTTP (``api.py``). No conoce widgets ni mensajes de
+diálogo: los problemas se informan con excepciones de ``ServiceError`` cuyo
+texto se puede mostrar tal cual al usuario.
+"""
+from datetime import date, datetime
+
+from database import LINK_COLUMNS, USER_COLUMNS, IntegrityError
+from estadisticas import load_stats
+from temas import MAX_TEXT, edit_temas, format_temas
+
+
+class ServiceError(Exception):
+    """Error de una operación que se puede mostrar al usuario"""
+
+
+class ValidationError(ServiceError):
+    """Los datos recibidos no son válidos"""
+
+
+class NotFoundError(ServiceError):
+    """El usuario o link indicado no existe"""
+
+
+class ConflictError(ServiceError):
+    """La operación choca con datos existentes (clave o email repetidos)"""
+
+
+class VersionConflictError(ConflictError):
+    """Otro cliente modificó la fila después de que se leyó
+
+    ``current`` tiene los valores que hay ahora en la base (la fila de usuario
+    o el registro completo del link), para mostrarlos y decidir qué guardar.
+    """
+
+    def __init__(self, message, current):
+        super().__init__(message)
+        self.current = current
+
+
+class DuplicateLinkError(ConflictError):
+    """El usuario ya guardó ese link, quizás escrito de otra forma (ver duplicates.py)
+
+    ``existing`` es el registro completo del link que ya estaba.
+    """
+
+    def __init__(self, message, existing):
+        super().__init__(message)
+        self.existing = existing
+
+
+class ArchivedLinkError(ConflictError):
+    """El link está en el archivo (ver archivo.py): se puede leer pero no modificar"""
+
+
+def parse_date(value, default=None):
+    """Valida una fecha AAAA-MM-DD; una fecha vacía devuelve ``default``"""
+    value = _clean(value)
+    if not value:
+        return default
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValidationError("Las fechas deben tener el formato AAAA-MM-DD") from None
+    return value
+
+
+def link_to_dict(record):
+    """Registro completo de un link como diccionario, con la fecha como texto"""
+    link = dict(zip(LINK_COLUMNS, record))
+    if isinstance(link['fecha'], date):
+        link['fecha'] = link['fecha'].isoformat()
+    if isinstance(link['archivado'], datetime):
+        link['archivado'] = link['archivado'].isoformat(sep=' ')
+    return link
+
+
+def user_to_dict(user):
+    return dict(zip(USER_COLUMNS, user))
+
+
+def _clean(value):
+    """Texto sin espacios en los extremos; None es un texto vacío
+
+    Los valores llegan de la interfaz o de JSON: un número u otro tipo donde
+    se espera texto es un error de validación, no un AttributeError.
+    """
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise ValidationError("Los campos de texto y las fechas deben enviarse como texto")
+    return value.strip()
+
+
+def _multimedia_id(multimedia_id):
+    if not multimedia_id:
+        raise ValidationError("Debe seleccionar un tipo de multimedia")
+    try:
+        return int(multimedia_id)
+    except (TypeError, ValueError):
+        raise ValidationError("Tipo de multimedia inválido") from None
+
+
+def _link_ids(link_ids):
+    """Ids de links sin repetir, para las operaciones sobre varios links"""
+    try:
+        link_ids = sorted({int(link_id) for link_id in link_ids})
+    except (TypeError, ValueError):
+        raise ValidationError("Id de link inválido") from None
+    if not link_ids:
+        raise ValidationError("Seleccione al menos un link")
+    return link_ids
+
+
+def _check_temas_length(tema):
+    if len(tema) > MAX_TEXT:
+        raise ValidationError(f"Los temas no pueden ocupar más de {MAX_TEXT} caracteres")
+    return tema
+
+
+class LinksService:
+    """CRUD de usuarios y links sobre una ``Database``
+
+    Los métodos son bloqueantes: la interfaz los ejecuta en ``TkExecutor`` y
+    la API HTTP en los hilos de ``AsyncLinksService``.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    # ------------------------------------------------------------------
+    # Usuarios
+
+    def list_users(self):
+        return self.db.get_users()
+
+    def get_user(self, user_id):
+        user = self.db.get_user(user_id)
+        if user is None:
+            raise NotFoundError("Usuario no encontrado")
+        return user
+
+    def _user_fields(self, user_id, nombre, apellido, email):
+        user_id, nombre, apellido = _clean(user_id), _clean(nombre), _clean(apellido)
+        if not user_id or not nombre or not apellido:
+            raise ValidationError("Los campos ID, Nombre y Apellido son obligatorios")
+        # Un email vacío se guarda como NULL para no chocar con el UNIQUE
+        return user_id, nombre, apellido, _clean(email) or None
+
+    def create_user(self, user_id, nombre, apellido, email=None):
+        """Crea un usuario y devuelve la fila (id, nombre, apellido, email, version)"""
+        user = self._user_fields(user_id, nombre, apellido, email)
+        try:
+            self.db.insert_user(*user)
+        except IntegrityError:
+            raise ConflictError("El ID o Email ya existe en la base de datos") from None
+        return user + (1,)
+
+    def update_user(self, user_id, nombre, apellido, email=None, version=None):
+        """Actualiza un usuario y devuelve la fila guardada
+
+        ``version`` es la que tenía la fila al leerla: si otro cliente la
+        modificó desde entonces se lanza ``VersionConflictError`` y no se
+        guarda nada. Sin ``version`` se sobrescribe siempre.
+        """
+        user = self._user_fields(user_id, nombre, apellido, email)
+        try:
+            updated = self.db.update_user(*user, version=version)
+        except IntegrityError:
+            raise ConflictError("El Email ya existe en la base de datos") from None
+        if updated == 0:
+            current = self.get_user(user[0])
+            raise VersionConflictError("Otro usuario modificó este usuario", current)
+        return self.get_user(user[0])
+
+    def delete_user(self, user_id):
+        """Elimina un usuario junto con sus links"""
+        if not _clean(user_id):
+            raise ValidationError("Seleccione un usuario para eliminar")
+        if self.db.delete_user(user_id) == 0:
+            raise NotFoundError("Usuario no encontrado")
+
+    def delete_users(self, user_ids):
+        """Elimina varios usuarios con sus links en una transacción; devuelve cuántos había"""
+        user_ids = sorted({_clean(user_id) for user_id in user_ids} - {''})
+        if not user_ids:
+            raise ValidationError("Seleccione al menos un usuario")
+        return self.db.delete_users(user_ids)
+
+    def user_links_among(self, user_id, link_ids):
+        """Registros de los links de ``link_ids`` que pertenecen al usuario"""
+        return self.db.get_user_links_among(user_id, link_ids)
+
+    # ------------------------------------------------------------------
+    # Links
+
+    def list_multimedia_types(self):
+        return self.db.get_multimedia_types()
+
+    def list_temas(self):
+        """(id, nombre, cantidad de links) de cada tema en uso"""
+        return self.db.get_temas()
+
+    def statistics(self):
+        """Cantidades de links por usuario, tipo y mes (ver estadisticas.py)"""
+        return load_stats(self.db)
+
+    def list_links(self, after_id=None, before_id=None, limit=200, filters=None, sort=None):
+        """Una página de registros completos de links (ver ``Database.get_links_page``)"""
+        return self.db.get_links_page(after_id=after_id, before_id=before_id, limit=limit,
+                                      filters=filters, sort=sort)
+
+    def links_among(self, link_ids):
+        """Registros actuales de los links indicados (los que sigan existiendo)"""
+        return self.db.get_links_by_ids(link_ids)
+
+    def get_link(self, link_id):
+        """Registro completo de un link, archivado o no"""
+        link = self.db.get_link(link_id) or self.db.get_archived_link(link_id)
+        if link is None:
+            raise NotFoundError("Link no encontrado")
+        return link
+
+    def _writable_link(self, link_id):
+        """Registro actual de un link que se puede modificar (NotFoundError o ArchivedLinkError si no)"""
+        link = self.get_link(link_id)
+        if link[14] is not None:
+            raise ArchivedLinkError("El link está archivado: hay que restaurarlo para modificarlo")
+        return link
+
+    def _link_fields(self, user_id, link, multimedia_id, fecha, autor, descripcion, tema):
+        if not _clean(user_id):
+            raise ValidationError("Debe seleccionar un usuario")
+        multimedia_id = _multimedia_id(multimedia_id)
+        link = _clean(link)
+        if not link:
+            raise ValidationError("El campo link es obligatorio")
+        fecha = parse_date(fecha, default=date.today().isoformat())
+        tema = _check_temas_length(format_temas(_clean(tema)))
+        return (_clean(user_id), link, multimedia_id, fecha,
+                _clean(autor), _clean(descripcion), tema)
+
+    def _check_duplicate(self, user_id, link, exclude_id=None):
+        existing = self.db.find_duplicate_link(user_id, link, exclude_id)
+        if existing is not None:
+            raise DuplicateLinkError(f"El usuario ya tiene guardado ese link (ID {existing[0]})", existing)
+
+    def create_link(self, user_id, link, multimedia_id, fecha=None, autor='', descripcion='', tema=''):
+        """Crea un link y devuelve su registro completo, tal como quedó guardado"""
+        fields = self._link_fields(user_id, link, multimedia_id, fecha, autor, descripcion, tema)
+        self._check_duplicate(fields[0], fields[1])
+        try:
+            link_id = self.db.insert_link(*fields)
+        except IntegrityError:
+            raise ValidationError("El usuario o el tipo de multimedia no existen") from None
+        return self.get_link(link_id)
+
+    def update_link(self, link_id, user_id, link, multimedia_id, fecha=None, autor='',
+                    descripcion='', tema='', version=None):
+        """Actualiza todos los campos de un link y devuelve su registro completo
+
+        ``version`` funciona igual que en ``update_user``.
+        """
+        if not link_id:
+            raise ValidationError("Seleccione un link para actualizar")
+        fields = self._link_fields(user_id, link, multimedia_id, fecha, autor, descripcion, tema)
+        self._check_duplicate(fields[0], fields[1], exclude_id=link_id)
+        try:
+            updated = self.db.update_link(link_id, *fields, version=version)
+        except IntegrityError:
+            raise ValidationError("El usuario o el tipo de multimedia no existen") from None
+        if updated == 0:
+            current = self._writable_link(link_id)
+            raise VersionConflictError("Otro usuario modificó este link", current)
+        return self.get_link(link_id)
+
+    def delete_link(self, link_id):
+        if not link_id:
+            raise ValidationError("Seleccione un link para eliminar")
+        if self.db.delete_link(link_id) == 0:
+            self._writable_link(link_id)
+
+    # ------------------------------------------------------------------
+    # Operaciones sobre varios links (una transacción para todos)
+
+    def delete_links(self, link_ids):
+        """Elimina varios links; devuelve cuántos había"""
+        return self.db.delete_links(_link_ids(link_ids))
+
+    def change_links_multimedia(self, link_ids, multimedia_id):
+        """Cambia el tipo de multimedia de varios links y devuelve sus registros completos"""
+        link_ids = _link_ids(link_ids)
+        multimedia_id = _multimedia_id(multimedia_id)
+        try:
+            self.db.update_links_multimedia(link_ids, multimedia_id)
+        except IntegrityError:
+            raise ValidationError("El tipo de multimedia no existe") from None
+        return self.links_among(link_ids)
+
+    def change_links_owner(self, link_ids, user_id):
+        """Pasa varios links a otro usuario y devuelve sus registros completos
+
+        Si el usuario ya tiene guardado alguno de esos links no se mueve ninguno.
+        """
+        link_ids = _link_ids(link_ids)
+        user_id = _clean(user_id)
+        if not user_id:
+            raise ValidationError("Debe seleccionar un usuario")
+        conflicts = self.db.get_owner_conflicts(link_ids, user_id)
+        if conflicts:
+            shown = ", ".join(str(link_id) for link_id in conflicts[:10])
+            if len(conflicts) > 10:
+                shown += "..."
+            raise ConflictError(f"El usuario ya tiene guardados {len(conflicts)} de esos links (IDs {shown})")
+        try:
+            self.db.update_links_owner(link_ids, user_id)
+        except IntegrityError:
+            raise ValidationError("El usuario no existe") from None
+        return self.links_among(link_ids)
+
+    def edit_links_temas(self, link_ids, add='', remove=''):
+        """Agrega y quita temas (texto separado por comas) en varios links
+
+        Devuelve los registros completos de los links. Si a alguno no le
+        entran los temas no se modifica ninguno.
+        """
+        link_ids = _link_ids(link_ids)
+        if not format_temas(add) and not format_temas(remove):
+            raise ValidationError("Indique los temas a agregar o quitar")
+        self.db.update_links_temas(link_ids, lambda tema: _check_temas_length(edit_temas(tema, add, remove)))
+        return self.links_among(link_ids)
@@ -0,0 +1,114 @@
+"""Ejecución de consultas fuera del hilo principal de Tk.
+
+Tk no es seguro entre hilos: los widgets sólo pueden tocarse desde el hilo que
+ejecuta ``mainloop``. ``TkExecutor`` corre las funciones en un pool de hilos,
+deja los resultados en una cola y los entrega en el hilo de Tk mediante un
+``root.after`` que revisa esa cola mientras haya trabajo pendiente.
+"""
+import queue
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from functools import partial
+
+
+class TkExecutor:
+    """Pool de hilos cuyos resultados se entregan en el hilo de Tk.
+
+    Las tareas enviadas con la misma ``key`` se reemplazan entre sí: al enviar
+    una nueva, la anterior se cancela (si todavía no empezó) o su resultado se
+    descarta al llegar. Así, por ejemplo, un ``load_links`` reciente invalida
+    uno anterior que siga en curso.
+
+    ``on_busy(bool)`` se llama cuando empieza o termina el trabajo pendiente,
+    para mostrar un indicador de carga. Las tareas enviadas con ``quiet=True``
+    (consultas periódicas en segundo plano) no encienden el indicador.
+    """
+
+    def __init__(self, root, max_workers=4, poll_ms=25, on_busy=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy = on_busy
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._results = queue.SimpleQueue()
+        self._current = {}  # key -> future vigente
+        self._pending = 0
+        self._quiet = 0  # cuántas de las pendientes son silenciosas
+        self._polling = None
+
+    @property
+    def busy(self):
+        return self._pending > self._quiet
+
+    def submit(self, fn, *args, on_success=None, on_error=None, key=None, quiet=False, **kwargs):
+        """Ejecuta ``fn(*args, **kwargs)`` en el pool
+
+        ``on_success(resultado)`` u ``on_error(excepcion)`` se llaman luego en el
+        hilo de Tk, salvo que la tarea haya sido reemplazada por otra con la
+        misma ``key``.
+        """
+        if key is not None:
+            self.cancel(key)
+
+        future = self._pool.submit(partial(fn, *args, **kwargs))
+        if key is not None:
+            self._current[key] = future
+
+        self._set_pending(self._pending + 1, self._quiet + quiet)
+        future.add_done_callback(
+            lambda f: self._results.put((f, key, on_success, on_error, quiet))
+        )
+        return future
+
+    def cancel(self, key):
+        """Invalida la tarea en curso con esa clave, si la hay"""
+        future = self._current.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def shutdown(self):
+        self._current.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._polling is not None:
+            self.root.after_cancel(self._polling)
+            self._polling = None
+
+    def _set_pending(self, pending, quiet):
+        was_busy = self.busy
+        self._pending = pending
+        self._quiet = quiet
+        if was_busy != self.busy and self.on_busy is not None:
+            self.on_busy(self.busy)
+        if self._pending and self._polling is None:
+            self._polling = self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        """Entrega en el hilo de Tk los resultados que ya llegaron"""
+        self._polling = None
+        while True:
+            try:
+                future, key, on_success, on_error, quiet = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            self._set_pending(self._pending - 1, self._quiet - quiet)
+            if key is not None:
+                if self._current.get(key) is not future:
+                    continue  # Reemplazada por una tarea más reciente
+                del self._current[key]
+
+            try:
+                result = future.result()
+            except CancelledError:
+                continue
+            except Exception as e:
+                if on_error is not None:
+                    on_error(e)
+                else:
+                    self.root.report_callback_exception(type(e), e, e.__traceback__)
+                continue
+
+            if on_success is not None:
+                on_success(result)
+
+        if self._pending and self._polling is None:
+            self._polling = self.root.after(self.poll_ms, self._poll)
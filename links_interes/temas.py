@@ -0,0 +1,116 @@
+"""Temas de los links: varios por link, en las tablas ``tema`` y ``link_tema``.
+
+En el formulario (y en ``links.tema``) los temas de un link se escriben como
+texto separado por comas. Ese texto se sigue guardando tal cual para mostrarlo,
+pero las búsquedas por tema usan la tabla ``link_tema`` (migración 9), con
+índices en los dos sentidos: (link_id, tema_id) y (tema_id, link_id).
+
+``tema.cantidad`` es la cantidad de links de cada tema. La mantienen triggers
+sobre ``link_tema``, así que la lista de temas con sus cantidades es una
+lectura de la tabla ``tema``, sin GROUP BY sobre links. Los links borrados
+descuentan sus temas con un trigger BEFORE DELETE (en MySQL el borrado en
+cascada no dispara triggers).
+
+Quien escribe ``links.tema`` llama a ``sync_link_temas`` en la misma
+transacción; ``Database`` lo hace en sus altas y modificaciones.
+"""
+
+# Largo máximo del nombre de un tema (tema.nombre) y del texto en links.tema
+MAX_NAME = 100
+MAX_TEXT = 255
+
+# Sentencias IN con a lo sumo esta cantidad de valores
+_CHUNK = 500
+
+
+def parse_temas(text):
+    """Nombres de tema de un texto separado por comas, sin repetir (sin distinguir mayúsculas)"""
+    names = {}
+    for name in (text or '').split(','):
+        name = ' '.join(name.split())[:MAX_NAME]
+        if name:
+            names.setdefault(name.casefold(), name)
+    return list(names.values())
+
+
+def format_temas(text):
+    """Texto canónico de ``links.tema``: los temas separados por ", " """
+    return ', '.join(parse_temas(text))
+
+
+def edit_temas(text, add='', remove=''):
+    """Texto de temas con los de ``add`` agregados al final y los de ``remove`` quitados"""
+    removed = {name.casefold() for name in parse_temas(remove)}
+    names = [name for name in parse_temas(text) if name.casefold() not in removed]
+    return format_temas(', '.join(names + parse_temas(add)))
+
+
+def _chunks(values):
+    values = list(values)
+    for i in range(0, len(values), _CHUNK):
+        yield values[i:i + _CHUNK]
+
+
+def _tema_ids(cursor, db, names):
+    """{nombre.casefold(): id}, creando los temas que falten"""
+    if not names:
+        return {}
+    cursor.executemany(db.upsert_sql("tema", ("nombre",), "nombre"), [(name,) for name in names])
+    ids = {}
+    for chunk in _chunks(names):
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(f"SELECT id, nombre FROM tema WHERE nombre IN ({placeholders})", chunk)
+        for tema_id, nombre in cursor.fetchall():
+            ids[nombre.casefold()] = tema_id
+    for name in names:
+        if name.casefold() not in ids:
+            # La intercalación de MySQL tampoco distingue acentos: "Música" ya
+            # existe como "musica"
+            cursor.execute("SELECT id FROM tema WHERE nombre = %s", (name,))
+            ids[name.casefold()] = cursor.fetchone()[0]
+    return ids
+
+
+def sync_link_temas(cursor, db, rows):
+    """Deja en ``link_tema`` los temas del texto de cada link; ``rows`` es [(link_id, tema)]
+
+    Sólo se insertan y borran las diferencias, así que los contadores de los
+    temas que no cambiaron no se tocan.
+    """
+    wanted = {link_id: parse_temas(text) for link_id, text in rows}
+    if not wanted:
+        return
+    names = {name.casefold(): name for link_names in wanted.values() for name in link_names}
+    ids = _tema_ids(cursor, db, list(names.values()))
+    target = {(link_id, ids[name.casefold()]) for link_id, link_names in wanted.items()
+              for name in link_names}
+
+    existing = set()
+    for chunk in _chunks(wanted):
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(f"SELECT link_id, tema_id FROM link_tema WHERE link_id IN ({placeholders})",
+                       chunk)
+        existing.update(tuple(row) for row in cursor.fetchall())
+
+    removed = existing - target
+    added = target - existing
+    if removed:
+        cursor.executemany("DELETE FROM link_tema WHERE link_id = %s AND tema_id = %s", sorted(removed))
+    if added:
+        cursor.executemany("INSERT INTO link_tema (link_id, tema_id) VALUES (%s, %s)", sorted(added))
+
+
+def fill_link_temas(cursor, db, after_id=0, batch_size=1000):
+    """Sincroniza ``link_tema`` de los links con id mayor que ``after_id``
+
+    Lo usan la migración 9, para los links existentes, y las altas masivas,
+    que no conocen los ids que se asignaron a cada fila.
+    """
+    while True:
+        cursor.execute("SELECT id, tema FROM links WHERE id > %s AND tema <> '' "
+                       "ORDER BY id LIMIT %s", (after_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        sync_link_temas(cursor, db, rows)
+        after_id = rows[-1][0]
@@ -0,0 +1,439 @@
+"""Widgets auxiliares para la aplicación de Links de Interés."""
+
+from bisect import bisect_left, insort
+from functools import partial
+from tkinter import ttk
+
+from instrumentation import monitor
+
+
+class TreeviewSync:
+    """Mapa id de fila -> ítem de un ttk.Treeview para refrescos incrementales.
+
+    Permite insertar, actualizar o eliminar filas sueltas sin vaciar y volver
+    a poblar todo el Treeview. El id de la fila es su primer valor. Guarda
+    cada fila tal como se recibió (``row``); el Treeview sólo tiene el texto
+    que muestra, en el que un valor nulo es una celda vacía.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._items = {}
+        self._values = {}
+
+    @staticmethod
+    def key(row_id):
+        # Los valores que devuelve Tk son cadenas: normalizamos las claves
+        return str(row_id)
+
+    def __contains__(self, row_id):
+        return self.key(row_id) in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def item_id(self, row_id):
+        return self._items.get(self.key(row_id))
+
+    def row_id(self, item):
+        return self.tree.item(item, 'values')[0]
+
+    def row(self, row_id):
+        """La fila con ese id tal como se insertó, con sus tipos y sus None"""
+        return self._values.get(self.key(row_id))
+
+    @staticmethod
+    def display(row):
+        # Tk mostraría None como el texto "None"
+        return tuple('' if value is None else value for value in row)
+
+    def clear(self):
+        if self._items:
+            self.tree.delete(*self._items.values())
+        self._items.clear()
+        self._values.clear()
+
+    def insert(self, row, index='end'):
+        """Inserta una fila nueva en la posición indicada"""
+        key = self.key(row[0])
+        item = self.tree.insert('', index, values=self.display(row))
+        self._items[key] = item
+        self._values[key] = tuple(row)
+        return item
+
+    def update(self, row):
+        """Actualiza una fila existente sólo si sus valores cambiaron"""
+        key = self.key(row[0])
+        row = tuple(row)
+        if self._values.get(key) != row:
+            self.tree.item(self._items[key], values=self.display(row))
+            self._values[key] = row
+
+    def upsert(self, row, index='end'):
+        if row[0] in self:
+            self.update(row)
+        else:
+            self.insert(row, index)
+
+    def remove(self, row_id):
+        key = self.key(row_id)
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._values.pop(key, None)
+            self.tree.delete(item)
+
+    def remove_items(self, items):
+        """Elimina varios ítems del Treeview de una sola vez"""
+        for item in items:
+            key = self.key(self.row_id(item))
+            self._items.pop(key, None)
+            self._values.pop(key, None)
+        if items:
+            self.tree.delete(*items)
+
+    def sync(self, rows):
+        """Deja el Treeview igual a ``rows`` tocando sólo las filas que difieren"""
+        wanted = [self.key(row[0]) for row in rows]
+        for key in set(self._items) - set(wanted):
+            self.remove(key)
+
+        previous = ''
+        for index, row in enumerate(rows):
+            key = wanted[index]
+            if key in self._items:
+                item = self._items[key]
+                self.update(row)
+                # Comparar con el vecino es O(1); tree.index() recorre la lista
+                if self.tree.prev(item) != previous:
+                    self.tree.move(item, '', index)
+            else:
+                item = self.insert(row, index)
+            previous = item
+
+
+class PagedTreeview:
+    """Vista paginada (virtualizada) sobre un ttk.Treeview.
+
+    En lugar de insertar todas las filas de la tabla, mantiene en el Treeview
+    sólo una ventana de filas alrededor de la zona visible (como máximo
+    ``page_size * max_pages`` filas). Las páginas se piden con paginación por
+    clave (keyset) a partir del id de la primera o la última fila cargada, de
+    modo que cada consulta cuesta lo mismo sin importar en qué parte de la
+    tabla estemos.
+
+    ``fetch_page(after_id=None, before_id=None, limit=...)`` debe devolver las
+    filas en el orden de la vista (el ``LinkSort`` activo, con el id como
+    desempate) y con el id como primer valor. Si se
+    indica un ``executor`` (``tasks.TkExecutor``) las páginas se piden en
+    segundo plano y una recarga invalida las páginas que sigan en camino.
+    ``name`` identifica la vista en el registro de tiempos (``instrumentation``).
+    """
+
+    def __init__(self, tree, fetch_page, page_size=200, max_pages=3, prefetch=0.25,
+                 executor=None, on_error=None, name="tabla"):
+        self.tree = tree
+        self.name = name
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.max_rows = page_size * max_pages
+        self.prefetch = prefetch
+        self.executor = executor
+        self.on_error = on_error
+        self.scrollbar = None
+        self.rows = TreeviewSync(tree)
+        # Falso cuando la consulta tiene filtros u otro orden: entonces no se
+        # puede saber dónde (ni si) mostrar una fila nueva sin consultar
+        self.id_ordered = True
+
+        self._has_before = False
+        self._has_after = False
+        self._pending = None
+        self._loading = False
+
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    def attach_scrollbar(self, scrollbar):
+        """Asocia la barra de desplazamiento vertical del Treeview"""
+        self.scrollbar = scrollbar
+        scrollbar.configure(command=self.tree.yview)
+
+    def reload(self):
+        """Vacía la vista y carga la primera página"""
+        self._request('reload', limit=self.page_size)
+
+    def loaded_ids(self):
+        """Ids de las filas cargadas en la ventana"""
+        return [int(self._row_id(item)) for item in self.tree.get_children()]
+
+    def upsert(self, row):
+        """Inserta o actualiza una fila sin recargar la ventana
+
+        Las filas nuevas sólo se muestran si la vista está ordenada por id sin
+        filtros (``id_ordered``) y su id cae dentro de la ventana cargada (o al
+        final, cuando la ventana llega hasta el último link).
+        """
+        self.upsert_many([row])
+
+    def upsert_many(self, rows):
+        """Como ``upsert`` para varias filas, recorriendo la ventana una sola vez"""
+        new_rows = []
+        for row in rows:
+            if row[0] in self.rows:
+                self.rows.update(row)
+            else:
+                new_rows.append(row)
+        if not new_rows or not self.id_ordered:
+            return
+
+        ids = [int(self._row_id(item)) for item in self.tree.get_children()]
+        first, last = (ids[0], ids[-1]) if ids else (None, None)
+        for row in sorted(new_rows, key=lambda row: int(row[0])):
+            row_id = int(row[0])
+            if first is not None and row_id < first and self._has_before:
+                continue
+            if last is not None and row_id > last and self._has_after:
+                continue
+            index = bisect_left(ids, row_id)
+            self.rows.insert(row, index)
+            ids.insert(index, row_id)
+
+    def remove(self, row_id):
+        self.rows.remove(row_id)
+
+    def remove_many(self, row_ids):
+        """Quita varias filas de la ventana con un solo borrado en el Treeview"""
+        items = [self.rows.item_id(row_id) for row_id in row_ids]
+        self.rows.remove_items([item for item in items if item is not None])
+
+    def _row_id(self, item):
+        return self.rows.row_id(item)
+
+    def _insert_rows(self, rows, index):
+        for row in rows:
+            self.rows.insert(row, index)
+
+    def _on_scroll(self, first, last):
+        """Recibe los cambios de la vista y programa la carga de páginas vecinas"""
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+
+        first, last = float(first), float(last)
+        if last >= 1.0 - self.prefetch and self._has_after:
+            self._schedule('after')
+        elif first <= self.prefetch and self._has_before:
+            self._schedule('before')
+
+    def _schedule(self, direction):
+        # yscrollcommand se invoca mientras Tk redibuja; modificar el árbol
+        # desde ahí provoca llamadas recursivas, así que lo diferimos.
+        if self._pending is None and not self._loading:
+            self._pending = self.tree.after_idle(self._load_more, direction)
+
+    def _anchor(self):
+        """Devuelve el primer ítem visible para poder restaurar la posición"""
+        children = self.tree.get_children()
+        if not children:
+            return None
+        first = self.tree.yview()[0]
+        return children[min(int(round(first * len(children))), len(children) - 1)]
+
+    def _restore(self, anchor):
+        if anchor is None or not self.tree.exists(anchor):
+            return
+        total = len(self.tree.get_children())
+        self.tree.yview_moveto(self.tree.index(anchor) / total)
+
+    def _load_more(self, direction):
+        self._pending = None
+        children = self.tree.get_children()
+        if not children or self._loading:
+            return
+
+        if direction == 'after':
+            self._request('after', after_id=self._row_id(children[-1]), limit=self.page_size)
+        else:
+            self._request('before', before_id=self._row_id(children[0]), limit=self.page_size)
+
+    def _request(self, direction, **kwargs):
+        self._loading = True
+        if self.executor is None:
+            self._apply(direction, self.fetch_page(**kwargs))
+            return
+
+        # Todas las cargas comparten la clave: una recarga invalida las
+        # páginas que todavía no llegaron.
+        self.executor.submit(self.fetch_page, key=self, **kwargs,
+                             on_success=partial(self._apply, direction),
+                             on_error=self._failed)
+
+    def _failed(self, error):
+        self._loading = False
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def _apply(self, direction, rows):
+        """Incorpora al Treeview una página recibida"""
+        self._loading = False
+        with monitor.timed(f"{self.name}: página ({direction})", len(rows)):
+            self._apply_rows(direction, rows)
+
+    def _apply_rows(self, direction, rows):
+        if direction == 'reload':
+            self.rows.clear()
+            self._insert_rows(rows, 'end')
+            self._has_before = False
+            self._has_after = len(rows) == self.page_size
+            return
+
+        anchor = self._anchor()
+        if direction == 'after':
+            self._insert_rows(rows, 'end')
+            self._has_after = len(rows) == self.page_size
+            # Recortar por arriba si la ventana creció demasiado
+            overflow = len(self.tree.get_children()) - self.max_rows
+            if overflow > 0:
+                self.rows.remove_items(self.tree.get_children()[:overflow])
+                self._has_before = True
+        else:
+            self._insert_rows(reversed(rows), 0)
+            self._has_before = len(rows) == self.page_size
+            # Recortar por abajo
+            overflow = len(self.tree.get_children()) - self.max_rows
+            if overflow > 0:
+                self.rows.remove_items(self.tree.get_children()[-overflow:])
+                self._has_after = True
+
+        self._restore(anchor)
+
+
+class ComboIndex:
+    """Índice de las opciones de un combobox.
+
+    Guarda, para cada id, su texto y su posición en la lista de opciones, de
+    modo que elegir la opción de un id es O(1) en lugar de recorrer la lista
+    comparando prefijos (que además confundía "12" con "123 - ..."). Mantiene
+    también una lista ordenada de términos de búsqueda para filtrar por
+    prefijo con búsqueda binaria.
+
+    ``label(row)`` arma el texto de una fila y ``terms(row)`` los términos por
+    los que se la puede buscar. El id es el primer valor de la fila.
+    """
+
+    def __init__(self, label, terms=None):
+        self._make_label = label
+        self._make_terms = terms or (lambda row: (label(row),))
+        self.rebuild(())
+
+    def rebuild(self, rows):
+        """Reconstruye el índice completo a partir de las filas"""
+        self._labels = {}
+        self._ids = {}
+        self._terms = {}
+        self._keys = []
+        for row in rows:
+            self._add(row)
+        self._keys.sort()
+        self._positions = None
+
+    def _add(self, row):
+        row_id, label = row[0], self._make_label(row)
+        self._labels[row_id] = label
+        self._ids[label] = row_id
+        self._terms[row_id] = [term.casefold() for term in self._make_terms(row) if term]
+        self._keys.extend((term, row_id) for term in self._terms[row_id])
+
+    def _discard_keys(self, row_id):
+        for term in self._terms.pop(row_id, ()):
+            i = bisect_left(self._keys, (term, row_id))
+            if i < len(self._keys) and self._keys[i] == (term, row_id):
+                del self._keys[i]
+
+    def upsert(self, row):
+        """Agrega o actualiza una fila sin reconstruir todo el índice"""
+        row_id = row[0]
+        if row_id in self._labels:
+            self._discard_keys(row_id)
+            self._ids.pop(self._labels[row_id], None)
+        else:
+            self._positions = None
+        label = self._make_label(row)
+        self._labels[row_id] = label
+        self._ids[label] = row_id
+        self._terms[row_id] = [term.casefold() for term in self._make_terms(row) if term]
+        for term in self._terms[row_id]:
+            insort(self._keys, (term, row_id))
+
+    def remove(self, row_id):
+        if row_id in self._labels:
+            self._discard_keys(row_id)
+            self._ids.pop(self._labels.pop(row_id), None)
+            self._positions = None
+
+    def __len__(self):
+        return len(self._labels)
+
+    def labels(self):
+        return list(self._labels.values())
+
+    def label(self, row_id):
+        return self._labels.get(row_id)
+
+    def id_for(self, label):
+        """Devuelve el id de la opción con ese texto, o None"""
+        return self._ids.get(label)
+
+    def position(self, row_id):
+        """Posición de la opción de ese id en ``labels()``, o None"""
+        if self._positions is None:
+            self._positions = {row_id: i for i, row_id in enumerate(self._labels)}
+        return self._positions.get(row_id)
+
+    def search(self, text, limit=50):
+        """Devuelve hasta ``limit`` textos cuyos términos empiezan con ``text``"""
+        prefix = text.strip().casefold()
+        if not prefix:
+            return self.labels()[:limit]
+
+        found = []
+        seen = set()
+        i = bisect_left(self._keys, (prefix,))
+        while i < len(self._keys) and len(found) < limit:
+            term, row_id = self._keys[i]
+            if not term.startswith(prefix):
+                break
+            if row_id not in seen:
+                seen.add(row_id)
+                found.append(self._labels[row_id])
+            i += 1
+        return found
+
+
+class SearchableCombobox(ttk.Combobox):
+    """Combobox editable que filtra sus opciones a medida que se escribe.
+
+    En lugar de cargar todas las opciones en la lista desplegable, muestra
+    sólo las primeras ``limit`` coincidencias de un ``ComboIndex``.
+    """
+
+    def __init__(self, master, index, limit=50, **kwargs):
+        super().__init__(master, **kwargs)
+        self.index = index
+        self.limit = limit
+        self.bind('<KeyRelease>', self._on_key)
+
+    def refresh(self):
+        """Vuelve a filtrar las opciones con el texto actual"""
+        self['values'] = self.index.search(self.get(), self.limit)
+
+    def selected_id(self):
+        """Id de la opción elegida, o None si el texto no es una opción válida"""
+        return self.index.id_for(self.get())
+
+    def select(self, row_id):
+        label = self.index.label(row_id)
+        self.set(label if label is not None else '')
+
+    def _on_key(self, event):
+        if event.keysym in ('Up', 'Down', 'Return', 'Escape', 'Tab'):
+            return
+        self.refresh()
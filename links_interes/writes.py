@@ -0,0 +1,213 @@
+"""Camino de las escrituras de una fila: sentencias preparadas y commits agrupados.
+
+Guardar, actualizar o eliminar un usuario o un link ejecuta siempre el mismo
+texto SQL (``Database.INSERT_LINK``, ``UPDATE_LINK``...). Analizarlo en cada
+llamada es trabajo repetido:
+- En SQLite, cada conexión guarda las sentencias ya preparadas por texto
+  (``SQLITE_CACHED_STATEMENTS``); basta con que el texto sea siempre el mismo.
+- En MySQL, ``StatementCursor`` ejecuta esas sentencias con cursores
+  ``prepared=True`` que ``PreparedStatements`` conserva por conexión, así el
+  servidor las prepara una vez por conexión y no en cada escritura.
+
+Además, cada escritura hace su propio commit, y en SQLite con WAL (o en MySQL
+con ``innodb_flush_log_at_trx_commit=1``) el commit es lo más caro. Con
+``WriteQueue`` un solo hilo hace las escrituras: las que llegan de otros
+hilos mientras confirma un grupo forman el grupo siguiente, que se hace en
+una sola transacción, cada una dentro de su SAVEPOINT. Si una falla, sólo se
+deshace esa y su error le llega a quien la pidió, igual que sin la cola.
+Quien escribe espera a que su grupo haga commit, así que al volver la fila ya
+está guardada. Con una escritura a la vez no hay nada que agrupar y la cola no
+agrega espera, salvo que se pida una ventana (``window``) para juntar más.
+
+La cola se activa con ``LINKS_WRITE_WINDOW_MS`` (ver database.py) o con
+``--write-window`` en cli.py; con 0 se agrupa sin esperar.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+log = logging.getLogger(__name__)
+
+
+class PreparedStatements:
+    """Cursores preparados de MySQL por conexión y por texto SQL
+
+    mysql.connector prepara la sentencia en el servidor la primera vez que un
+    cursor ``prepared=True`` la ejecuta y la reutiliza mientras ese cursor
+    reciba el mismo objeto ``str`` (compara con ``is``), así que se guarda un
+    cursor por sentencia y se ejecuta siempre con el texto registrado. Las
+    conexiones se identifican por ``connection_id``: al reconectar cambia y
+    los cursores viejos se olvidan. Cada conexión la usa un hilo a la vez
+    (la toma del pool), así que sólo el mapa de conexiones necesita un lock.
+    """
+
+    def __init__(self, statements, max_connections=16):
+        self.statements = {sql: sql for sql in statements}
+        self.max_connections = max_connections
+        self._cursors = OrderedDict()  # connection_id -> {sql: cursor}
+        self._lock = threading.Lock()
+
+    def cursor(self, conn, sql):
+        """(cursor preparado, texto registrado) para ``sql`` en ``conn``, o None si no es una sentencia fija"""
+        sql = self.statements.get(sql)
+        if sql is None:
+            return None
+        key = conn.connection_id
+        with self._lock:
+            cursors = self._cursors.get(key)
+            if cursors is None:
+                cursors = self._cursors[key] = {}
+                # Las más viejas son de conexiones que ya se cerraron; no se
+                # cierran sus cursores porque podrían estar en uso
+                while len(self._cursors) > self.max_connections:
+                    self._cursors.popitem(last=False)
+            else:
+                self._cursors.move_to_end(key)
+        cursor = cursors.get(sql)
+        if cursor is None:
+            cursor = cursors[sql] = conn.cursor(prepared=True)
+        return cursor, sql
+
+
+class StatementCursor:
+    """Cursor que ejecuta las sentencias fijas con su cursor preparado y el resto con ``cursor``
+
+    ``rowcount``, ``lastrowid`` y las lecturas corresponden a la última
+    sentencia, la haya ejecutado uno u otro cursor.
+    """
+
+    def __init__(self, cursor, statements, conn):
+        self._cursor = cursor
+        self._last = cursor
+        self._statements = statements
+        self._conn = conn
+
+    def execute(self, sql, params=()):
+        prepared = self._statements.cursor(self._conn, sql)
+        if prepared is None:
+            self._last = self._cursor
+        else:
+            self._last, sql = prepared
+        return self._last.execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        self._last = self._cursor
+        return self._cursor.executemany(sql, seq_of_params)
+
+    def close(self):
+        # Los cursores preparados quedan para la próxima transacción
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._last, name)
+
+    def __iter__(self):
+        return iter(self._last)
+
+
+class _Write:
+    __slots__ = ('fn', 'args', 'future')
+
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+        self.future = Future()
+
+
+class WriteQueue:
+    """Hace en una sola transacción las escrituras que se acumulan mientras confirma la anterior
+
+    Con ``window`` mayor que 0, además, espera hasta ``window`` segundos desde
+    la primera escritura del grupo a que lleguen otras. ``submit(fn, *args)``
+    devuelve un ``Future`` con el resultado de ``fn(cursor, *args)``, que se
+    completa cuando la transacción del grupo hizo commit. Un grupo tiene a lo
+    sumo ``max_batch`` escrituras.
+    """
+
+    SAVEPOINT = "escritura"
+
+    def __init__(self, db, window=0.0, max_batch=100):
+        self.db = db
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.writes = 0
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="escrituras", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args):
+        write = _Write(fn, args)
+        if self._closed:
+            write.future.set_exception(RuntimeError("La cola de escrituras está cerrada"))
+        else:
+            self._queue.put(write)
+        return write.future
+
+    def close(self):
+        """Termina las escrituras pendientes y detiene el hilo"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            try:
+                # Lo que ya está en la cola entra aunque la ventana sea 0
+                write = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if write is None:
+                self._queue.put(None)
+                break
+            batch.append(write)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._apply(batch)
+            except Exception:
+                log.exception("Error inesperado en la cola de escrituras")
+
+    def _apply(self, batch):
+        results = []
+        try:
+            with self.db.transaction() as cursor:
+                # Sin una transacción abierta, en SQLite el primer SAVEPOINT
+                # la abriría y su RELEASE haría commit
+                cursor.execute("BEGIN")
+                for write in batch:
+                    cursor.execute(f"SAVEPOINT {self.SAVEPOINT}")
+                    try:
+                        result = write.fn(cursor, *write.args)
+                    except Exception as e:
+                        cursor.execute(f"ROLLBACK TO SAVEPOINT {self.SAVEPOINT}")
+                        cursor.execute(f"RELEASE SAVEPOINT {self.SAVEPOINT}")
+                        write.future.set_exception(self.db.translate_error(e))
+                        continue
+                    cursor.execute(f"RELEASE SAVEPOINT {self.SAVEPOINT}")
+                    results.append((write, result))
+        except Exception as e:
+            # El commit (o un SAVEPOINT) falló: no se guardó ninguna del grupo
+            for write in batch:
+                if not write.future.done():
+                    write.future.set_exception(e)
+            return
+        self.batches += 1
+        self.writes += len(batch)
+        for write, result in results:
+            write.future.set_result(result)
@@ -1 +1,42 @@
-# prueba del 18 de marzo de 2025
\ No newline at end of file
+# prueba del 18 de marzo de 2025
+"""Prueba de la base de Links de Interés con el motor SQLite, sin servidor MySQL.
+
+    python test_python_sqlite/main.py [archivo.db]
+
+Sin argumentos usa una base en memoria que se descarta al terminar.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'links_interes'))
+
+from database import SQLiteDatabase  # noqa: E402
+from filters import LinkFilter  # noqa: E402
+from migrations import migrate  # noqa: E402
+from service import LinksService  # noqa: E402
+
+
+def main(path=':memory:'):
+    db = SQLiteDatabase(path)
+    try:
+        print(f"Base: {db.describe()}; migraciones aplicadas: {migrate(db) or 'ninguna'}")
+        service = LinksService(db)
+
+        if db.get_user('ana') is None:
+            service.create_user('ana', 'Ana', 'García', 'ana@ejemplo.com')
+            service.create_link('ana', 'https://docs.python.org/3/library/sqlite3.html', 4,
+                                '2025-03-18', 'Python', 'Documentación del módulo sqlite3', 'python')
+            service.create_link('ana', 'https://www.sqlite.org/wal.html', 4,
+                                '2025-03-18', 'SQLite', 'Write-Ahead Logging', 'sql')
+
+        for user in service.list_users():
+            print("Usuario:", user)
+        for record in service.list_links():
+            print("Link:", record[0], record[4], record[10])
+        print("Búsqueda 'sqlite':", [r[4] for r in service.list_links(filters=LinkFilter(texto="sqlite"))])
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -0,0 +1,34 @@
+"""Fixtures de las pruebas: una base SQLite en un directorio temporal, sin servidor MySQL."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'links_interes'))
+
+from database import SQLiteDatabase  # noqa: E402
+from migrations import migrate  # noqa: E402
+from service import LinksService  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SQLiteDatabase(str(tmp_path / "links.db"))
+    migrate(database)
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def service(db):
+    return LinksService(db)
+
+
+@pytest.fixture
+def ana(service):
+    """Un usuario con links de 2024-01-01 a 2024-01-10, uno por día"""
+    service.create_user('ana', 'Ana', 'García', 'ana@ejemplo.com')
+    for day in range(1, 11):
+        service.create_link('ana', f'https://ejemplo.com/{day}', 1, f'2024-01-{day:02d}',
+                            'Autor', f'Descripción {day}', 'python' if day % 2 else 'sql')
+    return 'ana'
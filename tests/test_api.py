@@ -0,0 +1,155 @@
+"""API HTTP en proceso, sobre una base SQLite: códigos de error y GET condicional."""
+import asyncio
+import http.client
+import json
+import threading
+
+import pytest
+
+from api import start_server
+from archivo import archive_links
+from database import SQLiteDatabase
+from service import LinksService
+
+
+class Client:
+    def __init__(self, port):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+
+    def request(self, method, path, body=None, headers=None):
+        payload = json.dumps(body) if body is not None else None
+        self.connection.request(method, path, body=payload, headers=headers or {})
+        response = self.connection.getresponse()
+        data = response.read()
+        return response.status, dict(response.getheaders()), json.loads(data) if data else None
+
+
+async def _wait(tasks):
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.fixture
+def serve():
+    """Atiende la API de un LinksService en un puerto libre; devuelve un Client"""
+    running = []
+
+    def start(service):
+        loop = asyncio.new_event_loop()
+        server, api = loop.run_until_complete(start_server(service, port=0, workers=2))
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        client = Client(server.sockets[0].getsockname()[1])
+        running.append((loop, server, api, thread, client))
+        return client
+
+    yield start
+    for loop, server, api, thread, client in running:
+        client.connection.close()
+        loop.call_soon_threadsafe(server.close)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        # Las conexiones que quedaron abiertas terminan antes de cerrar el bucle
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(_wait(tasks))
+        api.close()
+        loop.close()
+
+
+@pytest.fixture
+def client(serve, service, ana):
+    return serve(service)
+
+
+def test_create_and_get(client):
+    status, _, user = client.request('POST', '/usuarios', {'id': 'bob', 'nombre': 'Bob', 'apellido': 'Paz'})
+    assert status == 201 and user == {'id': 'bob', 'nombre': 'Bob', 'apellido': 'Paz',
+                                      'email': None, 'version': 1}
+    status, _, link = client.request('POST', '/links', {'usuario_id': 'bob', 'link': 'https://bob.com',
+                                                        'multimedia_id': 2, 'fecha': '2024-03-01'})
+    assert status == 201 and link['usuario_id'] == 'bob'
+    assert client.request('GET', f"/links/{link['id']}")[2] == link
+
+
+@pytest.mark.parametrize("method, path, body", [
+    ('POST', '/usuarios', {'id': 5, 'nombre': 'Cinco', 'apellido': 'Número'}),
+    ('POST', '/usuarios', {'id': 'bob', 'nombre': 'Bob'}),
+    ('POST', '/links', {'usuario_id': 'ana', 'link': 'https://x.com', 'multimedia_id': 1, 'fecha': 5}),
+    ('POST', '/links', {'usuario_id': 'ana', 'link': 'https://x.com', 'multimedia_id': 1,
+                        'fecha': '2024-13-01'}),
+    ('PUT', '/links/1', {'usuario_id': 'ana', 'link': 'https://x.com', 'multimedia_id': 1,
+                         'version': 'uno'}),
+    ('GET', '/links?orden=nada', None),
+    ('GET', '/links?limit=muchos', None),
+])
+def test_bad_requests_are_400(client, method, path, body):
+    status, _, payload = client.request(method, path, body)
+    assert status == 400, payload
+    assert payload['error']
+
+
+def test_not_json_body_is_400(client):
+    client.connection.request('POST', '/usuarios', body=b'{no es json')
+    response = client.connection.getresponse()
+    response.read()
+    assert response.status == 400
+
+
+@pytest.mark.parametrize("method, path", [
+    ('GET', '/usuarios/nadie'), ('GET', '/links/999'), ('DELETE', '/links/999'), ('GET', '/nada'),
+])
+def test_missing_is_404(client, method, path):
+    assert client.request(method, path)[0] == 404
+
+
+def test_conflicts_are_409(client):
+    status, _, payload = client.request('POST', '/usuarios', {'id': 'ana', 'nombre': 'Otra', 'apellido': 'Ana'})
+    assert status == 409
+
+    # El usuario ya guardó esa URL, escrita de otra forma
+    status, _, payload = client.request('POST', '/links', {'usuario_id': 'ana', 'multimedia_id': 1,
+                                                           'link': 'http://EJEMPLO.com/1/'})
+    assert status == 409 and payload['existente']['id'] == 1
+
+    _, _, link = client.request('GET', '/links/2')
+    fields = {'usuario_id': 'ana', 'link': 'https://ejemplo.com/2', 'multimedia_id': 1,
+              'fecha': '2024-01-02', 'version': link['version']}
+    assert client.request('PUT', '/links/2', fields)[0] == 200
+    status, _, payload = client.request('PUT', '/links/2', fields)
+    assert status == 409 and payload['actual']['version'] == link['version'] + 1
+
+
+def test_archived_link_is_409(client, service):
+    archive_links(service.db, '2024-01-05')
+    status, _, link = client.request('GET', '/links/2')
+    assert status == 200 and link['archivado'] is not None
+    fields = {'usuario_id': 'ana', 'link': 'https://ejemplo.com/2', 'multimedia_id': 1,
+              'fecha': '2024-01-02', 'version': link['version']}
+    status, _, payload = client.request('PUT', '/links/2', fields)
+    assert status == 409 and 'archivado' in payload['error']
+    assert client.request('DELETE', '/links/2')[0] == 409
+    assert service.get_link(2)[14] is not None
+
+
+def test_database_unavailable_is_503(serve, tmp_path):
+    client = serve(LinksService(SQLiteDatabase(str(tmp_path / 'no_existe' / 'links.db'))))
+    status, _, payload = client.request('GET', '/usuarios')
+    assert status == 503 and payload == {'error': 'Base de datos no disponible'}
+
+
+def test_conditional_get(client):
+    status, headers, page = client.request('GET', '/links?limit=3&tema=python')
+    assert status == 200 and [link['id'] for link in page['links']] == [1, 3, 5]
+    etag = headers['ETag']
+
+    status, headers, payload = client.request('GET', '/links?limit=3&tema=python',
+                                              headers={'If-None-Match': etag})
+    assert status == 304 and payload is None and headers['ETag'] == etag
+
+    # Un cambio en la página da otra ETag
+    client.request('DELETE', '/links/3')
+    status, headers, page = client.request('GET', '/links?limit=3&tema=python',
+                                           headers={'If-None-Match': etag})
+    assert status == 200 and headers['ETag'] != etag
+    assert [link['id'] for link in page['links']] == [1, 5, 7]
@@ -0,0 +1,105 @@
+"""Archivo de links viejos: mover a links_archivo, leer con el filtro y restaurar."""
+import argparse
+
+import pytest
+
+from archivo import archive_links, restore_links
+from cli import cmd_archive
+from estadisticas import load_stats, rebuild_stats
+from filters import LinkFilter, LinkSort
+from replica import ReplicaDatabase
+from service import ArchivedLinkError
+
+
+def rows(db, table):
+    return db.fetchall(f"SELECT id, usuario_id, link, fecha, tema, version FROM {table} ORDER BY id")
+
+
+def temas(db):
+    return [row[1:] for row in db.get_temas()]
+
+
+def summary(db):
+    stats = load_stats(db)
+    return stats.total, stats.by_user, stats.by_type, stats.by_month
+
+
+def test_archive_and_restore_round_trip(db, ana):
+    before = rows(db, "links")
+    report = archive_links(db, '2024-01-05', batch_size=3)
+    assert (report.moved, report.batches) == (4, 2)
+    assert [row[0] for row in rows(db, "links")] == [5, 6, 7, 8, 9, 10]
+    assert [row[0] for row in rows(db, "links_archivo")] == [1, 2, 3, 4]
+    # Volver a ejecutarlo no mueve nada
+    assert archive_links(db, '2024-01-05').moved == 0
+
+    report = restore_links(db, '2024-01-01', batch_size=3)
+    assert report.moved == 4
+    assert rows(db, "links") == before
+    assert rows(db, "links_archivo") == []
+    assert temas(db) == [('python', 5), ('sql', 5)]
+
+
+def test_archive_filter_pages_both_tables(service, ana):
+    archive_links(service.db, '2024-01-05')
+    assert [link[0] for link in service.list_links()] == [5, 6, 7, 8, 9, 10]
+    everything = LinkFilter(archivo=True)
+    for sort in (None, LinkSort('fecha', True), LinkSort('autor')):
+        expected = [link[0] for link in service.list_links(limit=100, filters=everything, sort=sort)]
+        assert sorted(expected) == list(range(1, 11))
+        # Página a página, hacia adelante y hacia atrás, se ven en el mismo orden
+        pages = service.list_links(limit=3, filters=everything, sort=sort)
+        while len(pages) % 3 == 0:
+            page = service.list_links(after_id=pages[-1][0], limit=3, filters=everything, sort=sort)
+            if not page:
+                break
+            pages += page
+        assert [link[0] for link in pages] == expected
+        backwards = service.list_links(before_id=expected[-1], limit=4, filters=everything, sort=sort)
+        assert [link[0] for link in backwards] == expected[-5:-1]
+    archived = service.list_links(filters=LinkFilter(archivo=True, tema='python'))
+    assert [(link[0], link[14] is not None) for link in archived] == \
+        [(1, True), (3, True), (5, False), (7, False), (9, False)]
+
+
+def test_stats_and_temas_match_rebuild(service, ana):
+    db = service.db
+    archive_links(db, '2024-01-05')
+    # Las estadísticas cuentan los archivados; los temas, no
+    assert temas(db) == [('python', 3), ('sql', 3)]
+    maintained = summary(db)
+    assert maintained[0] == 10
+    service.delete_user(ana)
+    service.create_user('ana', 'Ana', 'García', None)
+    for day in (1, 2):
+        service.create_link('ana', f'https://ejemplo.com/{day}', 1, f'2023-06-0{day}', '', '', 'web')
+    archive_links(db, '2024-01-01')
+    restore_links(db, '2023-06-02')
+    maintained = summary(db), temas(db)
+    rebuild_stats(db)
+    assert (summary(db), temas(db)) == maintained
+    assert maintained[1] == [('web', 1)]
+
+
+def test_archived_links_are_read_only(service, ana):
+    archive_links(service.db, '2024-01-05')
+    assert service.get_link(1)[14] is not None
+    with pytest.raises(ArchivedLinkError):
+        service.update_link(1, ana, 'https://ejemplo.com/1', 1, '2024-01-01', '', '', '')
+    with pytest.raises(ArchivedLinkError):
+        service.delete_link(1)
+
+
+def test_replica_refuses_to_archive(tmp_path, db, ana, capsys):
+    replica = ReplicaDatabase(str(tmp_path / "replica.db"), remote_factory=lambda: db)
+    try:
+        replica.sync()
+        args = argparse.Namespace(before='2024-01-05', older_than=None, restore=False,
+                                  batch_size=500, pause=0.0)
+        assert cmd_archive(args, replica) == 1
+        assert 'servidor' in capsys.readouterr().err
+        assert replica.fetchone("SELECT COUNT(*) FROM links") == (10,)
+        assert replica.pending() == 0
+    finally:
+        replica.remote = None
+        replica.close()
@@ -0,0 +1,34 @@
+"""Datos sintéticos y mediciones de bench.py, con tamaños chicos."""
+import bench
+from database import SQLiteDatabase
+from migrations import migrate
+
+
+def generated_links(path, steps):
+    db = SQLiteDatabase(str(path))
+    try:
+        migrate(db)
+        start = 0
+        for size in steps:
+            bench.generate(db, size, start=start, batch_size=300, seed=7)
+            start = size
+        return db.fetchall("SELECT id, usuario_id, link, multimedia_id, fecha, autor, descripcion, tema "
+                           "FROM links ORDER BY id")
+    finally:
+        db.close()
+
+
+def test_generate_does_not_depend_on_previous_sizes(tmp_path):
+    at_once = generated_links(tmp_path / "una.db", [1500])
+    in_steps = generated_links(tmp_path / "tandas.db", [500, 1200, 1500])
+    assert len(at_once) == 1500
+    assert at_once == in_steps
+
+
+def test_run_measures_several_sizes(db):
+    result = bench.run(db, sizes=[200, 100], repeat=20, treeview=False, progress=lambda message: None)
+    assert list(result["tamaños"]) == ['100', '200']
+    for size in result["tamaños"].values():
+        assert size["operaciones"]["guardar_link_concurrente"]["filas"] == 20 * bench.WRITERS
+    # Las mediciones no dejan links: cada tamaño tiene los que dice
+    assert db.fetchone("SELECT COUNT(*) FROM links") == (200,)
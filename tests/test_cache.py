@@ -0,0 +1,33 @@
+"""LRUCache: descarte por antigüedad y reemplazo por versión."""
+from cache import LRUCache
+
+
+def version(record):
+    return record[1]
+
+
+def test_put_many_keeps_newer_version():
+    cache = LRUCache()
+    cache.put(1, ('guardado', 3))
+    cache.put_many([(1, ('página vieja', 2)), (2, ('otro', 1))], version=version)
+    assert cache.get(1) == ('guardado', 3)
+    assert cache.get(2) == ('otro', 1)
+
+    cache.put_many([(1, ('misma versión', 3))], version=version)
+    assert cache.get(1) == ('misma versión', 3)
+
+
+def test_put_many_without_version_replaces():
+    cache = LRUCache()
+    cache.put(1, ('guardado', 3))
+    cache.put_many([(1, ('página', 1))])
+    assert cache.get(1) == ('página', 1)
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put(1, 'a')
+    cache.put(2, 'b')
+    cache.get(1)
+    cache.put(3, 'c')
+    assert 2 not in cache and 1 in cache and 3 in cache
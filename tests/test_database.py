@@ -0,0 +1,139 @@
+"""Capa de datos sobre SQLite: migraciones, altas, bajas, modificaciones y paginación."""
+import pytest
+
+from database import IntegrityError, SQLiteDatabase
+from filters import LinkFilter, LinkSort
+from migrations import LATEST_VERSION, is_current, migrate
+
+
+def test_migrate_new_database_applies_every_version(tmp_path):
+    db = SQLiteDatabase(str(tmp_path / "nueva.db"))
+    try:
+        assert migrate(db) == list(range(1, LATEST_VERSION + 1))
+        assert is_current(db)
+        # Ya al día: no hay nada que aplicar
+        assert migrate(db) == []
+        assert [row[1] for row in db.get_multimedia_types()] == \
+            ['Audio', 'Video', 'Imagen', 'Documento', 'Otro']
+    finally:
+        db.close()
+
+
+def test_migrate_applies_only_pending_versions(tmp_path):
+    db = SQLiteDatabase(str(tmp_path / "vieja.db"))
+    try:
+        assert migrate(db, target=5) == [1, 2, 3, 4, 5]
+        assert not is_current(db)
+        # Filas escritas con el esquema de la versión 5
+        db.execute("INSERT INTO usuario (id, nombre, apellido) VALUES ('ana', 'Ana', 'García')")
+        db.execute("INSERT INTO links (usuario_id, link, multimedia_id, fecha, tema) "
+                   "VALUES ('ana', 'https://ejemplo.com', 1, '2024-01-01', 'python')")
+        assert migrate(db) == list(range(6, LATEST_VERSION + 1))
+        # Los datos anteriores quedan completos en las columnas nuevas
+        assert db.fetchone("SELECT version, url_hash IS NOT NULL FROM links") == (1, 1)
+        assert [row[1:] for row in db.get_temas()] == [('python', 1)]
+    finally:
+        db.close()
+
+
+def test_user_crud(db):
+    db.insert_user('ana', 'Ana', 'García', 'ana@ejemplo.com')
+    assert db.get_user('ana') == ('ana', 'Ana', 'García', 'ana@ejemplo.com', 1)
+    with pytest.raises(IntegrityError):
+        db.insert_user('ana', 'Otra', 'Ana', None)
+    with pytest.raises(IntegrityError):
+        db.insert_user('otra', 'Otra', 'Ana', 'ana@ejemplo.com')
+
+    assert db.update_user('ana', 'Ana María', 'García', None, version=1) == 1
+    # Con la versión vieja no se pisa el cambio
+    assert db.update_user('ana', 'Ana', 'García', None, version=1) == 0
+    assert db.get_user('ana') == ('ana', 'Ana María', 'García', None, 2)
+
+    assert db.delete_user('ana') == 1
+    assert db.get_user('ana') is None
+
+
+def test_link_crud(db):
+    db.insert_user('ana', 'Ana', 'García', None)
+    link_id = db.insert_link('ana', 'https://ejemplo.com', 1, '2024-01-01', 'Autor', 'Desc', 'python, sql')
+    record = db.get_link(link_id)
+    assert record[:12] == (link_id, 'ana', 'Ana', 'García', 'https://ejemplo.com', 1, 'Audio',
+                           '2024-01-01', 'Autor', 'Desc', 'python, sql', 1)
+
+    assert db.update_link(link_id, 'ana', 'https://otro.com', 2, '2024-02-01', '', '', 'sql',
+                          version=1) == 1
+    assert db.update_link(link_id, 'ana', 'https://otro.com', 2, '2024-02-01', '', '', 'sql',
+                          version=1) == 0
+    assert db.get_link(link_id)[4] == 'https://otro.com'
+    assert [row[1:] for row in db.get_temas()] == [('sql', 1)]
+
+    with pytest.raises(IntegrityError):
+        db.insert_link('nadie', 'https://ejemplo.com', 1, '2024-01-01', '', '', '')
+
+    assert db.delete_link(link_id) == 1
+    assert db.get_link(link_id) is None
+
+
+def test_delete_user_deletes_links(db):
+    db.insert_user('ana', 'Ana', 'García', None)
+    db.insert_link('ana', 'https://ejemplo.com', 1, '2024-01-01', '', '', '')
+    db.delete_user('ana')
+    assert db.fetchone("SELECT COUNT(*) FROM links") == (0,)
+
+
+def _ids(rows):
+    return [row[0] for row in rows]
+
+
+def test_keyset_paging_by_id(db, ana):
+    first = db.get_links_page(limit=4)
+    assert _ids(first) == [1, 2, 3, 4]
+    second = db.get_links_page(after_id=4, limit=4)
+    assert _ids(second) == [5, 6, 7, 8]
+    assert _ids(db.get_links_page(after_id=8, limit=4)) == [9, 10]
+    assert _ids(db.get_links_page(before_id=5, limit=3)) == [2, 3, 4]
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_keyset_paging_by_column_visits_every_link_once(db, ana, descending):
+    sort = LinkSort('tema', descending)
+    expected = _ids(db.get_links_page(limit=100, sort=sort))
+    pages = []
+    after = None
+    while True:
+        page = db.get_links_page(after_id=after, limit=3, sort=sort)
+        pages += _ids(page)
+        if len(page) < 3:
+            break
+        after = page[-1][0]
+    assert pages == expected
+    assert sorted(pages) == list(range(1, 11))
+
+
+def test_paging_with_filters(db, ana):
+    rows = db.get_links_page(limit=100, filters=LinkFilter(tema='python', fecha_desde='2024-01-04'))
+    assert _ids(rows) == [5, 7, 9]
+    assert _ids(db.get_links_page(limit=100, filters=LinkFilter(texto='descripción 3'))) == [3]
+
+
+def test_failed_migration_leaves_nothing_applied(tmp_path, monkeypatch):
+    import migrations
+
+    def broken(cursor, db):
+        # Como la migración 3 si fallara después de crear la tabla nueva
+        cursor.execute("CREATE TABLE links_nueva (id INTEGER PRIMARY KEY)")
+        raise RuntimeError("falla a mitad de la migración")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS",
+                        migrations.MIGRATIONS + (migrations.Migration(99, "Rota", broken),))
+    db = SQLiteDatabase(str(tmp_path / "rota.db"))
+    try:
+        with pytest.raises(RuntimeError):
+            migrate(db, target=99)
+        assert db.fetchall("SELECT name FROM sqlite_master WHERE type = 'table'") == []
+
+        # Sin la migración rota, la siguiente ejecución aplica todo
+        monkeypatch.undo()
+        assert migrate(db) == list(range(1, LATEST_VERSION + 1))
+    finally:
+        db.close()
@@ -0,0 +1,91 @@
+"""URLs normalizadas, búsqueda de links repetidos y unión de repetidos."""
+import pytest
+
+from duplicates import merge_duplicates, normalize_url, url_hash, url_key
+from importer import import_links
+
+
+@pytest.mark.parametrize("url, expected", [
+    # Esquema y host
+    ("http://ejemplo.com/a", "https://ejemplo.com/a"),
+    ("HTTPS://EJEMPLO.com/A", "https://ejemplo.com/A"),
+    ("www.ejemplo.com/a", "https://www.ejemplo.com/a"),
+    ("https://ejemplo.com./a", "https://ejemplo.com/a"),
+    ("https://ñandú.com/", "https://xn--and-6ma2c.com"),
+    # Puertos
+    ("https://ejemplo.com:443/a", "https://ejemplo.com/a"),
+    ("http://ejemplo.com:80/a", "https://ejemplo.com/a"),
+    ("https://ejemplo.com:8080/a", "https://ejemplo.com:8080/a"),
+    # IPv6: los corchetes se conservan
+    ("https://[::1]:8080/x", "https://[::1]:8080/x"),
+    ("http://[2001:DB8::1]/x", "https://[2001:db8::1]/x"),
+    # Ruta
+    ("https://ejemplo.com/a/", "https://ejemplo.com/a"),
+    ("https://ejemplo.com/", "https://ejemplo.com"),
+    ("https://ejemplo.com/a/./b/../c", "https://ejemplo.com/a/c"),
+    ("https://ejemplo.com/%7euser/%2f", "https://ejemplo.com/~user/%2F"),
+    # Parámetros
+    ("https://ejemplo.com/a?utm_source=x&b=2&fbclid=y&a=1", "https://ejemplo.com/a?a=1&b=2"),
+    ("https://ejemplo.com/a?utm_source=x", "https://ejemplo.com/a"),
+    # Fragmento
+    ("https://ejemplo.com/a#seccion", "https://ejemplo.com/a"),
+    ("https://ejemplo.com/#!/ruta", "https://ejemplo.com#!/ruta"),
+    # Lo que no es http o https sólo se recorta
+    ("  ftp://ejemplo.com/a/ ", "ftp://ejemplo.com/a/"),
+    ("mailto:ana@ejemplo.com", "mailto:ana@ejemplo.com"),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_ipv6_does_not_collide_with_other_hosts():
+    assert url_hash("https://[::1]:8080/x") != url_hash("https://[::1:8080]/x")
+
+
+def test_url_key_hashes_the_normalized_url():
+    normalized, digest = url_key("HTTP://Ejemplo.com/a/?utm_medium=mail")
+    assert normalized == "https://ejemplo.com/a"
+    assert len(digest) == 40
+    assert url_hash("https://ejemplo.com/a") == digest
+
+
+def test_insert_links_many_stores_url_hash(db, ana):
+    db.insert_links_many([
+        (ana, 'http://ejemplo.com/1/', 1, '2024-02-01', '', '', ''),
+        (ana, 'https://otro.com/', 1, '2024-02-01', '', '', ''),
+    ])
+    existing = db.get_link_ids_by_hash([url_hash('https://ejemplo.com/1'), url_hash('https://otro.com')])
+    assert existing[(url_hash('https://ejemplo.com/1'), ana)] == 1
+    assert (url_hash('https://otro.com'), ana) in existing
+
+
+def test_import_rejects_links_the_user_already_has(db, ana, tmp_path):
+    path = tmp_path / "links.csv"
+    path.write_text("usuario_id,link,multimedia_id\n"
+                    f"{ana},HTTP://EJEMPLO.COM/1?utm_source=x,1\n"
+                    f"{ana},https://nuevo.com/a,1\n"
+                    f"{ana},https://nuevo.com/a/,1\n", encoding='utf-8')
+    report = import_links(db, str(path))
+    assert (report.inserted, report.rejected) == (1, 2)
+
+
+def test_merge_duplicates(db, service, ana):
+    service.create_user('bea', 'Bea', 'Ruiz', None)
+    # Repetidos de ana que no pasaron por el servicio (que los rechaza)
+    db.insert_links_many([
+        (ana, 'http://ejemplo.com/1/', 1, '2024-02-01', 'Otro autor', 'Otra', 'redes'),
+        (ana, 'https://EJEMPLO.com/1?utm_source=x', 1, '2024-02-02', '', '', 'python, web'),
+        # Otro usuario con la misma URL no es un repetido
+        ('bea', 'https://ejemplo.com/1', 1, '2024-02-01', '', '', ''),
+    ])
+    assert merge_duplicates(db, dry_run=True).removed == 2
+    assert db.fetchone("SELECT COUNT(*) FROM links") == (13,)
+
+    report = merge_duplicates(db)
+    assert (report.groups, report.removed) == (1, 2)
+    assert db.fetchone("SELECT COUNT(*) FROM links") == (11,)
+    # Queda el más antiguo, con los temas de todos
+    kept = db.get_link(1)
+    assert (kept[8], kept[9], kept[10], kept[11]) == ('Autor', 'Descripción 1', 'python, redes, web', 2)
+    assert [row[1:] for row in db.get_temas()] == [('python', 5), ('redes', 1), ('sql', 5), ('web', 1)]
+    assert merge_duplicates(db).removed == 0
@@ -0,0 +1,27 @@
+"""Tablas de resumen mantenidas por triggers, comparadas con un recuento desde cero."""
+from estadisticas import load_stats, rebuild_stats
+
+
+def summary(db):
+    stats = load_stats(db)
+    return stats.total, stats.by_user, stats.by_type, stats.by_month
+
+
+def test_triggers_match_rebuild_after_writes(service, ana):
+    db = service.db
+    service.create_user('bea', 'Bea', 'Ruiz', None)
+    service.create_user('eva', 'Eva', 'Díaz', None)
+    link = service.create_link('bea', 'https://bea.com', 2, '2023-12-31', '', '', '')
+    # Cambian el usuario, el tipo y el mes
+    service.update_link(link[0], ana, 'https://bea.com', 3, '2024-02-15', '', '', '', version=link[11])
+    service.delete_link(2)
+    db.insert_links_many([('eva', f'https://eva.com/{n}', 1, f'2024-0{n + 1}-01', '', '', '')
+                          for n in range(3)])
+    service.change_links_multimedia([3, 4], 4)
+    service.change_links_owner([5, 6], 'bea')
+    service.delete_user('eva')
+
+    maintained = summary(db)
+    assert maintained[0] == db.fetchone("SELECT COUNT(*) FROM links")[0] == 10
+    rebuild_stats(db)
+    assert summary(db) == maintained
@@ -0,0 +1,110 @@
+"""Verificación de links contra un servidor HTTP local."""
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from linkcheck import BROKEN, ERROR, INVALID, OK, REDIRECTED, LinkChecker
+
+
+class Handler(BaseHTTPRequestHandler):
+    # ruta -> (código, Location) para HEAD y GET
+    ROUTES = {
+        '/ok': (200, None),
+        '/redirige': (301, '/ok'),
+        '/falta': (404, None),
+        '/sin-host': (302, 'https://'),
+        '/ciclo': (302, '/ciclo'),
+    }
+
+    def do_HEAD(self):
+        if self.path == '/solo-get':
+            self.reply(405, None)
+        else:
+            self.reply(*self.ROUTES.get(self.path, (404, None)))
+
+    def do_GET(self):
+        if self.path == '/solo-get':
+            self.reply(200, None)
+        else:
+            self.do_HEAD()
+
+    def reply(self, code, location):
+        self.send_response(code)
+        if location is not None:
+            self.send_header('Location', location)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def checker():
+    return LinkChecker(min_interval=0, timeout=5)
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_ok(checker, base_url):
+    status = checker.check_urls([base_url + '/ok'])[base_url + '/ok']
+    assert (status.estado, status.codigo_http, status.url_final) == (OK, 200, base_url + '/ok')
+
+
+def test_head_rejected_falls_back_to_get(checker, base_url):
+    status = checker.check_urls([base_url + '/solo-get'])[base_url + '/solo-get']
+    assert (status.estado, status.codigo_http) == (OK, 200)
+
+
+def test_redirect(checker, base_url):
+    status = checker.check_urls([base_url + '/redirige'])[base_url + '/redirige']
+    assert (status.estado, status.codigo_http, status.url_final) == (REDIRECTED, 200, base_url + '/ok')
+
+
+def test_not_found(checker, base_url):
+    status = checker.check_urls([base_url + '/falta'])[base_url + '/falta']
+    assert (status.estado, status.codigo_http) == (BROKEN, 404)
+
+
+def test_connection_refused(checker):
+    url = f"http://127.0.0.1:{closed_port()}/"
+    status = checker.check_urls([url])[url]
+    assert status.estado == ERROR
+    assert status.detalle
+
+
+def test_redirect_without_host_fails_only_that_link(checker, base_url):
+    urls = [base_url + '/sin-host', base_url + '/ok', 'ftp://ejemplo.com/']
+    results = checker.check_urls(urls)
+    assert results[urls[0]].estado == ERROR
+    assert 'sin host' in results[urls[0]].detalle
+    assert results[urls[1]].estado == OK
+    assert results[urls[2]].estado == INVALID
+
+
+def test_redirect_loop_is_an_error(checker, base_url):
+    status = checker.check_urls([base_url + '/ciclo'])[base_url + '/ciclo']
+    assert status.estado == ERROR
+    assert 'Demasiadas redirecciones' in status.detalle
+
+
+def test_surrounding_spaces_are_ignored(checker, base_url):
+    url = f"  {base_url}/ok \n"
+    status = checker.check_urls([url])[url]
+    assert (status.estado, status.url_final) == (OK, base_url + '/ok')
@@ -0,0 +1,119 @@
+"""Réplica local: envío de los cambios hechos sin conexión al servidor."""
+import pytest
+
+from database import DatabaseError
+from replica import LOCAL_ID_BASE, ReplicaDatabase
+from service import LinksService
+
+
+@pytest.fixture
+def replica(tmp_path, db):
+    database = ReplicaDatabase(str(tmp_path / "replica.db"), remote_factory=lambda: db)
+    database.sync()
+    yield database
+    database.remote = None
+    database.close()
+
+
+def fail_once(monkeypatch):
+    """Hace fallar la próxima renumeración local, después del alta en el servidor"""
+    renumber = ReplicaDatabase._renumber_link
+
+    def failing(cursor, local_id, remote_id):
+        monkeypatch.setattr(ReplicaDatabase, '_renumber_link', staticmethod(renumber))
+        raise DatabaseError("disco lleno")
+    monkeypatch.setattr(ReplicaDatabase, '_renumber_link', staticmethod(failing))
+
+
+def test_new_link_gets_server_id(replica, db, ana):
+    replica.sync()
+    local = LinksService(replica).create_link(ana, 'https://nuevo.com', 1, '2024-02-01', '', '', '')
+    assert local[0] >= LOCAL_ID_BASE
+    replica.sync()
+    remote = db.find_duplicate_link(ana, 'https://nuevo.com')
+    assert replica.get_link(local[0]) is None
+    assert replica.get_link(remote[0])[4] == 'https://nuevo.com'
+    assert replica.pending() == 0
+
+
+def test_failed_local_step_does_not_repeat_insert(replica, db, ana, monkeypatch):
+    replica.sync()
+    local = LinksService(replica).create_link(ana, 'https://nuevo.com', 1, '2024-02-01', '', '', '')
+    fail_once(monkeypatch)
+    with pytest.raises(DatabaseError):
+        replica.sync()
+    assert replica.pending() == 1
+    replica.sync()
+    assert db.fetchone("SELECT COUNT(*) FROM links WHERE link = 'https://nuevo.com'") == (1,)
+    remote = db.find_duplicate_link(ana, 'https://nuevo.com')
+    assert replica.get_link(local[0]) is None
+    assert replica.get_link(remote[0]) is not None
+    assert replica.pending() == 0
+
+
+def test_retry_sends_changes_made_after_the_insert(replica, db, ana, monkeypatch):
+    replica.sync()
+    service = LinksService(replica)
+    local = service.create_link(ana, 'https://nuevo.com', 1, '2024-02-01', '', '', '')
+    fail_once(monkeypatch)
+    with pytest.raises(DatabaseError):
+        replica.sync()
+    service.update_link(local[0], ana, 'https://nuevo.com', 1, '2024-02-01', '', 'Editado', '')
+    replica.sync()
+    remote = db.find_duplicate_link(ana, 'https://nuevo.com')
+    assert db.fetchone("SELECT COUNT(*) FROM links WHERE link = 'https://nuevo.com'") == (1,)
+    assert (remote[9], remote[11]) == ('Editado', 2)
+    assert replica.get_link(remote[0])[11] == 2
+    assert replica.pending() == 0
+
+
+def test_retry_deletes_link_removed_after_the_insert(replica, db, ana, monkeypatch):
+    replica.sync()
+    service = LinksService(replica)
+    local = service.create_link(ana, 'https://nuevo.com', 1, '2024-02-01', '', '', '')
+    fail_once(monkeypatch)
+    with pytest.raises(DatabaseError):
+        replica.sync()
+    service.delete_link(local[0])
+    replica.sync()
+    assert db.find_duplicate_link(ana, 'https://nuevo.com') is None
+    assert replica.pending() == 0
+
+
+def test_delete_reaches_server(replica, db, ana):
+    replica.sync()
+    LinksService(replica).delete_link(1)
+    report = replica.sync()
+    assert db.get_link(1) is None
+    assert report.conflicts == []
+
+
+def test_delete_of_row_edited_on_server_is_a_conflict(replica, db, ana):
+    replica.sync()
+    LinksService(replica).delete_link(1)
+    LinksService(db).update_link(1, ana, 'https://ejemplo.com/1', 1, '2024-01-01', 'Autor',
+                                 'Cambiada en el servidor', 'python')
+    report = replica.sync()
+    assert [conflict[:2] for conflict in report.conflicts] == [('links', '1')]
+    assert db.get_link(1)[9] == 'Cambiada en el servidor'
+    assert replica.get_link(1)[9] == 'Cambiada en el servidor'
+    assert replica.pending() == 0
+
+
+def test_delete_of_user_edited_on_server_is_a_conflict(replica, db, ana):
+    db.insert_user('bea', 'Bea', 'Ruiz', None)
+    replica.sync()
+    LinksService(replica).delete_user('bea')
+    LinksService(db).update_user('bea', 'Beatriz', 'Ruiz', None)
+    report = replica.sync()
+    assert [conflict[:2] for conflict in report.conflicts] == [('usuario', 'bea')]
+    assert db.get_user('bea')[1] == 'Beatriz'
+    assert replica.get_user('bea')[1] == 'Beatriz'
+
+
+def test_delete_of_row_deleted_on_server_is_not_a_conflict(replica, db, ana):
+    replica.sync()
+    LinksService(replica).delete_link(1)
+    db.delete_link(1)
+    assert replica.sync().conflicts == []
+    assert replica.pending() == 0
@@ -0,0 +1,80 @@
+"""Temas de los links: texto separado por comas, tabla link_tema y contadores de tema."""
+from filters import LinkFilter
+from temas import edit_temas, fill_link_temas, format_temas, parse_temas
+
+
+def counts(db):
+    """{nombre: cantidad} según tema.cantidad, que mantienen los triggers"""
+    return {nombre: cantidad for _, nombre, cantidad in db.get_temas()}
+
+
+def counted(db):
+    """{nombre: cantidad} contando las filas de link_tema"""
+    return dict(db.fetchall("SELECT t.nombre, COUNT(*) FROM link_tema lt JOIN tema t ON t.id = lt.tema_id "
+                            "GROUP BY t.nombre"))
+
+
+def test_parse_and_format_temas():
+    assert parse_temas(" Python ,python, bases   de  datos,, ") == ['Python', 'bases de datos']
+    assert parse_temas(None) == []
+    assert format_temas("sql,  python ,SQL") == "sql, python"
+
+
+def test_edit_temas():
+    assert edit_temas("python, sql", add="web, Python") == "python, sql, web"
+    assert edit_temas("python, sql, web", remove="SQL, redes") == "python, web"
+    assert edit_temas("python", add="sql", remove="python") == "sql"
+
+
+def test_counts_follow_create_update_and_delete(service, ana):
+    db = service.db
+    assert counts(db) == {'python': 5, 'sql': 5}
+    link = service.create_link(ana, 'https://nuevo.com', 1, '2024-02-01', '', '', 'Python, web')
+    assert counts(db) == {'python': 6, 'sql': 5, 'web': 1}
+    # Cambia sólo la diferencia: sale web, entra redes, python queda
+    service.update_link(link[0], ana, 'https://nuevo.com', 1, '2024-02-01', '', '', 'python, redes',
+                        version=link[11])
+    assert counts(db) == {'python': 6, 'sql': 5, 'redes': 1}
+    service.delete_link(link[0])
+    assert counts(db) == {'python': 5, 'sql': 5}
+    assert counts(db) == counted(db)
+
+
+def test_counts_follow_bulk_insert_and_bulk_edit(service, ana):
+    db = service.db
+    db.insert_links_many([(ana, f'https://masivo.com/{n}', 1, '2024-03-01', '', '', 'web, sql')
+                          for n in range(3)])
+    assert counts(db) == {'python': 5, 'sql': 8, 'web': 3}
+    service.edit_links_temas([1, 2, 11], add='redes', remove='sql')
+    # 1 era python, 2 era sql, 11 era web, sql
+    assert counts(db) == {'python': 5, 'sql': 6, 'web': 3, 'redes': 3}
+    assert counts(db) == counted(db)
+
+
+def test_fill_link_temas_only_syncs_new_links(db, ana):
+    # Links escritos sin pasar por Database (como los de una migración)
+    db.execute("INSERT INTO links (usuario_id, link, multimedia_id, fecha, tema) "
+               "VALUES ('ana', 'https://directo.com', 1, '2024-03-01', 'datos, python')")
+    assert counts(db) == {'python': 5, 'sql': 5}
+    with db.transaction() as cursor:
+        fill_link_temas(cursor, db, after_id=10)
+    assert counts(db) == {'python': 6, 'sql': 5, 'datos': 1}
+    assert counts(db) == counted(db)
+
+
+def test_deleting_user_discounts_their_temas(service, ana):
+    service.create_user('bea', 'Bea', 'Ruiz', None)
+    service.create_link('bea', 'https://bea.com', 1, '2024-02-01', '', '', 'python, redes')
+    assert counts(service.db) == {'python': 6, 'sql': 5, 'redes': 1}
+    # En SQLite, los links se borran por la cascada de la clave foránea
+    service.delete_user(ana)
+    assert counts(service.db) == {'python': 1, 'redes': 1}
+    assert counts(service.db) == counted(service.db)
+
+
+def test_tema_filter_uses_each_tema_of_the_link(service, ana):
+    service.create_link(ana, 'https://nuevo.com', 1, '2024-02-01', '', '', 'web, SQL')
+    links = service.list_links(filters=LinkFilter(tema='sql'))
+    assert len(links) == 6
+    assert [link[4] for link in service.list_links(filters=LinkFilter(tema='web'))] == ['https://nuevo.com']
+    assert service.list_links(filters=LinkFilter(tema='redes')) == []
@@ -0,0 +1,42 @@
+"""TreeviewSync sobre un Treeview simulado que, como Tk, muestra None como "None"."""
+import itertools
+
+from widgets import TreeviewSync
+
+
+class Tree:
+    def __init__(self):
+        self.values = {}
+        self._ids = itertools.count()
+
+    def insert(self, parent, index, values=()):
+        item = f"I{next(self._ids)}"
+        self.item(item, values=values)
+        return item
+
+    def item(self, item, option=None, values=None):
+        if values is not None:
+            self.values[item] = tuple(str(value) for value in values)
+        return self.values[item]
+
+    def delete(self, *items):
+        for item in items:
+            del self.values[item]
+
+
+def test_null_values_are_shown_empty():
+    tree = Tree()
+    rows = TreeviewSync(tree)
+    item = rows.insert(('ana', 'Ana', 'García', None, 1))
+    assert tree.values[item] == ('ana', 'Ana', 'García', '', '1')
+
+    rows.update(('ana', 'Ana', 'García', None, 2))
+    assert tree.values[item] == ('ana', 'Ana', 'García', '', '2')
+
+
+def test_row_returns_the_inserted_values():
+    rows = TreeviewSync(Tree())
+    rows.insert(('ana', 'Ana', 'García', None, 1))
+    assert rows.row('ana') == ('ana', 'Ana', 'García', None, 1)
+    rows.remove('ana')
+    assert rows.row('ana') is None
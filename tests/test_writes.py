@@ -0,0 +1,72 @@
+"""Cola de escrituras: varias escrituras de distintos hilos en un solo commit."""
+import threading
+
+import pytest
+
+from database import IntegrityError, connect
+from migrations import migrate
+
+
+@pytest.fixture
+def queued_db(tmp_path):
+    # Ventana larga: todas las escrituras de la prueba entran en el mismo grupo
+    database = connect('sqlite', sqlite_path=str(tmp_path / "cola.db"), write_window_ms=500)
+    migrate(database)
+    yield database
+    database.close()
+
+
+def write_concurrently(writes):
+    """Ejecuta cada función de ``writes`` en su hilo, todas a la vez; devuelve resultado o excepción"""
+    barrier = threading.Barrier(len(writes))
+    results = [None] * len(writes)
+
+    def run(i):
+        barrier.wait()
+        try:
+            results[i] = writes[i]()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(writes))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def half_write(cursor):
+    cursor.execute("UPDATE usuario SET nombre = 'Cambiada' WHERE id = 'ana'")
+    raise ValueError("falla a mitad de la escritura")
+
+
+def test_failed_write_rolls_back_only_its_savepoint(queued_db):
+    queued_db.insert_user('ana', 'Ana', 'García', 'ana@ejemplo.com')
+    queue = queued_db.write_queue
+    batches = queue.batches
+
+    writes = [lambda n=n: queued_db.insert_link('ana', f'https://ejemplo.com/{n}', 1, '2024-01-01',
+                                                '', '', 'python')
+              for n in range(6)]
+    # Repite el id de ana: falla sin deshacer las demás
+    writes.insert(3, lambda: queued_db.insert_user('ana', 'Otra', 'Ana', None))
+    # Falla después de escribir: su SAVEPOINT deshace lo que había hecho
+    writes.insert(5, lambda: queue.submit(half_write).result())
+    results = write_concurrently(writes)
+
+    assert queue.batches == batches + 1
+    assert isinstance(results[3], IntegrityError)
+    assert isinstance(results[5], ValueError)
+    link_ids = results[:3] + [results[4]] + results[6:]
+    assert all(isinstance(link_id, int) for link_id in link_ids)
+    assert sorted(row[0] for row in queued_db.fetchall("SELECT id FROM links")) == sorted(link_ids)
+    assert queued_db.get_user('ana')[1] == 'Ana'
+    assert [row[1:] for row in queued_db.get_temas()] == [('python', 6)]
+
+
+def test_closed_queue_rejects_writes(queued_db):
+    queue = queued_db.write_queue
+    queued_db.stop_write_queue()
+    with pytest.raises(RuntimeError):
+        queue.submit(lambda cursor: None).result()